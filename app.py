@@ -1,14 +1,37 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
-from openai import OpenAI
+from flask import Flask, Response, request, jsonify, abort, g, has_request_context
+from werkzeug.security import safe_join
+from openai import OpenAI, APIError
 import os
 from dotenv import load_dotenv
-from generate.git_handler import git_commit_and_push
-from generate.logger import log_commit
+from generate.logger import log_commit, query_commits, iter_commits, pages_of_commit
+from generate.jobs import submit_job, get_job
+from generate.committer import commit_file
+from generate.workspace import get_workspace
+from generate.tenants import TENANT_HEADER, TenantError, UnknownTenantError, tenant_workspace, create_tenant, tenants
+from generate.cache import cache_key, get_cached, put_cached, cache_stats
+from generate.blobstore import get_blobstore
+from generate.http_cache import send_cached_file, send_entry
+from generate.publish import publish, live_index, live_html
+from generate.fingerprint import (
+    SKIP_NEAR_DUPLICATES, SIMILAR_SCAN_MAX, check_near_duplicate, get_fingerprints, fingerprint
+)
+from generate.llm import call_llm, llm_stats, breaker, CircuitOpenError
+from generate import metrics
+from generate.metrics import timed
+from generate.deploys import (
+    record_deploy, set_deploy_commit, current_deploy, find_deploy, previous_deploy, deploy_history, deploys_of
+)
+from generate.lineage import history
+from generate.snapshots import schedule_snapshot, read_snapshots
+from generate.extract import HtmlExtractor, extract_html
+from generate.search import search
+from generate.retention import collect, find_archived
+from generate.patching import PatchError, check_region, select_region, build_patch_prompt, parse_edits, apply_edits
+import re
 import json
-import subprocess
 import logging
-import re
-import shutil
+import time
+import uuid
 
 
 logging.basicConfig(
@@ -22,31 +45,105 @@ logging.basicConfig(
 
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# 재시도/타임아웃은 generate.llm에서 처리하므로 SDK 자체 재시도는 끔
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
 
 app = Flask(__name__, static_folder='static')
 
+
+# 이 헤더가 있으면 JSON 응답에 단계별 소요 시간(ms)을 timings로 붙인다
+DEBUG_TIMING_HEADER = "X-Debug-Timing"
+# 롤백 대상으로 받는 이름: 커밋 해시(약어 포함) 또는 page_id/별칭 (git 옵션이나 경로로 읽히지 않게)
+_COMMIT_HASH = re.compile(r"[0-9a-f]{7,64}")
+_ROLLBACK_NAME = re.compile(r"[0-9A-Za-z][0-9A-Za-z_-]{0,127}")
+
+metrics.register("orrne_cache_hits_total", "counter", "Prompt cache hits", lambda: cache_stats()["hits"])
+metrics.register("orrne_cache_misses_total", "counter", "Prompt cache misses", lambda: cache_stats()["misses"])
+metrics.register("orrne_cache_entries", "gauge", "Cached responses", lambda: cache_stats()["size"])
+metrics.register(
+    "orrne_llm_events_total", "counter", "OpenAI calls, attempts, retries, hedges and failures",
+    lambda: {(("event", name),): value for name, value in llm_stats().items() if isinstance(value, int)}
+)
+metrics.register(
+    "orrne_llm_breaker_open", "gauge", "1 while the OpenAI circuit breaker is open",
+    lambda: int(breaker.state == "open")
+)
+
+
+@app.before_request
+def start_request_timing():
+    request.environ["orrne.start"] = time.perf_counter()
+    if request.headers.get(DEBUG_TIMING_HEADER):
+        request.environ["orrne.timings"] = metrics.start_breakdown()
+
+
+@app.after_request
+def finish_request_timing(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    elapsed = time.perf_counter() - request.environ.get("orrne.start", time.perf_counter())
+    metrics.observe("orrne_request_seconds", elapsed, route=route)
+    metrics.count("orrne_requests_total", route=route, method=request.method, status=response.status_code)
+
+    timing = request.environ.pop("orrne.timings", None)
+    if timing is not None:
+        breakdown, token = timing
+        metrics.stop_breakdown(token)
+        body = response.get_json(silent=True) if response.is_json and not response.is_streamed else None
+        if isinstance(body, dict):
+            body["timings"] = dict(breakdown, total=round(elapsed * 1000, 2))
+            response.set_data(app.json.dumps(body))
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.before_request
+def resolve_tenant():
+    # X-Orrne-Tenant 헤더 또는 ?tenant= 로 저장소를 고른다 (만들어진 테넌트나 ORRNE_TENANTS에 있는 것만)
+    try:
+        g.workspace = tenant_workspace(request.headers.get(TENANT_HEADER) or request.args.get("tenant"))
+    except UnknownTenantError as e:
+        return jsonify({"error": str(e)}), 404
+    except TenantError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+def current_workspace():
+    """요청을 처리할 저장소(테넌트별). 모든 파일/git 작업은 이 경로 기준 절대 경로로 수행한다.
+
+    요청 밖(백그라운드 작업, metrics 등)에서는 기본 저장소.
+    """
+    if has_request_context() and "workspace" in g:
+        return g.workspace
+    return get_workspace()
+
+
 @app.route('/', methods=['GET'])
 def serve_index():
-    return send_from_directory(app.static_folder, 'index.html')
+    # 배포 때 교체해 둔 메모리 사본 (디스크 읽기 없음)
+    entry = live_index(current_workspace())
+    if entry is None:
+        abort(404)
+    return send_entry(entry)
 
 
 # 1) /ui/ 로 접속하면 static/ui/index.html 렌더링
 @app.route("/ui/", methods=["GET"])
 def serve_editor_ui():
-    return send_from_directory(
-        os.path.join(app.static_folder, "editor_ui"),
-        "index.html"
-    )
+    return serve_ui_assets("index.html")
 
 
 # 2) /ui/ 아래의 .css/.js 파일 요청도 static/ui 폴더에서 서빙
+#    (배포마다 바뀔 수 있으므로 ETag로 매번 재검증)
 @app.route("/ui/<path:filename>", methods=["GET"])
 def serve_ui_assets(filename):
-    return send_from_directory(
-        os.path.join(app.static_folder, "editor_ui"),
-        filename
-    )
+    path = safe_join(os.path.join(app.static_folder, "editor_ui"), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    return send_cached_file(path)
 
 
 @app.route("/generate", methods=["POST"])
@@ -58,77 +155,18 @@ def generate():
         if not prompt:
             return jsonify({"error": "Prompt is required"}), 400
 
-        # OpenAI 요청
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        # OpenAI 응답 가공
-        raw_response = response.choices[0].message.content.strip()
-
-        # ```html 블록 추출
-        match = re.search(r"```html\s*(.*?)```", raw_response, flags=re.DOTALL | re.IGNORECASE)
-        if match:
-            html_code = match.group(1).strip()
-        else:
-            # fallback: <html> 또는 <!DOCTYPE html>로 시작하는 위치부터 추출
-            html_start = re.search(r"(?i)(<!doctype html>|<html[\s>])", raw_response)
-            if html_start:
-                html_code = raw_response[html_start.start():].strip()
-            else:
-                return jsonify({"error": "OpenAI 응답에서 HTML 코드를 찾을 수 없습니다."}), 400
-
-
-        if "<html" not in html_code.lower():
-            return jsonify({"error": "OpenAI 응답이 HTML 형식이 아닙니다."}), 400
-       
-
-        # 1) 최종 생성 파일명을 우선 결정 (임시 없이)
-        commit_id = subprocess.check_output(
-            ["uuidgen"], text=True  # 임시로 uuid를 커밋 ID로 사용
-        ).strip()
-        output_path = os.path.join("static", "generated", f"{commit_id}.html")
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(html_code)
-
-        # preview 경로에도 동일하게 저장
-        preview_path = os.path.join("static", "preview", f"{commit_id}.html")
-        with open(preview_path, "w", encoding="utf-8") as f:
-            f.write(html_code)
-
-        # 2) 생성물 파일만 커밋
-        git_result = git_commit_and_push(
-                output_path, 
-                html_code, 
-                commit_message=f"Add {commit_id}.html", 
-                force_commit=True
-        )
+        workspace = current_workspace()
+        use_cache = not _cache_bypassed(data)
 
-        
-        if git_result.get("success"):
-            log_commit(prompt, git_result["commit_id"], html_code[:10000])
-            return jsonify({
-                "status": "success",
-                "message": "HTML generated and pushed to GitHub",
-                "commit_id": git_result["commit_id"],
-                "timestamp": git_result["timestamp"]
-            })
-
-        elif git_result.get("skipped"):
-            return jsonify({
-                "status": "skipped",
-                "message": git_result["message"]
-            })
-
-        else:
-            return jsonify({
-                "status": "error",
-                "message": "HTML generated but Git push failed",
-                "error": git_result.get("error", "")
-            }), 500
+        # job 모드: 바로 job id를 반환하고 워커 풀에서 처리
+        if data.get("async"):
+            return _queue_job("generate", generate_page, workspace, prompt, use_cache)
 
+        body, status_code = generate_page(workspace, prompt, use_cache)
+        return jsonify(body), status_code
 
+    except (CircuitOpenError, APIError) as e:
+        return _upstream_error(e)
     except Exception as e:
         # 스택트레이스 전체를 로그에 기록
         logging.exception("Generate handler failed")
@@ -138,55 +176,360 @@ def generate():
         }), 500
 
 
+def generate_page(workspace, prompt, use_cache=True):
+    """프롬프트로 HTML을 생성하고 커밋한다. (응답 dict, 상태코드)를 반환."""
+    # 같은(정규화된) 프롬프트로 만든 HTML이 있으면 OpenAI 호출 생략
+    key = cache_key(prompt, "gpt-4o")
+    if use_cache:
+        cached_html = get_cached(key, workspace=workspace)
+        if cached_html is not None:
+            body, status_code = save_generated_page(workspace, prompt, cached_html)
+            body["cached"] = True
+            return body, status_code
+
+    # OpenAI 요청
+    response, attempts = call_llm(client, [{"role": "user", "content": prompt}])
+    return finish_generated_page(workspace, prompt, key, response, attempts)
+
+
+def finish_generated_page(workspace, prompt, key, response, attempts=None):
+    """OpenAI 응답을 가공해 캐시/저장한다. (동기/비동기 서버가 함께 사용)"""
+    raw_response = response.choices[0].message.content.strip()
+
+    html_code, error = extract_html(raw_response)
+    if error:
+        return {"error": error, "llm_attempts": attempts}, 400
+
+    put_cached(key, html_code, workspace=workspace)
+    body, status_code = save_generated_page(workspace, prompt, html_code)
+    body["llm_attempts"] = attempts
+    return body, status_code
+
+
+def _cache_bypassed(data):
+    """요청 본문의 no_cache 또는 Cache-Control: no-cache 헤더로 캐시를 건너뛴다."""
+    return bool(data.get("no_cache")) or "no-cache" in request.headers.get("Cache-Control", "")
+
+
+def save_generated_page(workspace, prompt, html_code):
+    """생성된 HTML을 저장/커밋/로그 기록한다. (응답 dict, 상태코드)를 반환."""
+    # 1) 최종 생성 id를 우선 결정 (임시 없이)
+    commit_id = str(uuid.uuid4())  # 임시로 uuid를 커밋 ID로 사용
+
+    # 구조/텍스트가 거의 같은 기존 페이지가 있으면 표시 (설정 시 커밋 생략)
+    simhash, duplicate = check_near_duplicate(html_code, workspace=workspace)
+    if duplicate and SKIP_NEAR_DUPLICATES:
+        return _near_duplicate_skipped(duplicate), 200
+
+    # 내용 해시 기준으로 한 번만 저장하고 uuid는 별칭/링크로 연결 (GC와 겹치지 않게)
+    store = get_blobstore(workspace)
+    sha, link = store.put_linked(html_code, commit_id)
+
+    # 2) 생성물 파일과 uuid → blob 링크를 커밋 (배치 커미터가 동시 요청을 하나의 커밋으로 묶음)
+    git_result = commit_file(
+            store.blob_path(sha),
+            html_code,
+            commit_message=f"Add {commit_id}.html",
+            write_preview=False,
+            workspace=workspace,
+            links=[link]
+    )
+    _alias_commit(store, git_result, sha)
+    if git_result.get("success") or git_result.get("skipped"):
+        get_fingerprints(workspace).add(commit_id, simhash)
+        schedule_snapshot(store.blob_path(sha), html_code)
+
+    # 같은 내용의 blob이 이미 있어도 새 uuid 링크가 함께 커밋되므로 새 커밋으로 기록 (로그/검색/계보)
+    if git_result.get("commit_id"):
+        log_commit(prompt, git_result["commit_id"], html_code, page_id=commit_id, workspace=workspace)
+
+    if git_result.get("success"):
+        return {
+            "status": "success",
+            "message": "HTML generated and pushed to GitHub",
+            "commit_id": git_result["commit_id"],
+            "page_id": commit_id,
+            "timestamp": git_result["timestamp"],
+            "preview_url": f"/preview/{commit_id}",
+            "near_duplicate_of": duplicate
+        }, 200
+
+    elif git_result.get("skipped"):
+        # 트리가 바뀌지 않아 커밋이 생략됨 (uuid 링크가 매번 새로 추가되므로 보통은 일어나지 않음)
+        return {
+            "status": "skipped",
+            "message": git_result["message"],
+            "commit_id": git_result.get("commit_id"),
+            "page_id": commit_id,
+            "preview_url": f"/preview/{commit_id}",
+            "near_duplicate_of": duplicate
+        }, 200
+
+    else:
+        return {
+            "status": "error",
+            "message": "HTML generated but Git push failed",
+            "error": git_result.get("error", "")
+        }, 500
+
+
+def _near_duplicate_skipped(duplicate):
+    return {
+        "status": "skipped",
+        "message": "거의 같은 페이지가 이미 있어 커밋 생략",
+        "page_id": duplicate["page_id"],
+        "preview_url": f"/preview/{duplicate['page_id']}",
+        "near_duplicate_of": duplicate
+    }
+
+
+def _alias_commit(store, git_result, sha):
+    # 커밋 해시로도 조회할 수 있게 연결. 여러 파일이 묶인 배치 커밋의 해시는 한 페이지를 가리키지 않으므로 생략
+    if git_result.get("commit_id") and git_result.get("batch_size", 1) == 1:
+        store.add_alias(git_result["commit_id"], sha)
+
+
+def ambiguous_commit(workspace, name):
+    """name이 서로 다른 페이지 여럿이 함께 커밋된 해시면 409 응답 본문, 아니면 None
+
+    예전에 배치 커밋 해시로 연결해 둔 별칭(마지막 페이지만 남음)도 이 검사가 먼저 막는다.
+    """
+    page_ids = pages_of_commit(name, workspace=workspace)
+    if len(page_ids) < 2:
+        return None
+    store = get_blobstore(workspace)
+    if len({store.blob_of(page_id) for page_id in page_ids}) < 2:
+        return None
+    return {"error": "ambiguous commit, use page_id", "page_ids": page_ids}
+
+
+def _upstream_error(error):
+    """재시도 후에도 실패한 OpenAI 호출 → 503(회로 열림) / 502"""
+    logging.warning(f"[llm] upstream 실패: {error}")
+    if isinstance(error, CircuitOpenError):
+        return jsonify({"error": str(error)}), 503, {"Retry-After": str(int(breaker.retry_after()) + 1)}
+    return jsonify({"error": "OpenAI 요청 실패", "details": str(error)}), 502
+
+
+def _queue_job(kind, func, *args):
+    job_id = submit_job(kind, func, *args, owner=current_workspace())
+    if job_id is None:
+        return jsonify({"error": "작업 대기열이 가득 찼습니다. 잠시 후 다시 시도해 주세요."}), 503
+    return jsonify({
+        "status": "queued",
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}"
+    }), 202
+
+
+@app.route("/admin/cache", methods=["GET"])
+def admin_cache():
+    return jsonify(cache_stats(workspace=current_workspace()))
+
+
+@app.route("/admin/llm", methods=["GET"])
+def admin_llm():
+    """OpenAI 호출 통계 (시도/재시도/hedge 횟수, 회로 상태, 지연 p50/p95/p99)"""
+    return jsonify(llm_stats())
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    # 다른 테넌트의 작업은 없는 것으로
+    job = get_job(job_id, owner=current_workspace())
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
 @app.route("/preview/<commit_id>", methods=["GET"])
 def preview(commit_id):
-    preview_path = os.path.join("static", "preview", f"{commit_id}.html")
-    generated_path = os.path.join("static", "generated", f"{commit_id}.html")
-
-    # preview 파일이 없고, generated는 있을 경우 fallback 복사
-    if not os.path.exists(preview_path):
-        if os.path.exists(generated_path):
-            os.makedirs(os.path.dirname(preview_path), exist_ok=True)
-            shutil.copy(generated_path, preview_path)
-        else:
-            return jsonify({"error": "Preview and generated file not found"}), 404
-
-    return send_file(preview_path)
+    # uuid/커밋 해시 → 파일 경로를 메모리 인덱스에서 한 번에 조회 (복사 없음)
+    workspace = current_workspace()
+    ambiguous = ambiguous_commit(workspace, commit_id)
+    if ambiguous:
+        return jsonify(ambiguous), 409
+    store = get_blobstore(workspace)
+    page_path = store.resolve(commit_id)
+    if page_path is None or not os.path.exists(page_path):
+        # GC로 보관된 페이지는 404 대신 410 (python -m generate.retention --restore 로 복원)
+        archive = find_archived(commit_id, workspace=workspace)
+        if archive is not None:
+            return jsonify({"error": "보관된 페이지입니다.", "archive": archive}), 410
+        return jsonify({"error": "Preview and generated file not found"}), 404
+
+    # 생성물은 한 번 쓰이면 바뀌지 않음 (수정은 새 id) → 내용 해시 ETag + 장기 캐시
+    return send_cached_file(page_path, immutable=True, etag=store.blob_of(commit_id))
+
+
+@app.route("/previews", methods=["GET"])
+def previews():
+    """히스토리 카드용 정적 스냅샷을 한 번에 (?ids=a,b,c, 최대 100개)
+
+    {"previews": {id: {"title", "headings", "html"}}} — html은 스크립트/외부 자원 없는 요약 조각
+    """
+    ids = [name for name in request.args.get("ids", "").split(",") if name][:100]
+    if not ids:
+        return jsonify({"error": "ids가 필요합니다."}), 400
+    snapshots = read_snapshots(ids, get_blobstore(current_workspace()))
+    return jsonify(previews=snapshots, missing=[name for name in ids if name not in snapshots])
 
 
 @app.route("/admin/logs", methods=["GET"])
 def admin_logs():
+    """커밋 로그 조회.
+
+    ?limit=&after=&order=asc|desc 로 페이지 단위 조회,
+    ?since=&until=(ISO 시각) / ?type=revise_from|rollback_from|generate / ?q=(프롬프트 부분 문자열) 필터,
+    ?format=ndjson 이면 조건에 맞는 전체 항목을 한 줄씩 스트리밍한다.
+    """
     try:
-        log_file = os.path.join("logs", "commits.json")
-        if not os.path.exists(log_file):
-            return jsonify({"logs": []})
-        with open(log_file, "r", encoding="utf-8") as f:
-            logs = json.load(f)
-        return jsonify(logs=logs)
+        workspace = current_workspace()
+        order = "desc" if request.args.get("order") == "desc" else "asc"
+        filters = {
+            "after": request.args.get("after", type=int),
+            "order": order,
+            "since": request.args.get("since"),
+            "until": request.args.get("until"),
+            "extra_type": request.args.get("type"),
+            "q": request.args.get("q"),
+        }
+
+        if request.args.get("format") == "ndjson":
+            rows = iter_commits(limit=request.args.get("limit", type=int), workspace=workspace, **filters)
+            return Response(
+                (entry + "\n" for _, entry in rows),
+                mimetype="application/x-ndjson"
+            )
+
+        limit = min(max(request.args.get("limit", 100, type=int), 1), 1000)
+        logs, next_cursor = query_commits(limit=limit, workspace=workspace, **filters)
+        return jsonify(logs=logs, next_cursor=next_cursor)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/search", methods=["GET"])
+def search_pages():
+    """프롬프트와 페이지 본문 전문 검색 (?q=&limit=). 관련도 순, 한글은 조사가 붙어 있어도 찾는다."""
+    q = request.args.get("q", "").strip()
+    if not q:
+        return jsonify({"error": "q가 필요합니다."}), 400
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    results = search(q, limit=limit, workspace=current_workspace())
+    return jsonify(query=q, results=results)
+
+@app.route("/history/<page_id>", methods=["GET"])
+def page_history(page_id):
+    """페이지 버전 계보: 조상(루트부터)과 자손, 각 버전의 배포 기록 (?limit=)
+
+    page_id 자리에 커밋 해시도 받는다. previous는 나란히 비교할 직전 버전이다.
+    """
+    workspace = current_workspace()
+    ambiguous = ambiguous_commit(workspace, page_id)
+    if ambiguous:
+        return jsonify(ambiguous), 409
+    limit = min(max(request.args.get("limit", 100, type=int), 1), 1000)
+    result = history(page_id, limit=limit, workspace=workspace)
+    if result is None:
+        return jsonify({"error": "Page not found"}), 404
+
+    versions = [result["version"], *result["ancestors"], *result["descendants"]]
+    deployed = deploys_of({version["page_id"] for version in versions}, workspace=workspace)
+    for version in versions:
+        version.pop("path", None)
+        version["preview_url"] = f"/preview/{version['page_id']}"
+        version["deploys"] = deployed.get(version["page_id"], [])
+    return jsonify(result)
+
+@app.route("/similar/<page_id>")
+def similar(page_id):
+    """구조/텍스트가 가장 비슷한 다른 페이지 목록 (?limit=, ?max_distance=, ?exhaustive=1)
+
+    서명이 많으면 밴드 인덱스로 후보만 본다 (16비트 밴드 하나가 같은 페이지). 전체를 훑으려면 ?exhaustive=1.
+    """
+    workspace = current_workspace()
+    index = get_fingerprints(workspace)
+
+    simhash = index.get(page_id)
+    if simhash is None:
+        # 서명이 없는 예전 페이지는 한 번만 계산해서 저장
+        html_code = get_blobstore(workspace).read(page_id)
+        if html_code is None:
+            return jsonify({"error": "Page not found"}), 404
+        simhash = fingerprint(html_code)
+        index.add(page_id, simhash)
+
+    limit = min(max(request.args.get("limit", 5, type=int), 1), 50)
+    max_distance = request.args.get("max_distance", 16, type=int)
+    exhaustive = request.args.get("exhaustive") == "1" or index.size() <= SIMILAR_SCAN_MAX
+    matches = index.nearest(simhash, limit=limit, max_distance=max_distance, exclude=page_id, exhaustive=exhaustive)
+    return jsonify(page_id=page_id, similar=matches)
+
 @app.route("/admin/approve/<commit_id>", methods=["POST"])
 def approve(commit_id):
-    gen_path = os.path.join("static", "generated", f"{commit_id}.html")
-    preview_path = os.path.join("static", "preview", f"{commit_id}.html")
-    index_path = os.path.join("static", "index.html")
-
-    # generated에 없으면 preview에서 복사해 generated를 보완
-    if not os.path.exists(gen_path):
-        if os.path.exists(preview_path):
-            shutil.copy(preview_path, gen_path)
-        else:
-            return jsonify({"error": "Neither generated nor preview file found"}), 404
+    """페이지를 live index.html로 배포한다.
+
+    파일/메모리 사본 교체는 응답 전에 끝나고, git 커밋/푸시는 배치 커미터가 뒤에서 한다.
+    ?wait=1 이면 커밋까지 기다려 deploy_commit_id를 함께 돌려준다.
+    """
+    workspace = current_workspace()
+    ambiguous = ambiguous_commit(workspace, commit_id)
+    if ambiguous:
+        return jsonify(ambiguous), 409
+    store = get_blobstore(workspace)
+
+    html_code = store.read(commit_id)
+    if html_code is None:
+        return jsonify({"error": "Neither generated nor preview file found"}), 404
+
+    blob = store.blob_of(commit_id) or store.put(html_code)
+    # 확인 → 교체 → 기록 사이에 다른 승인/롤백이 끼면 배포 기록 순서가 live와 어긋나므로 한 번에
+    with workspace.deploy_lock:
+        current = current_deploy(workspace=workspace)
+        if current is not None and current["blob"] == blob:
+            return jsonify({"status": "approved", "commit_id": commit_id, "skipped": True,
+                            "deploy_commit_id": current["deploy_commit"]})
+
+        # 1. 원자적 교체 — 다음 요청부터 새 페이지
+        publish(html_code, workspace=workspace)
+        deploy = record_deploy("approve", blob, None, page_id=commit_id, workspace=workspace)
+
+    # 2. 커밋/푸시는 백그라운드
+    result = _commit_deploy(workspace, deploy, f"approve {commit_id}", wait=request.args.get("wait") == "1")
+    if result is not None and not result.get("success") and not result.get("skipped"):
+        return jsonify({
+            "status": "error",
+            "message": result.get("message", "Git push failed"),
+            "error": result.get("error", "")
+        }), 500
 
-    # 배포
-    shutil.copy(gen_path, index_path)
+    return jsonify({
+        "status": "approved",
+        "commit_id": commit_id,
+        "deploy_id": deploy["seq"],
+        "deploy_commit_id": result.get("commit_id") if result else None
+    })
 
-    subprocess.run(["git", "add", index_path])
-    subprocess.run(["git", "commit", "-m", f"approve {commit_id}"])
-    subprocess.run(["git", "push", "origin", "main"])
 
-    return jsonify({"status": "approved", "commit_id": commit_id})
+def _commit_deploy(workspace, deploy, commit_message, wait=False, after=None):
+    """live index.html을 배치 커미터로 커밋하고, 끝나면 배포 기록에 커밋 해시를 채운다.
+
+    커밋 내용은 커밋 직전의 live 사본이므로, 그 사이 다시 배포됐어도 저장소가 live와 어긋나지 않는다.
+    (그 사이 live 파일이 지워졌으면 이 배포의 내용으로)
+    """
+    def on_done(result):
+        if result.get("success"):
+            set_deploy_commit(deploy["seq"], result["commit_id"], workspace=workspace)
+            if after is not None:
+                after(result)
+        elif not result.get("skipped"):
+            logging.error(f"[deploy] {deploy['seq']} 커밋 실패: {result.get('error') or result.get('message')}")
+
+    return commit_file(
+        workspace.index_path(), lambda: live_html(workspace) or get_blobstore(workspace).read(deploy["blob"]),
+        commit_message,
+        write_preview=False, workspace=workspace, wait=wait, on_done=on_done
+    )
 
 
 
@@ -200,89 +543,31 @@ def revise():
         if not commit_id or not revision_prompt:
             return jsonify({"error": "commit_id와 prompt가 필요합니다."}), 400
 
-        # 기존 HTML 경로 확인
-        existing_path = os.path.join("static", "generated", f"{commit_id}.html")
-        if not os.path.exists(existing_path):
-            # preview 디렉토리 fallback
-            fallback_path = os.path.join("static", "preview", f"{commit_id}.html")
-            if os.path.exists(fallback_path):
-                existing_path = fallback_path
-            else:
-                return jsonify({"error": "기존 HTML 파일을 찾을 수 없습니다."}), 404
-
-
-        # 기존 HTML 읽기
-        with open(existing_path, "r", encoding="utf-8") as f:
-            existing_html = f.read()
-
-        # 통합 프롬프트 구성
-        combined_prompt = (
-            "다음은 기존 HTML 코드입니다:\n\n"
-            f"{existing_html}\n\n"
-            "아래 요청사항을 반영하여 HTML을 전체 구조로 다시 생성해 주세요:\n\n"
-            f"{revision_prompt}"
-        )
-
-        # GPT 호출
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": combined_prompt}]
-        )
-        raw_response = response.choices[0].message.content.strip()
-
-        # ```html 블록 추출
-        match = re.search(r"```html\s*(.*?)```", raw_response, flags=re.DOTALL | re.IGNORECASE)
-        if match:
-            html_code = match.group(1).strip()
-        else:
-            html_start = re.search(r"(?i)(<!doctype html>|<html[\s>])", raw_response)
-            if html_start:
-                html_code = raw_response[html_start.start():].strip()
-            else:
-                return jsonify({"error": "OpenAI 응답에서 HTML 코드를 찾을 수 없습니다."}), 400
-
-        if "<html" not in html_code.lower():
-            return jsonify({"error": "HTML 형식이 아닙니다."}), 400
-
-        # 새로운 UUID commit_id 생성
-        new_commit_id = subprocess.check_output(["uuidgen"], text=True).strip()
-        gen_path = os.path.join("static", "generated", f"{new_commit_id}.html")
-        preview_path = os.path.join("static", "preview", f"{new_commit_id}.html")
-
-        # HTML 저장
-        with open(gen_path, "w", encoding="utf-8") as f:
-            f.write(html_code)
-        with open(preview_path, "w", encoding="utf-8") as f:
-            f.write(html_code)
-
-        # Git 커밋 및 푸시
-        result = git_commit_and_push(
-            gen_path,
-            html_code,
-            commit_message=f"revise {commit_id} → {new_commit_id}",
-            force_commit=True
-        )
-
-        if result.get("success"):
-            log_commit(
-                f"[Revise from {commit_id}] {revision_prompt}",
-                result["commit_id"],
-                html_code[:10000],
-                extra_info={"revise_from": commit_id}
-            )
-            return jsonify({
-                "status": "success",
-                "commit_id": result["commit_id"],
-                "base_commit": commit_id,
-                "preview_url": f"/preview/{new_commit_id}"
-            })
-        else:
-            return jsonify({
-                "status": "error",
-                "message": result.get("message", "Git push failed"),
-                "error": result.get("error", "")
-            }), 500
-
+        workspace = current_workspace()
+
+        # mode="patch": 전체 재생성 대신 부분 수정안을 받아 적용
+        # (selector / target_text로 모델에 보낼 영역을 좁힐 수 있음)
+        options = {
+            "mode": data.get("mode", "full"),
+            "selector": data.get("selector"),
+            "target_text": data.get("target_text"),
+        }
+        try:
+            check_region(options["selector"], options["target_text"])
+        except PatchError as e:
+            return jsonify({"error": str(e)}), 400
+        ambiguous = ambiguous_commit(workspace, commit_id)
+        if ambiguous:
+            return jsonify(ambiguous), 409
+
+        if data.get("async"):
+            return _queue_job("revise", revise_page, workspace, commit_id, revision_prompt, options)
+
+        body, status_code = revise_page(workspace, commit_id, revision_prompt, options)
+        return jsonify(body), status_code
+
+    except (CircuitOpenError, APIError) as e:
+        return _upstream_error(e)
     except Exception as e:
         logging.exception("[revise] 에러 발생")
         return jsonify({
@@ -291,88 +576,351 @@ def revise():
         }), 500
 
 
+def revise_page(workspace, commit_id, revision_prompt, options=None):
+    """기존 HTML에 수정 요청을 반영해 새 버전을 커밋한다. (응답 dict, 상태코드)를 반환."""
+    options = options or {}
+    patch_failure = None
 
+    if options.get("mode") == "patch":
+        body, status_code = revise_page_patch(workspace, commit_id, revision_prompt, options)
+        if body is not None:
+            return body, status_code
+        # 수정안을 적용할 수 없으면 전체 재생성으로 fallback
+        patch_failure = status_code
+
+    combined_prompt, error = build_revision_prompt(workspace, commit_id, revision_prompt)
+    if error:
+        return {"error": error}, 404
+
+    # GPT 호출
+    response, attempts = call_llm(client, [{"role": "user", "content": combined_prompt}])
+    return finish_revised_page(workspace, commit_id, revision_prompt, response, patch_failure, attempts)
+
+
+def finish_revised_page(workspace, commit_id, revision_prompt, response, patch_failure=None, attempts=None):
+    raw_response = response.choices[0].message.content.strip()
+
+    html_code, error = extract_html(raw_response)
+    if error:
+        return {"error": error, "llm_attempts": attempts}, 400
+
+    body, status_code = save_revised_page(workspace, commit_id, revision_prompt, html_code)
+    body["mode"] = "full"
+    body["usage"] = _usage(response)
+    body["llm_attempts"] = attempts
+    if patch_failure:
+        body["patch_fallback"] = patch_failure
+    return body, status_code
 
-@app.route("/admin/rollback", methods=["POST"])
-def rollback():
-    auth = request.headers.get('Authorization', '')
-    if 'Bearer admin-secret-token-here' not in auth:
-        return jsonify({"error": "Unauthorized"}), 401
+
+def revise_page_patch(workspace, commit_id, revision_prompt, options):
+    """모델에게 find/replace 수정안만 받아 기존 HTML에 적용한다.
+
+    적용에 실패하면 (None, 실패 사유)를 반환해 호출 측이 전체 재생성을 하도록 한다.
+    """
+    patch = build_patch_request(workspace, commit_id, revision_prompt, options)
+    if patch is None:
+        return {"error": "기존 HTML 파일을 찾을 수 없습니다."}, 404
+
+    response, attempts = call_llm(client, [{"role": "user", "content": patch["prompt"]}])
+    return finish_patch(workspace, commit_id, revision_prompt, patch, response, attempts)
+
+
+@timed("load_base")
+def build_patch_request(workspace, commit_id, revision_prompt, options):
+    """수정 대상 HTML과 모델에 보낼 영역/프롬프트. 기존 HTML이 없으면 None."""
+    existing_html = get_blobstore(workspace).read(commit_id)
+    if existing_html is None:
+        return None
+
+    # 관련 영역만 보내고, 못 찾으면 문서 전체를 보냄
+    region = select_region(existing_html, options.get("selector"), options.get("target_text"))
+    begin, end = region or (0, len(existing_html))
+    return {
+        "html": existing_html,
+        "begin": begin,
+        "end": end,
+        "prompt": build_patch_prompt(existing_html[begin:end], revision_prompt, partial=region is not None),
+    }
+
+
+def finish_patch(workspace, commit_id, revision_prompt, patch, response, attempts=None):
+    raw_response = response.choices[0].message.content.strip()
 
     try:
+        html_code = apply_edits(patch["html"], parse_edits(raw_response), patch["begin"], patch["end"])
+    except PatchError as e:
+        logging.warning(f"[revise] 수정안 적용 실패, 전체 재생성으로 전환: {e}")
+        return None, str(e)
+
+    _, error = extract_html(html_code)
+    if error:
+        return None, error
+
+    body, status_code = save_revised_page(workspace, commit_id, revision_prompt, html_code)
+    body["mode"] = "patch"
+    body["usage"] = _usage(response)
+    body["llm_attempts"] = attempts
+    return body, status_code
+
+
+def _usage(response):
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    return {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+
+
+@timed("load_base")
+def build_revision_prompt(workspace, commit_id, revision_prompt):
+    """기존 HTML과 수정 요청을 합친 프롬프트를 만든다. (프롬프트, 에러 메시지)를 반환."""
+    # 기존 HTML 읽기 (uuid/커밋 해시 모두 blob 인덱스에서 조회)
+    existing_html = get_blobstore(workspace).read(commit_id)
+    if existing_html is None:
+        return None, "기존 HTML 파일을 찾을 수 없습니다."
+
+    # 통합 프롬프트 구성
+    combined_prompt = (
+        "다음은 기존 HTML 코드입니다:\n\n"
+        f"{existing_html}\n\n"
+        "아래 요청사항을 반영하여 HTML을 전체 구조로 다시 생성해 주세요:\n\n"
+        f"{revision_prompt}"
+    )
+    return combined_prompt, None
+
+
+def save_revised_page(workspace, commit_id, revision_prompt, html_code):
+    """수정된 HTML을 새 id로 저장/커밋/로그 기록한다. (응답 dict, 상태코드)를 반환."""
+    # 새로운 UUID commit_id 생성
+    new_commit_id = str(uuid.uuid4())
+
+    simhash, duplicate = check_near_duplicate(html_code, workspace=workspace)
+    if duplicate and SKIP_NEAR_DUPLICATES:
+        body = _near_duplicate_skipped(duplicate)
+        body["base_commit"] = commit_id
+        return body, 200
+
+    # HTML 저장
+    store = get_blobstore(workspace)
+    sha, link = store.put_linked(html_code, new_commit_id)
+
+    # Git 커밋 및 푸시
+    result = commit_file(
+        store.blob_path(sha),
+        html_code,
+        commit_message=f"revise {commit_id} → {new_commit_id}",
+        write_preview=False,
+        workspace=workspace,
+        links=[link]
+    )
+    _alias_commit(store, result, sha)
+    if result.get("success") or result.get("skipped"):
+        get_fingerprints(workspace).add(new_commit_id, simhash)
+        schedule_snapshot(store.blob_path(sha), html_code)
+
+    if result.get("commit_id"):
+        log_commit(
+            f"[Revise from {commit_id}] {revision_prompt}",
+            result["commit_id"],
+            html_code,
+            extra_info={"revise_from": commit_id},
+            page_id=new_commit_id,
+            workspace=workspace
+        )
 
-        #  롤백 전에 작업 상태 정리
-        subprocess.run(["git", "add", "."], check=False, capture_output=True, text=True)
-        subprocess.run(["git", "stash", "--include-untracked"], check=False, capture_output=True, text=True)
-        subprocess.run(["git", "fetch", "origin"], check=True)
-        subprocess.run(["git", "reset", "--hard", "origin/main"], check=True)
+    if result.get("success"):
+        return {
+            "status": "success",
+            "commit_id": result["commit_id"],
+            "page_id": new_commit_id,
+            "base_commit": commit_id,
+            "preview_url": f"/preview/{new_commit_id}",
+            "near_duplicate_of": duplicate
+        }, 200
+    elif result.get("skipped"):
+        return {
+            "status": "skipped",
+            "message": result["message"],
+            "commit_id": result.get("commit_id"),
+            "page_id": new_commit_id,
+            "base_commit": commit_id,
+            "preview_url": f"/preview/{new_commit_id}",
+            "near_duplicate_of": duplicate
+        }, 200
+    else:
+        return {
+            "status": "error",
+            "message": result.get("message", "Git push failed"),
+            "error": result.get("error", "")
+        }, 500
 
 
-        # 1. Git 작업 디렉토리로 강제 이동
-        repo_dir = os.path.expanduser("~/orrne-server-clean")
-        os.chdir(repo_dir)
-        logging.debug(f"[rollback] Changed working directory to: {repo_dir}")
 
-        # 2. 인증 검사
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or "Bearer admin-secret-token-here" not in auth_header:
-            return jsonify({"error": "Unauthorized"}), 401
 
-        # 3. 요청 데이터 및 rollback 대상 커밋 확인
-        data = request.get_json() or {}
-        requested_commit_id = data.get("commit_id")
+@app.route("/generate/stream", methods=["POST"])
+def generate_stream():
+    """/generate의 스트리밍 버전. 토큰을 SSE chunk 이벤트로 보내고 끝나면 done 이벤트로 결과를 보낸다."""
+    data = request.get_json(silent=True) or {}
+    prompt = data.get("prompt", "")
 
-        # 4. 커밋 로그 불러오기
-        with open("logs/commits.json", "r", encoding="utf-8") as f:
-            commits = json.load(f)
+    if not prompt:
+        return jsonify({"error": "Prompt is required"}), 400
 
-        if requested_commit_id:
-            rollback_target = next((c for c in commits if c["commit_id"] == requested_commit_id), None)
-            if not rollback_target:
-                return jsonify({"error": "Commit ID not found"}), 404
-        else:
-            if len(commits) < 2:
-                return jsonify({"error": "No rollback target available"}), 400
-            rollback_target = commits[-2]
+    workspace = current_workspace()
+    return _stream_completion(
+        [{"role": "user", "content": prompt}],
+        lambda html_code: save_generated_page(workspace, prompt, html_code),
+        cache=(workspace, cache_key(prompt, "gpt-4o"), not _cache_bypassed(data))
+    )
 
-        commit_id = rollback_target["commit_id"]
-        logging.info(f"[rollback] Targeting commit: {commit_id}")
 
-        # 5. 작업 상태 stash → reset 으로 안전하게 롤백 전 상태 초기화
-        subprocess.run(["git", "stash", "--include-untracked"], check=False, capture_output=True, text=True)
-        subprocess.run(["git", "fetch", "origin"], check=True)
-        subprocess.run(["git", "reset", "--hard", "origin/main"], check=True)
+@app.route("/revise/stream", methods=["POST"])
+def revise_stream():
+    data = request.get_json(silent=True) or {}
+    commit_id = data.get("commit_id")
+    revision_prompt = data.get("prompt", "").strip()
 
-        # 6. Git에서 index.html 내용 추출
-        restored_html = subprocess.check_output(
-            ["git", "show", f"{commit_id}:index.html"],
-            stderr=subprocess.STDOUT
-        ).decode("utf-8")
+    if not commit_id or not revision_prompt:
+        return jsonify({"error": "commit_id와 prompt가 필요합니다."}), 400
 
-        # 7. index.html 덮어쓰기
-        with open("index.html", "w", encoding="utf-8") as f:
-            f.write(restored_html)
+    workspace = current_workspace()
+    ambiguous = ambiguous_commit(workspace, commit_id)
+    if ambiguous:
+        return jsonify(ambiguous), 409
+    combined_prompt, error = build_revision_prompt(workspace, commit_id, revision_prompt)
+    if error:
+        return jsonify({"error": error}), 404
 
-        # 8. 자동 커밋 & 푸시
-        result = git_commit_and_push("index.html", restored_html, commit_message=f"Rollback to {commit_id}", force_commit=True)
+    return _stream_completion(
+        [{"role": "user", "content": combined_prompt}],
+        lambda html_code: save_revised_page(workspace, commit_id, revision_prompt, html_code)
+    )
 
-        # 9. 결과 처리
-        if result.get("success"):
+
+def _stream_completion(messages, save, cache=None):
+    """cache: (workspace, 캐시 키, 캐시 조회 여부) — 생성 요청에서만 사용"""
+    def events():
+        # 헤더와 첫 바이트를 바로 내보내 연결을 연다
+        yield ": stream open\n\n"
+        try:
+            if cache and cache[2]:
+                cached_html = get_cached(cache[1], workspace=cache[0])
+                if cached_html is not None:
+                    yield _sse("chunk", {"text": cached_html})
+                    body, status_code = save(cached_html)
+                    body["cached"] = True
+                    yield _sse("done" if status_code < 400 else "error", body)
+                    return
+
+            # 스트림이 열릴 때까지만 재시도 (조각을 보낸 뒤에는 되돌릴 수 없음)
+            stream, _ = call_llm(client, messages, stream=True)
+
+            # 조각이 오는 대로 코드 블록 경계/태그 균형을 추적
+            extractor = HtmlExtractor()
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    extractor.feed(delta)
+                    yield _sse("chunk", {"text": delta})
+
+            # 스트림이 끝난 뒤 검증 → 저장/커밋 (잘린 응답은 커밋하지 않음)
+            html_code, error = extractor.finish()
+            if error:
+                yield _sse("error", {"error": error})
+                return
+
+            if cache:
+                put_cached(cache[1], html_code, workspace=cache[0])
+
+            body, status_code = save(html_code)
+            yield _sse("done" if status_code < 400 else "error", body)
+
+        except Exception as e:
+            logging.exception("[stream] 스트리밍 생성 실패")
+            yield _sse("error", {"error": "Internal server error", "details": str(e)})
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@app.route("/admin/rollback", methods=["POST"])
+def rollback():
+    """live index.html을 이전 배포 버전으로 되돌린다.
+
+    {"commit_id": 배포 커밋 해시 또는 페이지 id} 또는 {"steps": N} (기본 1 = 직전 배포)
+    배포 기록에서 내용 해시를 찾아 live 사본을 바로 교체하고, static/index.html 커밋은 뒤에서 한다.
+    롤백도 배포로 기록되므로 steps=1을 다시 보내면 롤백 전 버전으로 돌아간다.
+    ?wait=1 이면 커밋까지 기다려 new_commit_id를 함께 돌려준다.
+    """
+    auth = request.headers.get('Authorization', '')
+    if 'Bearer admin-secret-token-here' not in auth:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    try:
+        workspace = current_workspace()
+        data = request.get_json(silent=True) or {}
+        steps = data.get("steps", 1)
+        if not data.get("commit_id") and (type(steps) is not int or steps < 1):
+            return jsonify({"error": "steps는 1 이상의 정수여야 합니다."}), 400
+        requested = data.get("commit_id")
+        if requested is not None and not (isinstance(requested, str) and _ROLLBACK_NAME.fullmatch(requested)):
+            return jsonify({"error": "commit_id는 커밋 해시 또는 page_id여야 합니다."}), 400
+        ambiguous = requested and ambiguous_commit(workspace, requested)
+        if ambiguous:
+            return jsonify(ambiguous), 409
+
+        # 대상 조회(steps는 현재 배포 기준) → 교체 → 기록을 다른 승인/롤백과 섞이지 않게 한 번에
+        with workspace.deploy_lock:
+            # 1. 대상 배포 조회 (인덱스 조회만, 커밋 목록을 훑지 않음)
+            target, html_code = _rollback_target(workspace, data)
+            if target is None:
+                return jsonify({"error": html_code}), 404
+            logging.info(f"[rollback] Targeting: {target['name']}")
+
+            current = current_deploy(workspace=workspace)
+            if current is not None and current["blob"] == target["blob"]:
+                return jsonify({"status": "skipped", "message": "이미 배포된 버전입니다."})
+
+            # 2. live 사본 원자적 교체
+            publish(html_code, workspace=workspace)
+            deploy = record_deploy(
+                "rollback", target["blob"], None,
+                page_id=target["page_id"], rollback_of=target["seq"], workspace=workspace
+            )
+
+        # 3. index.html 커밋 & 푸시 (백그라운드), 커밋되면 로그 기록
+        def log_rollback(result):
             log_commit(
-                f"[Rollback] to {commit_id}",
+                f"[Rollback] to {target['name']}",
                 result["commit_id"],
-                restored_html[:10000],
-                extra_info={"rollback_from": commit_id}
+                html_code,
+                extra_info={"rollback_from": target["name"]},
+                workspace=workspace
             )
+
+        result = _commit_deploy(
+            workspace, deploy, f"Rollback to {target['name']}",
+            wait=request.args.get("wait") == "1", after=log_rollback
+        )
+
+        # 4. 결과 처리
+        if result is None or result.get("success") or result.get("skipped"):
             return jsonify({
                 "status": "success",
-                "rolled_back_to": commit_id,
-                "new_commit_id": result["commit_id"]
+                "rolled_back_to": target["name"],
+                "deploy_id": deploy["seq"],
+                "new_commit_id": result.get("commit_id") if result else None
             })
 
-        elif result.get("skipped"):
-            return jsonify({"status": "skipped", "message": "No changes to rollback"})
-
         else:
             return jsonify({
                 "status": "error",
@@ -385,31 +933,111 @@ def rollback():
                 }
             }), 500
 
-    except subprocess.CalledProcessError as e:
-        stdout = e.stdout.decode("utf-8") if isinstance(e.stdout, bytes) else e.stdout
-        stderr = e.stderr.decode("utf-8") if isinstance(e.stderr, bytes) else e.stderr
-        logging.error(f"Git command failed: {str(e)}")
-        return jsonify({
-            "status": "error",
-            "message": "Git command failed",
-            "details": {
-                "error": str(e),
-                "stdout": stdout,
-                "stderr": stderr,
-                "exit_code": e.returncode
-            }
-        }), 500
     except Exception as e:
-        logging.error(f"Internal server error: {str(e)}")
+        logging.exception("[rollback] 롤백 실패")
         return jsonify({
             "status": "error",
             "message": "Internal server error",
             "details": str(e)
         }), 500
-    
-    logging.info(f"[rollback] index.html restored to commit {commit_id}")
 
 
+@timed("rollback.lookup")
+def _rollback_target(workspace, data):
+    """(대상 dict, HTML) 또는 (None, 에러 메시지)"""
+    store = get_blobstore(workspace)
+    requested = data.get("commit_id")
+
+    if requested:
+        deploy = find_deploy(requested, workspace=workspace)
+        if deploy is None:
+            # 배포된 적 없는 페이지/커밋이면 그 내용을 새로 배포
+            html_code = store.read(requested)
+            if html_code is None:
+                html_code = _index_at_commit(workspace, requested)
+                if html_code is None:
+                    return None, "Commit ID not found"
+            return {"name": requested, "blob": store.put(html_code), "page_id": None, "seq": None}, html_code
+    else:
+        deploy = previous_deploy(data.get("steps", 1), workspace=workspace)
+        if deploy is None:
+            return None, "No rollback target available"
+
+    html_code = store.read(deploy["blob"])
+    if html_code is None:
+        return None, "배포 기록의 내용을 찾을 수 없습니다."
+    target = {
+        "name": requested or deploy["page_id"] or deploy["deploy_commit"],
+        "blob": deploy["blob"],
+        "page_id": deploy["page_id"],
+        "seq": deploy["seq"],
+    }
+    return target, html_code
+
+
+def _index_at_commit(workspace, requested):
+    """커밋 해시 시점의 live index.html 내용. 해시가 아니거나 그 커밋에 없으면 None."""
+    if not _COMMIT_HASH.fullmatch(requested):
+        return None
+    commit = workspace.git(
+        "rev-parse", "--verify", "--quiet", "--end-of-options", f"{requested}^{{commit}}", check=False
+    ).stdout.strip()
+    if not commit:
+        return None
+    # 예전 롤백 커밋은 저장소 루트의 index.html 을 썼음 (지금은 승인과 같은 static/index.html)
+    for path in (workspace.relpath(workspace.index_path()), "index.html"):
+        shown = workspace.git("show", f"{commit}:{path}", check=False)
+        if shown.returncode == 0:
+            return shown.stdout
+    return None
+
+
+@app.route("/admin/gc", methods=["GET", "POST"])
+def admin_gc():
+    """보존 정책에 안 걸리는 생성물을 압축 보관하고 지운다. GET은 dry-run 보고서만. (둘 다 관리자 인증)
+
+    ?keep_last=&ttl_days=&keep_approved=0|1&grace_seconds= 로 이번 실행의 정책만 바꿀 수 있다.
+    """
+    if 'Bearer admin-secret-token-here' not in request.headers.get('Authorization', ''):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    overrides = {
+        "keep_last": request.args.get("keep_last", type=int),
+        "ttl_days": request.args.get("ttl_days", type=float),
+        "keep_approved": request.args.get("keep_approved", type=lambda value: value == "1"),
+        "grace_seconds": request.args.get("grace_seconds", type=int),
+    }
+    dry_run = request.method == "GET"
+    return jsonify(collect(workspace=current_workspace(), dry_run=dry_run, **overrides))
+
+
+@app.route("/admin/deploys", methods=["GET"])
+def deploys():
+    """최근 배포(승인/롤백) 기록. steps 롤백 대상 확인용 (?limit=)"""
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 200)
+    return jsonify(deploys=deploy_history(limit, workspace=current_workspace()))
+
+
+@app.route("/admin/tenants", methods=["GET"])
+def admin_tenants():
+    """만들어진 테넌트 목록"""
+    if 'Bearer admin-secret-token-here' not in request.headers.get('Authorization', ''):
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(tenants=tenants())
+
+
+@app.route("/admin/tenants/<name>", methods=["POST"])
+def admin_create_tenant(name):
+    """테넌트 저장소를 만든다 (기본 저장소 clone + origin의 tenants/<이름> 브랜치). 이미 있으면 그대로."""
+    if 'Bearer admin-secret-token-here' not in request.headers.get('Authorization', ''):
+        return jsonify({"error": "Unauthorized"}), 401
+    try:
+        existed = name.strip().lower() in tenants()
+        workspace = create_tenant(name)
+    except TenantError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(tenant=name.strip().lower(), branch=workspace.branch, created=not existed), 200 if existed else 201
+
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=False)
@@ -0,0 +1,463 @@
+"""비동기(ASGI) 서버 진입점.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+/generate, /revise 와 스트리밍 버전은 이벤트 루프에서 직접 처리한다.
+모델 응답을 기다리는 동안 스레드를 잡지 않으므로 동시 요청 수백 개를 한 프로세스에서 받을 수 있다.
+그 밖의 경로(및 async job 모드)는 기존 Flask 앱을 스레드 풀에서 그대로 실행한다.
+"""
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import logging
+import contextvars
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from openai import AsyncOpenAI
+
+import app as flask_app
+from app import (
+    build_revision_prompt, build_patch_request,
+    finish_generated_page, finish_revised_page, finish_patch,
+    save_generated_page, save_revised_page, ambiguous_commit, _sse
+)
+from generate.cache import cache_key, get_cached, put_cached
+from generate.extract import HtmlExtractor
+from generate.llm import acall_llm, breaker, CircuitOpenError
+from generate.patching import PatchError, check_region
+from generate.tenants import TENANT_HEADER, TenantError, UnknownTenantError, tenant_workspace
+from generate import metrics
+from openai import APIError
+
+
+# 동시에 진행할 OpenAI 호출 수 (넘는 요청은 대기)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "64"))
+# 요청 하나에 허용하는 전체 시간(초) — 대기 + 모델 응답 + 저장
+ASYNC_REQUEST_TIMEOUT = float(os.getenv("ASYNC_REQUEST_TIMEOUT", "180"))
+# git/파일/SQLite 등 블로킹 작업과 Flask 요청을 돌릴 스레드 수
+ASYNC_BLOCKING_WORKERS = int(os.getenv("ASYNC_BLOCKING_WORKERS", "32"))
+
+# 연결 풀을 공유하는 클라이언트 하나만 사용 (OPENAI_BASE_URL 환경변수도 그대로 적용됨)
+aclient = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+_llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+_executor = ThreadPoolExecutor(max_workers=ASYNC_BLOCKING_WORKERS, thread_name_prefix="asgi-blocking")
+# 요청을 처리할 저장소(테넌트별) — app()에서 정하고 핸들러 task가 컨텍스트째 물려받는다
+_workspace = contextvars.ContextVar("orrne_workspace")
+
+
+def current_workspace():
+    return _workspace.get()
+
+
+async def run_blocking(func, *args):
+    # 요청별 타이밍 내역(contextvar)이 스레드에서도 보이도록 컨텍스트를 복사해서 실행
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(_executor, context.run, func, *args)
+
+
+async def complete(messages):
+    """동시 호출 수 제한 안에서 OpenAI를 호출한다. (응답, 시도 기록)을 반환."""
+    async with _llm_slots:
+        return await acall_llm(aclient, messages)
+
+
+async def generate_page(workspace, prompt, use_cache=True):
+    key = cache_key(prompt, "gpt-4o")
+    if use_cache:
+        cached_html = await run_blocking(get_cached, key, workspace)
+        if cached_html is not None:
+            body, status_code = await run_blocking(save_generated_page, workspace, prompt, cached_html)
+            body["cached"] = True
+            return body, status_code
+
+    response, attempts = await complete([{"role": "user", "content": prompt}])
+    return await run_blocking(finish_generated_page, workspace, prompt, key, response, attempts)
+
+
+async def revise_page(workspace, commit_id, revision_prompt, options):
+    patch_failure = None
+
+    if options.get("mode") == "patch":
+        patch = await run_blocking(build_patch_request, workspace, commit_id, revision_prompt, options)
+        if patch is None:
+            return {"error": "기존 HTML 파일을 찾을 수 없습니다."}, 404
+        response, attempts = await complete([{"role": "user", "content": patch["prompt"]}])
+        body, status_code = await run_blocking(
+            finish_patch, workspace, commit_id, revision_prompt, patch, response, attempts
+        )
+        if body is not None:
+            return body, status_code
+        patch_failure = status_code
+
+    combined_prompt, error = await run_blocking(build_revision_prompt, workspace, commit_id, revision_prompt)
+    if error:
+        return {"error": error}, 404
+
+    response, attempts = await complete([{"role": "user", "content": combined_prompt}])
+    return await run_blocking(
+        finish_revised_page, workspace, commit_id, revision_prompt, response, patch_failure, attempts
+    )
+
+
+async def handle_generate(data, headers):
+    prompt = data.get("prompt", "")
+    if not prompt:
+        return {"error": "Prompt is required"}, 400
+    return await generate_page(current_workspace(), prompt, not _cache_bypassed(data, headers))
+
+
+async def handle_revise(data, headers):
+    commit_id = data.get("commit_id")
+    revision_prompt = data.get("prompt", "").strip()
+    if not commit_id or not revision_prompt:
+        return {"error": "commit_id와 prompt가 필요합니다."}, 400
+
+    options = {
+        "mode": data.get("mode", "full"),
+        "selector": data.get("selector"),
+        "target_text": data.get("target_text"),
+    }
+    try:
+        check_region(options["selector"], options["target_text"])
+    except PatchError as e:
+        return {"error": str(e)}, 400
+    workspace = current_workspace()
+    ambiguous = await run_blocking(ambiguous_commit, workspace, commit_id)
+    if ambiguous:
+        return ambiguous, 409
+    return await revise_page(workspace, commit_id, revision_prompt, options)
+
+
+async def stream_generate(data, headers):
+    prompt = data.get("prompt", "")
+    if not prompt:
+        return None, ({"error": "Prompt is required"}, 400)
+
+    workspace = current_workspace()
+    key = cache_key(prompt, "gpt-4o")
+    use_cache = not _cache_bypassed(data, headers)
+
+    async def events():
+        if use_cache:
+            cached_html = await run_blocking(get_cached, key, workspace)
+            if cached_html is not None:
+                yield _sse("chunk", {"text": cached_html})
+                body, status_code = await run_blocking(save_generated_page, workspace, prompt, cached_html)
+                body["cached"] = True
+                yield _sse("done" if status_code < 400 else "error", body)
+                return
+
+        async for event in _stream_events(
+            [{"role": "user", "content": prompt}],
+            lambda html_code: save_generated_page(workspace, prompt, html_code),
+            lambda html_code: put_cached(key, html_code, workspace=workspace)
+        ):
+            yield event
+
+    return events(), None
+
+
+async def stream_revise(data, headers):
+    commit_id = data.get("commit_id")
+    revision_prompt = data.get("prompt", "").strip()
+    if not commit_id or not revision_prompt:
+        return None, ({"error": "commit_id와 prompt가 필요합니다."}, 400)
+
+    workspace = current_workspace()
+    ambiguous = await run_blocking(ambiguous_commit, workspace, commit_id)
+    if ambiguous:
+        return None, (ambiguous, 409)
+    combined_prompt, error = await run_blocking(build_revision_prompt, workspace, commit_id, revision_prompt)
+    if error:
+        return None, ({"error": error}, 404)
+
+    return _stream_events(
+        [{"role": "user", "content": combined_prompt}],
+        lambda html_code: save_revised_page(workspace, commit_id, revision_prompt, html_code)
+    ), None
+
+
+async def _stream_events(messages, save, remember=None):
+    # 스트림이 끝날 때까지 동시 호출 슬롯 하나를 사용
+    async with _llm_slots:
+        stream, _ = await acall_llm(aclient, messages, stream=True)
+        extractor = HtmlExtractor()
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                extractor.feed(delta)
+                yield _sse("chunk", {"text": delta})
+
+    html_code, error = extractor.finish()
+    if error:
+        yield _sse("error", {"error": error})
+        return
+
+    if remember:
+        await run_blocking(remember, html_code)
+    body, status_code = await run_blocking(save, html_code)
+    yield _sse("done" if status_code < 400 else "error", body)
+
+
+ROUTES = {
+    ("POST", "/generate"): handle_generate,
+    ("POST", "/revise"): handle_revise,
+}
+STREAM_ROUTES = {
+    ("POST", "/generate/stream"): stream_generate,
+    ("POST", "/revise/stream"): stream_revise,
+}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    body = await _read_body(receive)
+    route = (scope["method"], scope["path"])
+    headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+
+    data = None
+    if route in ROUTES or route in STREAM_ROUTES:
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            data = None
+
+    # job 모드/기타 경로는 기존 Flask 핸들러로
+    if not isinstance(data, dict) or data.get("async"):
+        await _call_wsgi(scope, body, send)
+        return
+
+    # 테넌트 저장소 선택 (ORRNE_TENANTS에 있는 테넌트는 처음에 clone하므로 스레드에서)
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    tenant = headers.get(TENANT_HEADER.lower()) or query.get("tenant", [None])[0]
+    try:
+        _workspace.set(await run_blocking(tenant_workspace, tenant))
+    except UnknownTenantError as e:
+        await _send_json(send, {"error": str(e)}, 404)
+        return
+    except TenantError as e:
+        await _send_json(send, {"error": str(e)}, 400)
+        return
+
+    start = time.perf_counter()
+    status_code = 200
+    timing = metrics.start_breakdown() if headers.get(flask_app.DEBUG_TIMING_HEADER.lower()) else None
+    try:
+        if route in ROUTES:
+            task = asyncio.ensure_future(asyncio.wait_for(ROUTES[route](data, headers), ASYNC_REQUEST_TIMEOUT))
+            if not await _until_done_or_disconnect(task, receive):
+                status_code = 499
+                return
+            result, status_code = task.result()
+            if timing is not None:
+                result["timings"] = dict(timing[0], total=round((time.perf_counter() - start) * 1000, 2))
+            await _send_json(send, result, status_code)
+        else:
+            events, error = await STREAM_ROUTES[route](data, headers)
+            if error:
+                await _send_json(send, *error)
+                return
+            await _send_stream(send, receive, events)
+
+    except asyncio.TimeoutError:
+        status_code = 504
+        await _send_json(send, {"error": "Upstream timeout"}, 504)
+    except CircuitOpenError as e:
+        status_code = 503
+        await _send_json(send, {"error": str(e)}, 503, [(b"retry-after", str(int(breaker.retry_after()) + 1).encode())])
+    except APIError as e:
+        status_code = 502
+        await _send_json(send, {"error": "OpenAI 요청 실패", "details": str(e)}, 502)
+    except Exception as e:
+        status_code = 500
+        logging.exception("[asgi] 요청 처리 실패")
+        await _send_json(send, {"error": "Internal server error", "details": str(e)}, 500)
+    finally:
+        if timing is not None:
+            metrics.stop_breakdown(timing[1])
+        metrics.observe("orrne_request_seconds", time.perf_counter() - start, route=scope["path"])
+        metrics.count("orrne_requests_total", route=scope["path"], method=scope["method"], status=status_code)
+
+
+def _cache_bypassed(data, headers):
+    return bool(data.get("no_cache")) or "no-cache" in headers.get("cache-control", "")
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def _until_done_or_disconnect(task, receive):
+    """클라이언트가 먼저 끊으면 작업(모델 호출)을 취소하고 False를 반환한다."""
+    disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await asyncio.wait([task, disconnect], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+    if not task.done():
+        task.cancel()
+        logging.info("[asgi] 클라이언트 연결 종료 — 요청 취소")
+        return False
+    return True
+
+
+async def _wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _send_json(send, payload, status_code, headers=()):
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(data)).encode()),
+            *headers
+        ]
+    })
+    await send({"type": "http.response.body", "body": data})
+
+
+async def _send_stream(send, receive, events):
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ]
+    })
+
+    async def pump():
+        await send({"type": "http.response.body", "body": b": stream open\n\n", "more_body": True})
+        try:
+            async for event in events:
+                await send({"type": "http.response.body", "body": event.encode("utf-8"), "more_body": True})
+        except Exception as e:
+            logging.exception("[asgi] 스트리밍 생성 실패")
+            error = _sse("error", {"error": "Internal server error", "details": str(e)})
+            await send({"type": "http.response.body", "body": error.encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    task = asyncio.ensure_future(asyncio.wait_for(pump(), ASYNC_REQUEST_TIMEOUT))
+    if not await _until_done_or_disconnect(task, receive):
+        return
+    try:
+        task.result()
+    except asyncio.TimeoutError:
+        # 헤더는 이미 나갔으므로 에러 이벤트로 알리고 스트림을 닫음
+        error = _sse("error", {"error": "Upstream timeout"})
+        await send({"type": "http.response.body", "body": error.encode("utf-8")})
+
+
+async def _call_wsgi(scope, body, send):
+    """Flask 앱을 스레드 풀에서 실행하고 응답 본문을 조각 단위로 전달한다."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    environ = _wsgi_environ(scope, body)
+
+    def start_response(status, response_headers, exc_info=None):
+        loop.call_soon_threadsafe(queue.put_nowait, ("start", status, response_headers))
+
+    def run():
+        try:
+            result = flask_app.app(environ, start_response)
+            try:
+                for chunk in result:
+                    if chunk:
+                        loop.call_soon_threadsafe(queue.put_nowait, ("body", chunk))
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, ("end",))
+
+    future = loop.run_in_executor(_executor, run)
+    while True:
+        message = await queue.get()
+        if message[0] == "start":
+            status, response_headers = message[1], message[2]
+            await send({
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in response_headers]
+            })
+        elif message[0] == "body":
+            await send({"type": "http.response.body", "body": message[1], "more_body": True})
+        else:
+            await send({"type": "http.response.body", "body": b""})
+            break
+    await future
+
+
+def _wsgi_environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_LENGTH":
+            continue
+        key = name if name == "CONTENT_TYPE" else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await aclient.close()
+            _executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("ASGI 서버가 필요합니다: pip install uvicorn 후 `uvicorn asgi:app` 로 실행하세요.")
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
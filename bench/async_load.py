@@ -0,0 +1,122 @@
+"""동기(Flask 스레드) vs 비동기(ASGI) 서버 동시 요청 부하 테스트.
+
+    python -m bench.async_load --requests 300 --latency 1.0
+    python -m bench.async_load --mode wsgi --threads 16
+
+가짜 OpenAI 서버와 임시 저장소(bare origin 포함)를 만든 뒤 /generate 요청을 한꺼번에 보낸다.
+ASGI 앱은 HTTP 서버 없이 프로세스 안에서 직접 호출한다. (서버 파싱 비용은 제외)
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import fake_openai
+
+
+def make_repo(base):
+    origin = os.path.join(base, "origin.git")
+    repo = os.path.join(base, "repo")
+    subprocess.run(["git", "init", "-q", "--bare", "-b", "main", origin], check=True)
+    subprocess.run(["git", "init", "-q", "-b", "main", repo], check=True)
+    for key, value in (("user.name", "bench"), ("user.email", "bench@example.com")):
+        subprocess.run(["git", "config", key, value], cwd=repo, check=True)
+    os.makedirs(os.path.join(repo, "static"))
+    with open(os.path.join(repo, "static", "index.html"), "w") as f:
+        f.write("<!DOCTYPE html><html><body>index</body></html>")
+    subprocess.run(["git", "add", "."], cwd=repo, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", "init"], cwd=repo, check=True)
+    subprocess.run(["git", "remote", "add", "origin", origin], cwd=repo, check=True)
+    subprocess.run(["git", "push", "-q", "origin", "main"], cwd=repo, check=True)
+    return repo
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run_asgi(count):
+    from asgi import app
+
+    async def one(i):
+        body = json.dumps({"prompt": f"load test {i}", "no_cache": True}).encode()
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        sent = {}
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.Event().wait()  # 연결 유지
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                sent["status"] = message["status"]
+
+        scope = {"type": "http", "method": "POST", "path": "/generate", "headers": [], "query_string": b""}
+        start = time.perf_counter()
+        await app(scope, receive, send)
+        return sent.get("status"), time.perf_counter() - start
+
+    return await asyncio.gather(*(one(i) for i in range(count)))
+
+
+def run_wsgi(count, threads):
+    from app import app
+
+    client = app.test_client()
+
+    def one(i):
+        start = time.perf_counter()
+        response = client.post("/generate", json={"prompt": f"load test {i}", "no_cache": True})
+        return response.status_code, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(one, range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["asgi", "wsgi"], default="asgi")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--threads", type=int, default=16, help="wsgi 모드의 워커 스레드 수")
+    args = parser.parse_args()
+
+    server, fake, base_url = fake_openai.start(latency=args.latency)
+    base = tempfile.mkdtemp(prefix="orrne-bench-")
+    # 앱을 import 하기 전에 저장소/모델 주소를 지정
+    os.environ["ORRNE_REPO_DIR"] = make_repo(base)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    start = time.perf_counter()
+    if args.mode == "asgi":
+        results = asyncio.run(run_asgi(args.requests))
+    else:
+        results = run_wsgi(args.requests, args.threads)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    latencies = [latency for _, latency in results]
+    failed = sum(1 for status, _ in results if status != 200)
+    print(json.dumps({
+        "mode": args.mode,
+        "requests": args.requests,
+        "failed": failed,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "max_upstream_in_flight": fake.max_in_flight,
+        "repo": os.environ["ORRNE_REPO_DIR"],
+    }, indent=2), file=sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
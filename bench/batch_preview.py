@@ -0,0 +1,107 @@
+"""배치 커밋 해시로 조회: 동시에 생성된 페이지들이 한 커밋에 묶였을 때 커밋 해시가 엉뚱한 페이지를 돌려주지 않는지.
+
+    python -m bench.batch_preview
+    python -m bench.batch_preview --generates 10 --rounds 3
+
+가짜 OpenAI와 임시 저장소로 앱을 띄우고 /generate를 --generates 개씩 동시에 보낸다. (배치 창 안에 모이게)
+응답의 commit_id마다
+  /preview/<commit_id>          — 한 페이지만 담긴 커밋이면 그 페이지와 같은 본문, 여러 페이지면 409
+  /history/<commit_id>          — 여러 페이지면 409
+  /revise, /admin/approve, /admin/rollback 에 commit_id — 여러 페이지면 409
+를 확인하고, 예전처럼 배치 해시에 마지막 페이지를 별칭으로 걸어 둔 경우에도 409가 먼저 나는지 본다.
+/preview/<page_id>는 언제나 그 페이지여야 한다. 어긋나면 exit 1.
+"""
+import sys
+import json
+import argparse
+import threading
+
+from bench import fake_openai
+from bench.suite import AUTH, Client, start_app
+
+
+def generate_together(port, count, round_no):
+    """count개의 /generate를 동시에 보내고 응답 본문 목록을 반환"""
+    barrier = threading.Barrier(count)
+    bodies = [None] * count
+
+    def worker(n):
+        client = Client(port)
+        barrier.wait()
+        status, body = client.request("POST", "/generate", {"prompt": f"batch preview {round_no} {n}",
+                                                            "no_cache": True})
+        bodies[n] = json.loads(body) if status == 200 else {"status": status}
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return bodies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--generates", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    fake_server, _, base_url = fake_openai.start(latency=0.05)
+    server, port, repo = start_app(base_url)
+    import app as flask_app
+
+    client = Client(port)
+    problems, shared, single = [], 0, 0
+    for round_no in range(args.rounds):
+        bodies = generate_together(port, args.generates, round_no)
+        pages = {}
+        for body in bodies:
+            if body.get("status") != "success":
+                problems.append(f"generate 실패: {body}")
+                continue
+            status, html = client.request("GET", f"/preview/{body['page_id']}")
+            if status != 200:
+                problems.append(f"/preview/{body['page_id']}: HTTP {status}")
+            pages.setdefault(body["commit_id"], {})[body["page_id"]] = html
+
+        for commit_id, by_page in pages.items():
+            status, html = client.request("GET", f"/preview/{commit_id}")
+            if len(by_page) == 1:
+                single += 1
+                if status != 200 or html not in by_page.values():
+                    problems.append(f"/preview/{commit_id} (한 페이지): HTTP {status}, 다른 본문")
+                continue
+
+            shared += 1
+            if status != 409:
+                problems.append(f"/preview/{commit_id} ({len(by_page)}페이지): HTTP {status}")
+            # 예전 별칭(배치 해시 → 마지막 페이지)이 남아 있어도 409가 먼저
+            workspace = flask_app.get_workspace()
+            store = flask_app.get_blobstore(workspace)
+            store.add_alias(commit_id, store.blob_of(next(iter(by_page))))
+            checks = {
+                "preview(stale alias)": client.request("GET", f"/preview/{commit_id}")[0],
+                "history": client.request("GET", f"/history/{commit_id}")[0],
+                "revise": client.request("POST", "/revise", {"commit_id": commit_id, "prompt": "색을 바꿔 주세요"})[0],
+                "approve": client.request("POST", f"/admin/approve/{commit_id}", headers=AUTH)[0],
+                "rollback": client.request("POST", "/admin/rollback", {"commit_id": commit_id}, headers=AUTH)[0],
+            }
+            problems.extend(f"{name} {commit_id}: HTTP {status}" for name, status in checks.items() if status != 409)
+    server.shutdown()
+    fake_server.shutdown()
+
+    if not shared:
+        problems.append("여러 페이지가 한 커밋에 묶인 경우가 없음 (배치 창 안에 모이지 않음)")
+    print(json.dumps({
+        "generates": args.generates,
+        "rounds": args.rounds,
+        "shared_commits": shared,
+        "single_page_commits": single,
+        "problems": problems[:50],
+        "repo": repo,
+    }, indent=2, ensure_ascii=False))
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""프롬프트 캐시: 적중한 요청은 OpenAI를 부르지 않고 같은 저장 경로(커밋/로그/계보)를 탄다.
+
+    python -m bench.cache_hits --prompts 20 --latency 0.5
+    python -m bench.cache_hits --asgi
+
+가짜 OpenAI 서버가 받은 요청 수를 세면서 프롬프트마다
+  1) 처음 요청 (miss) → 2) 같은 프롬프트 → 3) 공백/대소문자만 다른 프롬프트 → 4) no_cache 요청
+을 보낸다. 2, 3은 OpenAI 요청 수가 늘지 않아야 하고 cached=true, commit_id가 있어야 하며
+새 page_id로 /history, /preview 가 조회돼야 한다. 4는 OpenAI를 한 번 더 불러야 한다. 어긋나면 exit 1.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+from bench import fake_openai
+from bench.async_load import make_repo, percentile
+
+
+def post_wsgi(client):
+    def post(payload):
+        response = client.post("/generate", json=payload)
+        return response.status_code, response.get_json()
+    return post
+
+
+def post_asgi():
+    from asgi import app
+
+    def post(payload):
+        async def run():
+            sent = [{"type": "http.request", "body": json.dumps(payload).encode(), "more_body": False}]
+            result = {"body": b""}
+
+            async def receive():
+                if sent:
+                    return sent.pop(0)
+                await asyncio.Event().wait()  # 연결 유지
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    result["status"] = message["status"]
+                else:
+                    result["body"] += message.get("body", b"")
+
+            scope = {"type": "http", "method": "POST", "path": "/generate", "headers": [], "query_string": b""}
+            await app(scope, receive, send)
+            return result["status"], json.loads(result["body"])
+        return asyncio.run(run())
+    return post
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--asgi", action="store_true", help="/generate를 asgi:app으로 호출")
+    args = parser.parse_args()
+
+    server, fake, base_url = fake_openai.start(latency=args.latency)
+    # 앱을 import 하기 전에 저장소/모델 주소를 지정
+    os.environ["ORRNE_REPO_DIR"] = repo = make_repo(tempfile.mkdtemp(prefix="orrne-bench-"))
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    import app as flask_app
+
+    client = flask_app.app.test_client()
+    post = post_asgi() if args.asgi else post_wsgi(client)
+    problems = []
+    timings = {"miss": [], "hit": []}
+
+    def timed(kind, payload):
+        start = time.perf_counter()
+        status, body = post(payload)
+        timings.setdefault(kind, []).append(time.perf_counter() - start)
+        return status, body
+
+    for i in range(args.prompts):
+        prompt = f"캐시 확인용 페이지 {i}: 파란 배경의 소개 페이지"
+        calls = fake.requests
+        status, body = timed("miss", {"prompt": prompt})
+        if status != 200 or fake.requests != calls + 1 or body.get("cached"):
+            problems.append(f"{i} miss: HTTP {status}, OpenAI 호출 {fake.requests - calls}회")
+
+        for variant in (prompt, "  " + prompt.upper().replace(" ", "   ") + "\n"):
+            calls = fake.requests
+            status, hit = timed("hit", {"prompt": variant})
+            if fake.requests != calls:
+                problems.append(f"{i} hit: OpenAI 호출 {fake.requests - calls}회")
+            if status != 200 or not hit.get("cached") or not hit.get("commit_id"):
+                problems.append(f"{i} hit: HTTP {status} cached={hit.get('cached')} commit_id={hit.get('commit_id')}")
+                continue
+            if hit["page_id"] == body.get("page_id"):
+                problems.append(f"{i} hit: 새 page_id가 아님")
+            for path in (f"/history/{hit['page_id']}", f"/preview/{hit['page_id']}"):
+                if client.get(path).status_code != 200:
+                    problems.append(f"{i} hit: {path} 조회 실패")
+
+        calls = fake.requests
+        status, bypass = timed("bypass", {"prompt": prompt, "no_cache": True})
+        if fake.requests != calls + 1 or bypass.get("cached"):
+            problems.append(f"{i} no_cache: OpenAI 호출 {fake.requests - calls}회")
+    server.shutdown()
+
+    stats = client.get("/admin/cache").get_json() if not args.asgi else None
+    print(json.dumps({
+        "server": "asgi" if args.asgi else "wsgi",
+        "prompts": args.prompts,
+        "openai_requests": fake.requests,
+        "latency_ms": {kind: {"p50": round(percentile(values, 50) * 1000, 1),
+                              "max": round(max(values) * 1000, 1)}
+                       for kind, values in timings.items() if values},
+        "cache": stats,
+        "problems": problems[:50],
+        "repo": repo,
+    }, indent=2, ensure_ascii=False))
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
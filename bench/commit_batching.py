@@ -0,0 +1,96 @@
+"""파일별 커밋(add/diff/commit/push/rev-parse 한 벌씩) vs 배치 커미터의 처리량.
+
+    python -m bench.commit_batching --writers 16 --duration 10
+    python -m bench.commit_batching --modes per-file,batched --window 0.05
+
+임시 저장소와 로컬 bare origin을 만들고 writer 스레드들이 static/generated/<uuid>.html 을 쉬지 않고 커밋한다.
+per-file: git_commit_files를 파일마다 직접 호출 (예전 git_commit_and_push와 같은 순서)
+  (push끼리 origin ref 잠금을 다투므로 동시 writer가 많으면 push 실패가 failures에 잡힌다)
+batched: commit_file로 배치 커미터에 넣음. 모드 뒤에 :fast-import / :cli 로 git 백엔드를 고른다.
+"""
+import os
+import json
+import time
+import uuid
+import argparse
+import tempfile
+import threading
+
+from bench.async_load import make_repo, percentile
+
+
+def run(workspace, mode, writers, duration):
+    from generate import git_handler
+    from generate.committer import commit_file
+
+    mode, _, backend = mode.partition(":")
+    git_handler.GIT_BACKEND = backend or "cli"
+    records, failures = [], []
+    os.makedirs(workspace.path("static", "generated"), exist_ok=True)
+    deadline = time.monotonic() + duration
+
+    def writer(n):
+        while time.monotonic() < deadline:
+            name = uuid.uuid4().hex
+            path = workspace.path("static", "generated", name + ".html")
+            html_code = f"<!DOCTYPE html><html><body><h1>{name}</h1><p>{n}</p></body></html>"
+            start = time.perf_counter()
+            if mode == "per-file":
+                result = git_handler.git_commit_files([(path, html_code)], f"Add {name}.html", workspace=workspace)
+            else:
+                result = commit_file(path, html_code, f"Add {name}.html", write_preview=False, workspace=workspace)
+            elapsed = (time.perf_counter() - start) * 1000
+            if result.get("success"):
+                records.append((result["commit_id"], elapsed))
+            else:
+                failures.append(result.get("error") or result.get("message"))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for _, latency in records]
+    commits = len({commit_id for commit_id, _ in records})
+    return {
+        "mode": mode + (":" + git_handler.GIT_BACKEND if mode != "per-file" else ""),
+        "files": len(records),
+        "commits": commits,
+        "failures": len(failures),
+        "failure_sample": failures[0] if failures else None,
+        "files_per_s": round(len(records) / elapsed, 1),
+        "commits_per_s": round(commits / elapsed, 2),
+        "files_per_commit": round(len(records) / commits, 1) if commits else None,
+        "file_ms_p50": round(percentile(latencies, 50), 1) if latencies else None,
+        "file_ms_p99": round(percentile(latencies, 99), 1) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--modes", default="per-file,batched:cli,batched:fast-import")
+    parser.add_argument("--window", type=float, default=None, help="GIT_BATCH_WINDOW(초)")
+    args = parser.parse_args()
+
+    os.environ["ORRNE_REPO_DIR"] = repo = make_repo(tempfile.mkdtemp(prefix="orrne-bench-"))
+    if args.window is not None:
+        os.environ["GIT_BATCH_WINDOW"] = str(args.window)
+    from generate.workspace import get_workspace
+
+    workspace = get_workspace()
+    results = [run(workspace, mode, args.writers, args.duration) for mode in args.modes.split(",")]
+    baseline = results[0]["files_per_s"] or 1
+    for result in results:
+        result["speedup"] = round(result["files_per_s"] / baseline, 2)
+
+    print(json.dumps({"writers": args.writers, "duration_s": args.duration, "results": results, "repo": repo},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""커밋 로그 추가/조회 지연: SQLite 로그 vs 예전 commits.json 통째로 읽고 쓰기.
+
+    python -m bench.commit_log --entries 100000
+    python -m bench.commit_log --entries 100000 --legacy-rounds 0   # 예전 방식 측정 생략
+
+임시 저장소에 항목 N개를 commits.json → commits.db 마이그레이션으로 채운 뒤
+log_commit 추가, find_commit 조회(commit_id / page_id), 동시 추가 시 유실 여부를 잰다.
+예전 방식은 같은 N개짜리 JSON 파일로 load → append → dump(indent=2), load → next(...) 를 잰다.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+
+from bench.async_load import percentile
+
+
+def entries(count):
+    for i in range(count):
+        yield {
+            "timestamp": datetime.utcnow().isoformat(),
+            "prompt": f"bench prompt {i}",
+            "commit_id": uuid.uuid4().hex + uuid.uuid4().hex[:8],
+            "preview": "<!DOCTYPE html><html><body>" + "x" * 200,
+            "page_id": str(uuid.uuid4()),
+        }
+
+
+def stats(samples):
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def timed(func, items):
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--appends", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8, help="동시 추가 스레드 수")
+    parser.add_argument("--legacy-rounds", type=int, default=5, help="예전 JSON 방식 측정 횟수")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    root = tempfile.mkdtemp(prefix="orrne-bench-")
+    os.environ["ORRNE_REPO_DIR"] = root
+    from generate.workspace import get_workspace
+    from generate.logger import log_commit, find_commit, migrate_json_log, _connect
+
+    workspace = get_workspace(root)
+    os.makedirs(workspace.path("logs"))
+    existing = list(entries(args.entries))
+    with open(workspace.log_path("commits.json"), "w", encoding="utf-8") as f:
+        json.dump(existing, f, indent=2)
+    json_bytes = os.path.getsize(workspace.log_path("commits.json"))
+
+    start = time.perf_counter()
+    migrate_json_log(workspace)
+    migrate_s = time.perf_counter() - start
+
+    html = "<!DOCTYPE html><html><body><h1>bench</h1><p>" + "본문 " * 100 + "</p></body></html>"
+    appended = timed(lambda entry: log_commit(entry["prompt"], entry["commit_id"], html,
+                                              page_id=entry["page_id"], workspace=workspace),
+                     list(entries(args.appends)))
+
+    targets = [rng.choice(existing) for _ in range(args.lookups)]
+    by_commit = timed(lambda entry: find_commit(entry["commit_id"], workspace), targets)
+    by_page = timed(lambda entry: find_commit(entry["page_id"], workspace), targets)
+    missing = sum(1 for entry in targets if find_commit(entry["page_id"], workspace) is None)
+
+    # 동시 추가: 모두 남아 있어야 함
+    before = _connect(workspace).execute("SELECT COUNT(*) FROM commits").fetchone()[0]
+    per_thread = args.appends // args.threads
+    threads = [threading.Thread(target=lambda: [
+        log_commit(entry["prompt"], entry["commit_id"], html, page_id=entry["page_id"], workspace=workspace)
+        for entry in entries(per_thread)]) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    after = _connect(workspace).execute("SELECT COUNT(*) FROM commits").fetchone()[0]
+    lost = before + per_thread * args.threads - after
+
+    report = {
+        "entries": args.entries,
+        "json_mb": round(json_bytes / 1e6, 1),
+        "migrate_s": round(migrate_s, 2),
+        "append": stats(appended),
+        "lookup_commit_id": stats(by_commit),
+        "lookup_page_id": stats(by_page),
+        "lookup_missing": missing,
+        "concurrent_appends": per_thread * args.threads,
+        "concurrent_lost": lost,
+    }
+
+    if args.legacy_rounds:
+        legacy_path = os.path.join(root, "legacy.json")
+        with open(legacy_path, "w", encoding="utf-8") as f:
+            json.dump(existing, f, indent=2)
+
+        def legacy_append(entry):
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                logs = json.load(f)
+            logs.append(entry)
+            with open(legacy_path, "w", encoding="utf-8") as f:
+                json.dump(logs, f, indent=2)
+
+        def legacy_lookup(entry):
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                logs = json.load(f)
+            return next(c for c in logs if c["commit_id"] == entry["commit_id"])
+
+        report["legacy_append"] = stats(timed(legacy_append, list(entries(args.legacy_rounds))))
+        report["legacy_lookup"] = stats(timed(legacy_lookup, targets[:args.legacy_rounds]))
+
+    report["root"] = root
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if missing or lost else 0)
+
+
+if __name__ == "__main__":
+    main()
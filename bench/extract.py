@@ -0,0 +1,136 @@
+"""HTML 추출/검증 속도: generate.extract vs 예전 정규식 + .lower() 방식.
+
+    python -m bench.extract --rounds 20 --megabytes 1 4
+
+static/generated 의 페이지(```html 블록으로 감싼 응답)와 합성한 수 MB짜리 응답으로 잰다.
+stream 열은 같은 응답을 토큰 크기(평균 ~16자) 조각으로 나눠 feed()한 경우다.
+legacy_stream_ms 는 스트림이 끝난 뒤 한꺼번에 드는 시간이고, stream_ms 중 대부분은 조각이 오는 동안
+나눠서 쓰이므로 스트림 종료 후 지연은 stream_finish_ms 와 비교한다.
+"""
+import re
+import glob
+import json
+import time
+import random
+import argparse
+
+from generate.extract import HtmlExtractor, extract_html
+
+
+def legacy_extract(raw_response):
+    # 이 변경 전 app.extract_html 그대로
+    match = re.search(r"```html\s*(.*?)```", raw_response, flags=re.DOTALL | re.IGNORECASE)
+    if match:
+        html_code = match.group(1).strip()
+    else:
+        html_start = re.search(r"(?i)(<!doctype html>|<html[\s>])", raw_response)
+        if html_start:
+            html_code = raw_response[html_start.start():].strip()
+        else:
+            return None, "OpenAI 응답에서 HTML 코드를 찾을 수 없습니다."
+    if "<html" not in html_code.lower():
+        return None, "OpenAI 응답이 HTML 형식이 아닙니다."
+    return html_code, None
+
+
+def legacy_stream(chunks):
+    return legacy_extract("".join(chunks).strip())
+
+
+def stream_extract(chunks):
+    extractor = HtmlExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+    return extractor.finish()
+
+
+def synthetic(megabytes):
+    section = (
+        "<section class=\"menu\"><h2>오늘의 메뉴</h2><p>신선한 재료로 만든 요리를 소개합니다.</p>"
+        "<script>document.querySelectorAll('.menu').forEach(e => e.dataset.ready = '<body>')</script></section>\n"
+    )
+    body = section * (megabytes * 1024 * 1024 // len(section.encode("utf-8")) + 1)
+    return (
+        "아래는 요청하신 페이지입니다.\n```html\n<!DOCTYPE html>\n<html lang=\"ko\"><head><title>t</title>"
+        f"<style>body {{ margin: 0 }}</style></head><body>{body}</body></html>\n```\n설명은 여기까지입니다."
+    )
+
+
+def tokens(raw, rng):
+    chunks, position = [], 0
+    while position < len(raw):
+        size = rng.randint(4, 28)
+        chunks.append(raw[position:position + size])
+        position += size
+    return chunks
+
+
+def stream_finish(chunks, rounds):
+    # 마지막 조각이 온 뒤 결과가 나오기까지 (예전 방식은 join + 추출 전체가 이 시점에 일어남)
+    elapsed = 0.0
+    for _ in range(rounds):
+        extractor = HtmlExtractor()
+        for chunk in chunks:
+            extractor.feed(chunk)
+        start = time.perf_counter()
+        extractor.finish()
+        elapsed += time.perf_counter() - start
+    return elapsed / rounds * 1000
+
+
+def measure(func, arg, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = func(arg)
+    return (time.perf_counter() - start) / rounds * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--megabytes", type=int, nargs="*", default=[1, 4])
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    corpus = [
+        f"```html\n{open(path, encoding='utf-8').read()}\n```"
+        for path in sorted(glob.glob("static/generated/*.html"))
+    ]
+    cases = [("static/generated", corpus)] + [(f"synthetic {mb}MB", [synthetic(mb)]) for mb in args.megabytes]
+
+    report = []
+    for name, responses in cases:
+        rounds = args.rounds if len(responses) == 1 else max(1, args.rounds // 5)
+        row = {"case": name, "responses": len(responses), "avg_bytes": sum(map(len, responses)) // len(responses)}
+        totals = {"legacy_ms": 0.0, "extract_ms": 0.0, "legacy_stream_ms": 0.0, "stream_ms": 0.0,
+                  "stream_finish_ms": 0.0}
+        mismatches = 0
+        for raw in responses:
+            chunks = tokens(raw, rng)
+            legacy_ms, expected = measure(legacy_extract, raw, rounds)
+            extract_ms, result = measure(extract_html, raw, rounds)
+            legacy_stream_ms, _ = measure(legacy_stream, chunks, rounds)
+            stream_ms, streamed = measure(stream_extract, chunks, rounds)
+            totals["legacy_ms"] += legacy_ms
+            totals["extract_ms"] += extract_ms
+            totals["legacy_stream_ms"] += legacy_stream_ms
+            totals["stream_ms"] += stream_ms
+            totals["stream_finish_ms"] += stream_finish(chunks, rounds)
+            mismatches += result[0] != expected[0] or streamed[0] != expected[0]
+        row.update({key: round(value / len(responses), 3) for key, value in totals.items()})
+        row["mismatches"] = mismatches
+        report.append(row)
+
+    # 잘린 응답은 예전 방식은 통과, 새 방식은 거부해야 함
+    truncated = synthetic(1)
+    truncated = truncated[:len(truncated) * 2 // 3]
+    report.append({
+        "case": "truncated 1MB",
+        "legacy_accepts": legacy_extract(truncated)[0] is not None,
+        "extract_error": extract_html(truncated)[1],
+    })
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
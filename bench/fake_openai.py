@@ -0,0 +1,161 @@
+"""로컬 OpenAI 호환 서버 (부하 테스트용).
+
+    python -m bench.fake_openai --port 8001 --latency 1.0
+
+POST /v1/chat/completions 에 ```html 블록이 담긴 응답을 돌려준다. stream=true 이면 SSE 조각으로 보낸다.
+매 응답마다 내용이 달라 캐시/중복 제거에 걸리지 않는다.
+"""
+import sys
+import json
+import time
+import random
+import uuid
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAI:
+    def __init__(self, latency=1.0, chunks=20, status_codes=(), error_rate=0.0, slow_rate=0.0, slow_factor=10,
+                 payload_kb=0, chunk_delay=0.0):
+        self.latency = latency
+        self.chunks = chunks
+        # 조각 사이 지연(초) — latency는 첫 조각까지의 시간이 됨.
+        # 스트리밍이 아닌 응답도 모델이 끝까지 만드는 시간만큼 (조각 수 - 1) * chunk_delay 를 더 기다림
+        self.chunk_delay = chunk_delay
+        # 응답 HTML 크기(KB). 0이면 기본 20개 섹션 (~2KB)
+        self.payload_kb = payload_kb
+        # 앞에서부터 순서대로 돌려줄 에러 상태 코드 (재시도 테스트용)
+        self.status_codes = list(status_codes)
+        # 무작위로 429/500/503을 돌려줄 비율, latency * slow_factor 만큼 늦게 응답할 비율
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def enter(self):
+        """(상태 코드, 지연 시간)"""
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            if self.status_codes:
+                status = self.status_codes.pop(0)
+            elif random.random() < self.error_rate:
+                status = random.choice((429, 500, 503))
+            else:
+                status = 200
+        slow = random.random() < self.slow_rate
+        return status, self.latency * (self.slow_factor if slow else 1)
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def page(self):
+        nonce = uuid.uuid4().hex
+        count = max(20, self.payload_kb * 1024 // 84)
+        sections = "".join(f"<section><h2>{nonce[i % 26:i % 26 + 6]}</h2><p>본문 {i} {nonce}</p></section>"
+                           for i in range(count))
+        return f"```html\n<!DOCTYPE html><html><head><title>{nonce}</title></head><body>{sections}</body></html>\n```"
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            status, latency = fake.enter()
+            try:
+                time.sleep(latency)
+                if status != 200:
+                    self._json({"error": {"message": "fake error", "type": "server_error"}}, status)
+                elif body.get("stream"):
+                    self._stream(fake.page())
+                else:
+                    time.sleep(fake.chunk_delay * (fake.chunks - 1))
+                    self._json(_completion(fake.page()))
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # 클라이언트가 요청을 취소함
+            finally:
+                fake.leave()
+
+        def _json(self, payload, status=200):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, text):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            step = max(1, len(text) // fake.chunks)
+            for i in range(0, len(text), step):
+                chunk = {
+                    "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": "gpt-4o",
+                    "choices": [{"index": 0, "delta": {"content": text[i:i + step]}, "finish_reason": None}]
+                }
+                if i and fake.chunk_delay:
+                    time.sleep(fake.chunk_delay)
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return Handler
+
+
+def _completion(text):
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": len(text) // 4, "total_tokens": 100 + len(text) // 4},
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # 동시 연결 수백 개를 받을 수 있도록
+
+
+def start(port=0, **options):
+    """백그라운드 스레드에서 서버를 띄우고 (server, fake, base_url)을 반환한다."""
+    fake = FakeOpenAI(**options)
+    server = _Server(("127.0.0.1", port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, fake, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--payload-kb", type=int, default=0)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    args = parser.parse_args()
+    server, _, base_url = start(
+        args.port, latency=args.latency, error_rate=args.error_rate, slow_rate=args.slow_rate,
+        payload_kb=args.payload_kb, chunk_delay=args.chunk_delay
+    )
+    print(f"OPENAI_BASE_URL={base_url}", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,155 @@
+"""커밋 백엔드 마이크로벤치마크: git add/diff/commit/rev-parse vs 상주 fast-import.
+
+    python -m bench.fast_import --files 5000 --commits 300
+    python -m bench.fast_import --files 20000 --commits 1500 --gc-every 50 --gc-auto 1000
+
+static/generated에 파일 N개가 커밋된 저장소를 만들고 두 벌로 복제한 뒤, 같은 순서로 같은 페이지를
+커밋한다. (push 제외, 커밋 경로만) 끝난 뒤 두 저장소의 트리 해시가 같아야 하고,
+fast-import 쪽의 loose 객체는 gc --auto 임계값(gc.auto) 근처에서 더 쌓이지 않아야 한다.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+from bench.async_load import percentile
+
+
+def git(repo, *args):
+    return subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True, text=True).stdout
+
+
+def make_base(base, count):
+    repo = os.path.join(base, "base")
+    git(base, "init", "-q", "-b", "main", repo)
+    git(repo, "config", "user.name", "bench")
+    git(repo, "config", "user.email", "bench@example.com")
+    directory = os.path.join(repo, "static", "generated")
+    os.makedirs(directory)
+    for i in range(count):
+        with open(os.path.join(directory, f"page{i:06d}.html"), "w", encoding="utf-8") as f:
+            f.write(f"<!DOCTYPE html><html><body><h1>page {i}</h1></body></html>")
+    git(repo, "add", ".")
+    # 커밋이 뒤에서 띄우는 gc --auto와 겹치지 않게 끄고 직접 한 번 묶음
+    git(repo, "-c", "gc.auto=0", "commit", "-q", "-m", "init")
+    git(repo, "gc", "-q")
+    return repo
+
+
+def clone(base, source, name):
+    repo = os.path.join(base, name)
+    git(base, "clone", "-q", source, repo)
+    git(repo, "config", "user.name", "bench")
+    git(repo, "config", "user.email", "bench@example.com")
+    return repo
+
+
+def pages(commits, per_commit):
+    # 새 파일과 기존 파일 수정이 섞이도록
+    for i in range(commits):
+        yield [(f"static/generated/{'new' if n % 2 else 'page'}{i * per_commit + n:06d}.html",
+                f"<!DOCTYPE html><html><body><h1>rev {i} {n}</h1></body></html>") for n in range(per_commit)]
+
+
+def write(repo, files):
+    for path, text in files:
+        with open(os.path.join(repo, path), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def run_cli(repo, batches):
+    samples = []
+    for files in batches:
+        start = time.perf_counter()
+        write(repo, files)
+        paths = [path for path, _ in files]
+        git(repo, "add", "--", *paths)
+        if subprocess.run(["git", "diff", "--cached", "--quiet", "--", *paths], cwd=repo).returncode != 0:
+            git(repo, "commit", "-q", "-m", "bench")
+        git(repo, "rev-parse", "HEAD")
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_fast_import(repo, batches):
+    from generate.git_objects import FastImportWriter
+
+    writer = FastImportWriter(repo)
+    samples = []
+    for files in batches:
+        start = time.perf_counter()
+        write(repo, files)
+        writer.commit(files, "bench")
+        samples.append(time.perf_counter() - start)
+    # 남은 gc 스레드가 끝나길 기다렸다가 종료 시 gc도 한 번
+    if writer._gc_thread is not None:
+        writer._gc_thread.join()
+    writer.close()
+    return samples
+
+
+def objects(repo):
+    counts = dict(line.split(": ") for line in git(repo, "count-objects", "-v").splitlines())
+    return {"loose": int(counts["count"]), "packs": int(counts["packs"])}
+
+
+def summary(samples):
+    total = sum(samples)
+    return {
+        "commits_per_s": round(len(samples) / total, 1),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5000, help="처음부터 커밋돼 있는 static/generated 파일 수")
+    parser.add_argument("--commits", type=int, default=300)
+    parser.add_argument("--per-commit", type=int, default=1, help="커밋 하나에 담을 파일 수")
+    parser.add_argument("--gc-every", type=int, default=None, help="GIT_GC_EVERY")
+    parser.add_argument("--gc-auto", type=int, default=None, help="gc.auto (loose 객체 임계값)")
+    args = parser.parse_args()
+    if args.gc_every is not None:
+        os.environ["GIT_GC_EVERY"] = str(args.gc_every)
+
+    base = tempfile.mkdtemp(prefix="orrne-bench-")
+    start = time.perf_counter()
+    source = make_base(base, args.files)
+    setup_s = time.perf_counter() - start
+    cli_repo, fast_repo = clone(base, source, "cli"), clone(base, source, "fast-import")
+    if args.gc_auto is not None:
+        git(fast_repo, "config", "gc.auto", str(args.gc_auto))
+
+    batches = list(pages(args.commits, args.per_commit))
+    cli = run_cli(cli_repo, batches)
+    fast = run_fast_import(fast_repo, batches)
+
+    cli_tree = git(cli_repo, "rev-parse", "HEAD^{tree}").strip()
+    fast_tree = git(fast_repo, "rev-parse", "HEAD^{tree}").strip()
+    clean = not git(fast_repo, "status", "--porcelain")
+    gc_auto = int(subprocess.run(["git", "config", "gc.auto"], cwd=fast_repo, capture_output=True, text=True)
+                  .stdout.strip() or 6700)
+    report = {
+        "files": args.files,
+        "commits": args.commits,
+        "per_commit": args.per_commit,
+        "setup_s": round(setup_s, 1),
+        "cli": dict(summary(cli), objects=objects(cli_repo)),
+        "fast_import": dict(summary(fast), objects=objects(fast_repo)),
+        "speedup": round(sum(cli) / sum(fast), 2),
+        "same_tree": cli_tree == fast_tree,
+        "index_clean": clean,
+        # gc --auto는 objects/17 하나만 세어 loose 수를 추정하므로 임계값의 두 배까지 여유를 둠
+        "loose_bounded": objects(fast_repo)["loose"] <= gc_auto * 2,
+        "base": base,
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["same_tree"] and report["index_clean"] and report["loose_bounded"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""프리뷰 전송량/처리량: 예전 send_file vs ETag/304 + 미리 만든 압축본 (generate.http_cache).
+
+    python -m bench.http_cache --pages 50 --requests 2000 --concurrency 8
+    python -m bench.http_cache --payload-kb 64
+
+임시 저장소에 페이지 N개를 저장하고 앱을 실제 HTTP 서버로 띄운 뒤, 같은 페이지를 두 경로로 읽는다.
+  before — 변경 전 /preview 와 같은 flask.send_file (벤치마크용 경로 /bench/send_file/<id> 로 등록)
+  after  — 지금 /preview/<id>
+경우마다 keep-alive 연결로 --requests 번 요청해 응답 하나당 보낸 바이트(헤더+본문)와 requests/s를 잰다.
+  first   — Accept-Encoding: gzip, br 로 처음 받기
+  revisit — 처음 받은 ETag를 If-None-Match로 보내 다시 받기
+after의 first는 before보다 절반 이하, revisit은 304여야 한다. 어긋나면 exit 1.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import http.client
+
+from bench import fake_openai
+from bench.suite import start_app
+
+ACCEPT = {"Accept-Encoding": "gzip, br"}
+
+
+def page(rng, index, payload_kb):
+    """생성물과 비슷한 HTML (스타일 + 반복되는 마크업 + 섞인 문장)"""
+    words = ["소개", "서비스", "문의", "가격", "팀", "블로그", "design", "fast", "simple", "온라인", "예약", "후기"]
+    sections = []
+    while sum(map(len, sections)) < payload_kb * 1024:
+        text = " ".join(rng.choice(words) for _ in range(40))
+        sections.append(f'<section class="card"><h2>{rng.choice(words)} {len(sections)}</h2><p>{text}</p></section>')
+    return ("<!DOCTYPE html><html><head><meta charset='utf-8'><title>page {0}</title>"
+            "<style>body{{font-family:sans-serif;margin:0}}.card{{padding:16px;border-radius:8px}}</style>"
+            "</head><body><h1>page {0}</h1>{1}</body></html>").format(index, "".join(sections))
+
+
+def fetch(port, paths, requests, concurrency, headers_for):
+    """paths를 돌아가며 requests번 GET. (상태 코드별 수, 응답당 바이트, requests/s)"""
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    statuses, sent = {}, [0]
+
+    def worker():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        for i in iter(lambda: next(counter, None), None):
+            path = paths[i % len(paths)]
+            conn.request("GET", path, headers=headers_for(path))
+            response = conn.getresponse()
+            body = response.read()
+            size = len(body) + len(str(response.msg)) + len("HTTP/1.1 200 OK\r\n")
+            with lock:
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+                sent[0] += size
+        conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "statuses": statuses,
+        "bytes_per_response": round(sent[0] / requests),
+        "requests_per_s": round(requests / elapsed, 1),
+    }
+
+
+def etags(port, paths):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    found = {}
+    for path in paths:
+        conn.request("GET", path, headers=ACCEPT)
+        response = conn.getresponse()
+        response.read()
+        found[path] = (response.getheader("ETag"), response.getheader("Cache-Control"),
+                       response.getheader("Content-Encoding"))
+    conn.close()
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--payload-kb", type=int, default=24, help="페이지 하나의 크기(KB)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    fake_server, _, base_url = fake_openai.start()
+    server, port, repo = start_app(base_url)
+    import app as flask_app
+    from flask import send_file
+
+    # 변경 전 /preview 와 같은 응답 (첫 요청 전에 등록해야 함)
+    @flask_app.app.route("/bench/send_file/<commit_id>")
+    def send_file_preview(commit_id):
+        return send_file(flask_app.get_blobstore(flask_app.current_workspace()).resolve(commit_id))
+
+    workspace = flask_app.get_workspace()
+    ids = []
+    for i in range(args.pages):
+        body, _ = flask_app.save_generated_page(workspace, f"http cache {i}", page(rng, i, args.payload_kb))
+        ids.append(body["page_id"])
+
+    report = {"pages": args.pages, "payload_kb": args.payload_kb, "requests": args.requests,
+              "concurrency": args.concurrency}
+    for name, prefix in (("before", "/bench/send_file/"), ("after", "/preview/")):
+        paths = [prefix + page_id for page_id in ids]
+        first = fetch(port, paths, args.requests, args.concurrency, lambda path: ACCEPT)
+        known = etags(port, paths)
+        revisit = fetch(port, paths, args.requests, args.concurrency,
+                        lambda path: dict(ACCEPT, **({"If-None-Match": known[path][0]} if known[path][0] else {})))
+        etag, cache_control, encoding = known[paths[0]]
+        report[name] = {"first": first, "revisit": revisit,
+                        "cache_control": cache_control, "content_encoding": encoding}
+    server.shutdown()
+    fake_server.shutdown()
+
+    before, after = report["before"], report["after"]
+    report["bytes_ratio"] = {
+        kind: round(after[kind]["bytes_per_response"] / before[kind]["bytes_per_response"], 3)
+        for kind in ("first", "revisit")
+    }
+    report["requests_per_s_ratio"] = {
+        kind: round(after[kind]["requests_per_s"] / before[kind]["requests_per_s"], 2)
+        for kind in ("first", "revisit")
+    }
+    report["repo"] = repo
+    report["ok"] = bool(
+        after["first"]["statuses"] == {200: args.requests}
+        and after["revisit"]["statuses"] == {304: args.requests}
+        and report["bytes_ratio"]["first"] <= 0.5
+    )
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""job 모드(/generate {"async": true}) 제출 지연시간이 동시 제출 수와 무관하게 일정한지.
+
+    python -m bench.jobs_latency --levels 1,10,50,100 --latency 1.0
+    python -m bench.jobs_latency --sync     # 같은 부하를 동기 모드로도 보내 비교
+
+가짜 OpenAI 서버와 임시 저장소(bare origin 포함)를 만들고, 동시 제출 수를 늘려 가며
+Flask 테스트 클라이언트로 /generate 를 한꺼번에 보낸다. 제출 응답(202)까지의 시간과
+/jobs/<id> 가 done 이 될 때까지의 시간을 따로 잰다. 모든 job이 done이고 commit_id가 있어야 통과.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import fake_openai
+from bench.async_load import make_repo, percentile
+
+
+def submit_all(client, count, label, use_async):
+    def one(i):
+        start = time.perf_counter()
+        response = client.post("/generate", json={"prompt": f"{label} {i}", "no_cache": True, "async": use_async})
+        return response.status_code, response.get_json(), time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(one, range(count)))
+
+
+def wait_jobs(client, job_ids, timeout):
+    """모든 job이 끝날 때까지 폴링. {job_id: 상태 dict}"""
+    deadline = time.monotonic() + timeout
+    finished = {}
+    while len(finished) < len(job_ids) and time.monotonic() < deadline:
+        for job_id in job_ids:
+            if job_id in finished:
+                continue
+            job = client.get(f"/jobs/{job_id}").get_json()
+            if job["status"] in ("done", "failed"):
+                finished[job_id] = job
+        time.sleep(0.05)
+    return finished
+
+
+def level(client, count, use_async, timeout):
+    start = time.perf_counter()
+    results = submit_all(client, count, f"{'async' if use_async else 'sync'} {count}", use_async)
+    latencies = [latency * 1000 for _, _, latency in results]
+    report = {
+        "submissions": count,
+        "statuses": {str(status): sum(1 for s, _, _ in results if s == status) for status, _, _ in results},
+        "submit_ms_p50": round(percentile(latencies, 50), 1),
+        "submit_ms_p99": round(percentile(latencies, 99), 1),
+    }
+    if use_async:
+        job_ids = [body["job_id"] for status, body, _ in results if status == 202]
+        finished = wait_jobs(client, job_ids, timeout)
+        report["done"] = sum(1 for job in finished.values() if job["status"] == "done" and job.get("commit_id"))
+        report["failed"] = len(job_ids) - report["done"]
+    report["complete_s"] = round(time.perf_counter() - start, 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", default="1,10,50,100", help="동시 제출 수 목록 (쉼표 구분)")
+    parser.add_argument("--latency", type=float, default=1.0, help="가짜 OpenAI 응답 지연(초)")
+    parser.add_argument("--workers", type=int, default=4, help="JOB_WORKERS")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--sync", action="store_true", help="동기 모드도 같은 부하로 측정")
+    args = parser.parse_args()
+    levels = [int(count) for count in args.levels.split(",")]
+
+    server, fake, base_url = fake_openai.start(latency=args.latency)
+    # 앱을 import 하기 전에 저장소/모델 주소/작업 풀 크기를 지정
+    os.environ["ORRNE_REPO_DIR"] = make_repo(tempfile.mkdtemp(prefix="orrne-bench-"))
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ["JOB_WORKERS"] = str(args.workers)
+    os.environ["JOB_QUEUE_SIZE"] = str(max(levels))
+    from app import app
+
+    client = app.test_client()
+    report = {"latency_s": args.latency, "job_workers": args.workers,
+              "async": [level(client, count, True, args.timeout) for count in levels]}
+    if args.sync:
+        report["sync"] = [level(client, count, False, args.timeout) for count in levels]
+    server.shutdown()
+
+    # 제출 지연은 제출 수에 비례해 늘지 않아야 함 (모델 지연의 절반을 넘으면 실패로 봄)
+    report["flat"] = all(result["submit_ms_p99"] < args.latency * 500 for result in report["async"])
+    report["all_done"] = all(result["failed"] == 0 for result in report["async"])
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["flat"] and report["all_done"] else 1)
+
+
+if __name__ == "__main__":
+    main()
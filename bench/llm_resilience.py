@@ -0,0 +1,88 @@
+"""generate.llm 재시도/hedge/회로 차단 동작 확인.
+
+    python -m bench.llm_resilience --calls 200 --error-rate 0.2 --slow-rate 0.05
+    python -m bench.llm_resilience --hedge        # p95를 넘는 느린 응답에 hedge
+    python -m bench.llm_resilience --error-rate 1 # 회로 차단 확인
+
+가짜 OpenAI 서버에 에러/지연을 주입하고 call_llm을 직접 호출한다.
+끝으로 400 응답이 회로의 연속 실패 수를 지우지 않는지(성공으로 세지 않는지) 확인하고, 어긋나면 exit 1.
+--hedge --concurrency 64 처럼 hedge 풀(32)보다 많이 보내면 max_upstream_in_flight로 첫 요청이 막히지 않는지 본다.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import fake_openai
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--hedge", action="store_true")
+    args = parser.parse_args()
+
+    server, fake, base_url = fake_openai.start(
+        latency=args.latency, error_rate=args.error_rate, slow_rate=args.slow_rate
+    )
+    # generate.llm은 import 시점에 환경변수를 읽음
+    os.environ["LLM_HEDGE"] = "1" if args.hedge else "0"
+    os.environ.setdefault("LLM_BACKOFF_BASE", "0.05")
+    os.environ.setdefault("LLM_TIMEOUT", "5")
+    from openai import OpenAI
+    from generate.llm import call_llm, llm_stats, breaker
+
+    client = OpenAI(api_key="bench", base_url=base_url, max_retries=0)
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            _, attempts = call_llm(client, [{"role": "user", "content": f"call {i}"}])
+            return "ok", time.perf_counter() - start, len(attempts)
+        except Exception as e:
+            return type(e).__name__, time.perf_counter() - start, 0
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.calls)))
+    max_in_flight = fake.max_in_flight
+
+    # 400은 요청 자체의 문제 — 쌓인 연속 실패 수를 지우면 안 됨
+    breaker.record_success()
+    breaker.record_failure()
+    fake.status_codes = [400]
+    one("bad request")
+    bad_request_kept_failures = breaker.failures == 1
+    breaker.record_success()
+    server.shutdown()
+
+    latencies = [latency for outcome, latency, _ in results if outcome == "ok"]
+    outcomes = {}
+    for outcome, _, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    print(json.dumps({
+        "calls": args.calls,
+        "outcomes": outcomes,
+        "upstream_requests": fake.requests,
+        "max_upstream_in_flight": max_in_flight,
+        "bad_request_kept_failures": bad_request_kept_failures,
+        "call_p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "call_p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        "call_p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "llm": llm_stats(),
+    }, indent=2))
+    sys.exit(0 if bad_request_kept_failures else 1)
+
+
+if __name__ == "__main__":
+    main()
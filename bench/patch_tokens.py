@@ -0,0 +1,117 @@
+"""부분 수정(mode="patch")의 토큰 절감: 전체 재생성 프롬프트/응답 vs 영역 + find/replace 수정안.
+
+    python -m bench.patch_tokens
+    python -m bench.patch_tokens --dir static/generated --dir static/preview
+
+static/generated 의 페이지마다 h1 / 첫 p / 마지막 section 등 실제로 있는 영역을 골라
+  full  — build_revision_prompt 입력 + 문서 전체 응답
+  patch — 영역만 담은 build_patch_prompt 입력 + 영역 첫 줄을 바꾸는 ```json 수정안 응답
+의 토큰 수를 센다. 프롬프트는 앱의 build_revision_prompt / build_patch_request 가 만든 그대로이고,
+tiktoken이 있으면 cl100k_base로, 없으면 UTF-8 4바이트당 1토큰으로 어림한다.
+잘못된 selector('p[[')는 /revise에서 400이어야 하고, 모든 수정안이 그 영역에 적용돼야 한다. 어긋나면 exit 1.
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+import tempfile
+import statistics
+
+try:
+    import tiktoken
+except ImportError:  # 선택 의존성 — 없으면 바이트 수로 어림
+    tiktoken = None
+
+from bench.async_load import make_repo
+
+TARGETS = ("h1", "p", "nav", "footer", "section:last-of-type")
+REVISION = "이 부분의 문구를 더 친근하게 바꿔 주세요."
+
+
+def counter():
+    if tiktoken is None:
+        return "utf8_bytes/4", lambda text: (len(text.encode("utf-8")) + 3) // 4
+    encoding = tiktoken.get_encoding("cl100k_base")
+    return "cl100k_base", lambda text: len(encoding.encode(text))
+
+
+def patch_reply(region):
+    """영역에 한 번만 나오는 첫 줄을 조금 바꾸는 수정안 — 모델이 돌려줄 법한 최소 응답"""
+    line = next(line for line in region.splitlines() if line.strip() and region.count(line) == 1)
+    edits = {"edits": [{"find": line, "replace": line.replace(">", ' class="friendly">', 1)}]}
+    return "```json\n" + json.dumps(edits, ensure_ascii=False) + "\n```"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", action="append", help="페이지 디렉토리 (기본: static/generated)")
+    args = parser.parse_args()
+
+    # 앱을 import 하기 전에 임시 저장소를 지정 (잘못된 selector 검사용, OpenAI는 부르지 않음)
+    os.environ["ORRNE_REPO_DIR"] = make_repo(tempfile.mkdtemp(prefix="orrne-bench-"))
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    import app as flask_app
+    from generate.patching import PatchError, parse_edits, apply_edits
+
+    workspace = flask_app.current_workspace()
+    store = flask_app.get_blobstore(workspace)
+    tokenizer, count = counter()
+    paths = sorted(path for directory in (args.dir or ["static/generated"])
+                   for path in glob.glob(os.path.join(directory, "*.html")))
+    rows, problems = [], []
+    for path in paths:
+        name = os.path.basename(path)[:-len(".html")]
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        store.put(html, aliases=[name])
+        # 앱이 모델에 보내는 프롬프트 그대로
+        full_prompt, _ = flask_app.build_revision_prompt(workspace, name, REVISION)
+        full_in = count(full_prompt)
+        full_out = count("```html\n" + html + "\n```")
+        for selector in TARGETS:
+            patch = flask_app.build_patch_request(workspace, name, REVISION, {"selector": selector})
+            if (patch["begin"], patch["end"]) == (0, len(html)):
+                continue  # 영역을 못 찾아 문서 전체를 보내는 경우
+            reply = patch_reply(html[patch["begin"]:patch["end"]])
+            try:
+                apply_edits(html, parse_edits(reply), patch["begin"], patch["end"])
+            except PatchError as e:
+                problems.append(f"{name} {selector}: {e}")
+                continue
+            patch_in = count(patch["prompt"])
+            rows.append({"selector": selector, "full_in": full_in, "patch_in": patch_in,
+                         "full": full_in + full_out, "patch": patch_in + count(reply)})
+
+    response = flask_app.app.test_client().post(
+        "/revise", json={"commit_id": "x", "prompt": REVISION, "mode": "patch", "selector": "p[["})
+    if response.status_code != 400:
+        problems.append(f"잘못된 selector: HTTP {response.status_code}")
+    if not rows:
+        problems.append("측정할 페이지 영역이 없음")
+
+    def summary(selected):
+        full, patch = sum(row["full"] for row in selected), sum(row["patch"] for row in selected)
+        return {
+            "cases": len(selected),
+            "full_tokens_p50": statistics.median(row["full"] for row in selected),
+            "patch_tokens_p50": statistics.median(row["patch"] for row in selected),
+            "input_saved": round(1 - sum(row["patch_in"] for row in selected)
+                                 / sum(row["full_in"] for row in selected), 3),
+            "total_saved": round(1 - patch / full, 3),
+        }
+
+    print(json.dumps({
+        "pages": len(paths),
+        "tokenizer": tokenizer,
+        "all": summary(rows) if rows else None,
+        "by_selector": {selector: summary([row for row in rows if row["selector"] == selector])
+                        for selector in TARGETS if any(row["selector"] == selector for row in rows)},
+        "invalid_selector_status": response.status_code,
+        "problems": problems[:50],
+    }, indent=2, ensure_ascii=False))
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""배포 중 live index 응답 검사: 승인을 반복하는 동안 여러 스레드가 / 를 계속 읽는다.
+
+    python -m bench.publish_stress --readers 8 --approvals 30
+
+모든 응답이 잘리지 않은 완전한 문서이고 ETag가 본문의 sha256과 같아야 한다.
+끝으로 다른 프로세스(다른 워커)가 게시한 내용이 이 프로세스의 / 에도 바로 보이는지 확인한다. 어긋나면 exit 1.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+import subprocess
+
+from bench.async_load import make_repo, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--approvals", type=int, default=30)
+    args = parser.parse_args()
+
+    os.environ["ORRNE_REPO_DIR"] = make_repo(tempfile.mkdtemp(prefix="orrne-bench-"))
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    import app as flask_app
+    from generate.deploys import deploy_history
+
+    workspace = flask_app.current_workspace()
+    pages = []
+    for i in range(args.approvals):
+        # 크기를 달리해서 반쯤 쓰인 파일이 읽히면 바로 드러나게
+        html = f"<!DOCTYPE html><html><body><h1>page {i}</h1><p>{'내용 ' * (500 + 300 * (i % 7))}</p></body></html>"
+        body, _ = flask_app.save_generated_page(workspace, f"stress {i}", html)
+        pages.append(body["page_id"])
+    expected = {hashlib.sha256(flask_app.get_blobstore(workspace).read(p).encode()).hexdigest() for p in pages}
+
+    stop = threading.Event()
+    reads, errors, seen = [0], [], set()
+    lock = threading.Lock()
+
+    def reader():
+        client = flask_app.app.test_client()
+        while not stop.is_set():
+            response = client.get("/")
+            data = response.get_data()
+            etag = response.headers.get("ETag", "").strip('"')
+            with lock:
+                reads[0] += 1
+                seen.add(etag)
+                if response.status_code != 200 or not data.rstrip().endswith(b"</html>"):
+                    errors.append(f"incomplete document ({len(data)} bytes)")
+                elif hashlib.sha256(data).hexdigest() != etag:
+                    errors.append(f"ETag {etag[:12]} does not match body")
+
+    threads = [threading.Thread(target=reader, daemon=True) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+
+    client = flask_app.app.test_client()
+    latencies = []
+    for i, page_id in enumerate(pages):
+        # 마지막 승인은 커밋까지 기다림 → 앞선 백그라운드 커밋도 모두 끝난 상태 (대기열 순서)
+        query = "?wait=1" if i == len(pages) - 1 else ""
+        start = time.perf_counter()
+        response = client.post(f"/admin/approve/{page_id}{query}")
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.json
+        time.sleep(0.02)
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    # 디스크/저장소/메모리가 모두 마지막 승인과 같아야 함
+    with open(workspace.index_path(), "rb") as f:
+        on_disk = f.read()
+    committed = workspace.git_bytes("show", f"HEAD:{workspace.relpath(workspace.index_path())}")
+    live = client.get("/").get_data()
+    history = deploy_history(args.approvals, workspace=workspace)
+
+    # 다른 워커 프로세스의 게시 → 이 프로세스의 메모리 사본도 따라와야 함
+    other = f"<!DOCTYPE html><html><body><h1>other worker {time.time()}</h1></body></html>"
+    subprocess.run([sys.executable, "-c", (
+        "import sys; from generate.publish import publish; from generate.workspace import get_workspace; "
+        "publish(sys.argv[1], get_workspace(sys.argv[2]))"
+    ), other, workspace.root], check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    other_seen = client.get("/").get_data().decode("utf-8") == other
+
+    print(json.dumps({
+        "reads": reads[0],
+        "errors": errors[:10],
+        "error_count": len(errors),
+        "distinct_etags_seen": len(seen & expected),
+        "approve_p50_ms": round(percentile(latencies[:-1], 50) * 1000, 1),
+        "approve_p99_ms": round(percentile(latencies[:-1], 99) * 1000, 1),
+        "disk_matches_live": on_disk == live,
+        "git_matches_live": committed == live,
+        "uncommitted_deploys": sum(1 for d in history if d["deploy_commit"] is None),
+        "other_process_publish_seen": other_seen,
+        "repo": os.environ["ORRNE_REPO_DIR"],
+    }, indent=2))
+    sys.exit(0 if not errors and on_disk == live and committed == live and other_seen else 1)
+
+
+if __name__ == "__main__":
+    main()
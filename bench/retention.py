@@ -0,0 +1,171 @@
+"""생성물 GC 전후의 디렉토리 목록/프리뷰 조회 속도와 GC 자체 비용.
+
+    python -m bench.retention --files 20000 --keep 500
+    python -m bench.retention --files 100000 --no-git
+
+임시 저장소의 static/generated, static/preview에 예전 방식 페이지를 만들고 오래된 로그/배포/계보를 채운 뒤
+generate.retention 으로 dry-run(목록 캐시 cold/warm) → 보관 → 같은 측정을 다시 한다.
+프리뷰 조회는 Flask 테스트 클라이언트로 /preview/<id> 를 부른다. (서버 시작 직후처럼 인덱스를 새로 만든 상태)
+"""
+import os
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+from bench.async_load import make_repo, percentile
+
+
+def page(name, rng):
+    sections = "".join(
+        f"<section><h2>섹션 {i}</h2><p>{name} 페이지의 {rng.random():.6f} 번째 문단입니다.</p></section>"
+        for i in range(rng.randint(5, 30))
+    )
+    return f"<!DOCTYPE html><html><head><title>{name}</title></head><body>{sections}</body></html>"
+
+
+def populate(workspace, count, keep, rng):
+    """예전 방식 페이지 count개 + 로그. 최근 keep개만 새것, 나머지는 90일 전. 보존되어야 할 이름 목록을 반환."""
+    from generate.lineage import record_version
+    from generate.deploys import record_deploy
+    from generate.blobstore import content_hash
+    from generate.logger import migrate_json_log
+
+    names = [uuid.uuid4().hex for _ in range(count)]
+    old = datetime.utcnow() - timedelta(days=90)
+    entries = []
+    for i, name in enumerate(names):
+        directory = "generated" if i % 5 < 3 else "preview"
+        html_code = page(name, rng)
+        path = workspace.path("static", directory, name + ".html")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html_code)
+        recent = i >= count - keep
+        timestamp = (datetime.utcnow() if recent else old + timedelta(seconds=i)).isoformat()
+        entries.append({"timestamp": timestamp, "prompt": f"page {i}", "commit_id": name[:40],
+                        "preview": html_code[:300], "page_id": name})
+
+    # commits.json → commits.db 마이그레이션 경로로 한 번에 넣음
+    os.makedirs(workspace.path("logs"), exist_ok=True)
+    with open(workspace.log_path("commits.json"), "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    migrate_json_log(workspace)
+
+    # 오래된 페이지 중 일부는 승인된 적 있음, 일부는 최근 페이지의 조상(수정 전 버전)
+    approved = rng.sample(names[:count - keep], min(20, count - keep))
+    for name in approved:
+        with open(workspace.path("static", "generated" if names.index(name) % 5 < 3 else "preview", name + ".html"),
+                  encoding="utf-8") as f:
+            record_deploy("approve", content_hash(f.read()), None, page_id=name, workspace=workspace)
+    parents = rng.sample(names[:count - keep], min(50, count - keep))
+    for parent, child in zip(parents, names[count - keep:]):
+        record_version(parent, workspace=workspace)
+        record_version(child, parent, "revise", workspace=workspace)
+    return names[count - keep:] + approved + parents
+
+
+def measure(workspace, client, lookups, rounds):
+    from generate.blobstore import BlobStore
+    from generate import blobstore
+
+    listing = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        entries = sum(1 for directory in ("generated", "preview", "blobs")
+                      if os.path.isdir(workspace.path("static", directory))
+                      for _ in os.scandir(workspace.path("static", directory)))
+        listing.append((time.perf_counter() - start) * 1000)
+
+    # 서버 재시작 직후처럼 인덱스(디렉토리 목록 + 별칭 기록)를 새로 만듦
+    start = time.perf_counter()
+    blobstore._stores[workspace] = store = BlobStore(workspace)
+    store.resolve(lookups[0])
+    index_ms = (time.perf_counter() - start) * 1000
+
+    latencies, statuses = [], {}
+    for name in lookups:
+        start = time.perf_counter()
+        response = client.get(f"/preview/{name}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    size = sum(entry.stat().st_size for directory in ("generated", "preview", "blobs")
+               if os.path.isdir(workspace.path("static", directory))
+               for entry in os.scandir(workspace.path("static", directory)))
+    return {
+        "entries": entries,
+        "bytes": size,
+        "listing_ms_p50": round(percentile(listing, 50), 2),
+        "index_build_ms": round(index_ms, 2),
+        "preview_ms_p50": round(percentile(latencies, 50), 3),
+        "preview_ms_p99": round(percentile(latencies, 99), 3),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--keep", type=int, default=500, help="최근(보존) 페이지 수")
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--no-git", action="store_true", help="페이지를 커밋하지 않음 (대량 파일 git add 생략)")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    os.environ["ORRNE_REPO_DIR"] = repo = make_repo(tempfile.mkdtemp(prefix="orrne-bench-"))
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    from generate.workspace import get_workspace
+    from generate import retention
+    import app as flask_app
+
+    workspace = get_workspace(repo)
+    start = time.perf_counter()
+    kept = populate(workspace, args.files, args.keep, rng)
+    if not args.no_git:
+        workspace.git("add", "static")
+        workspace.git("commit", "-q", "-m", "bench: legacy pages")
+        workspace.git("push", "-q", workspace.remote, workspace.branch)
+    setup_s = time.perf_counter() - start
+
+    client = flask_app.app.test_client()
+    lookups = [rng.choice(kept) for _ in range(args.lookups)]
+    before = measure(workspace, client, lookups, args.rounds)
+
+    policy = {"keep_last": args.keep, "ttl_days": 30, "grace_seconds": 0}
+    cold = retention.collect(workspace, dry_run=True, **policy)
+    warm = retention.collect(workspace, dry_run=True, **policy)
+    applied = retention.collect(workspace, dry_run=False, **policy)
+    after = measure(workspace, client, lookups, args.rounds)
+
+    # 보관된 페이지는 410, 복원하면 다시 200
+    archived_name = next(name for name in (entry["page_id"] for entry in
+                         json.load(open(workspace.log_path("commits.json.migrated"))))
+                         if name not in set(kept))
+    gone = client.get(f"/preview/{archived_name}").status_code
+    retention.restore(archived_name, workspace)
+    restored = client.get(f"/preview/{archived_name}").status_code
+
+    print(json.dumps({
+        "files": args.files,
+        "setup_s": round(setup_s, 1),
+        "dry_run_cold": {key: cold[key] for key in ("scanned", "cached_dirs", "scan_ms", "elapsed_ms", "unreachable")},
+        "dry_run_warm": {key: warm[key] for key in ("scanned", "cached_dirs", "scan_ms", "elapsed_ms", "unreachable")},
+        "kept": applied["kept"],
+        "apply": {key: applied.get(key) for key in
+                  ("archived", "archive_bytes", "unreachable_bytes", "removed_aliases", "apply_ms", "commit_id",
+                   "commit_timings")},
+        "before": before,
+        "after": after,
+        "archived_preview_status": gone,
+        "restored_preview_status": restored,
+        "repo": repo,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""스트리밍 생성의 첫 바이트/첫 조각까지 시간(TTFB) vs 일반 /generate 응답 시간.
+
+    python -m bench.stream_ttfb --rounds 10 --latency 0.5 --chunks 40 --chunk-delay 0.05
+    python -m bench.stream_ttfb --asgi       # asgi:app을 uvicorn 없이 프로세스 안에서 호출
+
+가짜 OpenAI(스트리밍 시 조각 사이에 --chunk-delay 만큼 쉼)와 임시 저장소로 앱을 실제 HTTP 서버에 띄우고
+/generate/stream 의 응답 헤더, 첫 바이트(": stream open"), 첫 chunk 이벤트, done 이벤트까지의 시간을 잰다.
+첫 바이트는 모델 첫 토큰(--latency)보다 빨라야 하고, 첫 조각은 일반 /generate 전체 시간보다 훨씬 빨라야 한다.
+done 이벤트에는 커밋 결과(commit_id)가 있어야 한다. 어긋나면 exit 1.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import http.client
+
+from bench import fake_openai
+from bench.async_load import percentile
+from bench.suite import start_app
+
+
+def stream_wsgi(port, prompt):
+    """(헤더, 첫 바이트, 첫 조각, 완료 시각(초), 완료 이벤트 dict)"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    start = time.perf_counter()
+    conn.request("POST", "/generate/stream", body=json.dumps({"prompt": prompt, "no_cache": True}),
+                 headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    headers_at = time.perf_counter() - start
+    first_byte = first_chunk = None
+    event = None
+    done = None
+    while True:
+        line = response.fp.readline()
+        if not line:
+            break
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        line = line.decode("utf-8").rstrip("\n")
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+            if event == "chunk" and first_chunk is None:
+                first_chunk = time.perf_counter() - start
+        elif line.startswith("data: ") and event in ("done", "error"):
+            done = dict(json.loads(line[len("data: "):]), event=event)
+            break
+    finished = time.perf_counter() - start
+    conn.close()
+    return headers_at, first_byte, first_chunk, finished, done
+
+
+def stream_asgi(prompt):
+    from asgi import app
+
+    async def run():
+        start = time.perf_counter()
+        times = {}
+        body = bytearray()
+        sent = [{"type": "http.request", "body": json.dumps({"prompt": prompt, "no_cache": True}).encode(),
+                 "more_body": False}]
+
+        async def receive():
+            if sent:
+                return sent.pop(0)
+            await asyncio.Event().wait()  # 연결 유지
+
+        async def send(message):
+            now = time.perf_counter() - start
+            if message["type"] == "http.response.start":
+                times["headers"] = now
+                return
+            if message.get("body"):
+                times.setdefault("first_byte", now)
+                body.extend(message["body"])
+                if b"event: chunk" in body:
+                    times.setdefault("first_chunk", now)
+
+        scope = {"type": "http", "method": "POST", "path": "/generate/stream", "headers": [], "query_string": b""}
+        await app(scope, receive, send)
+        finished = time.perf_counter() - start
+        done = None
+        for block in body.decode("utf-8").split("\n\n"):
+            if block.startswith(("event: done", "event: error")):
+                event, data = block.split("\n", 1)
+                done = dict(json.loads(data[len("data: "):]), event=event[len("event: "):])
+        return times.get("headers"), times.get("first_byte"), times.get("first_chunk"), finished, done
+
+    return asyncio.run(run())
+
+
+def blocking_generate(port, prompt):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    start = time.perf_counter()
+    conn.request("POST", "/generate", body=json.dumps({"prompt": prompt, "no_cache": True}),
+                 headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, response.status
+
+
+def ms(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return {"p50": round(percentile(values, 50) * 1000, 1), "max": round(max(values) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.5, help="모델 첫 토큰까지 지연(초)")
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--chunk-delay", type=float, default=0.05)
+    parser.add_argument("--asgi", action="store_true", help="스트리밍을 asgi:app으로 호출")
+    args = parser.parse_args()
+
+    fake_server, fake, base_url = fake_openai.start(latency=args.latency, chunks=args.chunks,
+                                                    chunk_delay=args.chunk_delay)
+    server, port, repo = start_app(base_url)
+
+    streamed = [stream_asgi(f"ttfb {i}") if args.asgi else stream_wsgi(port, f"ttfb {i}")
+                for i in range(args.rounds)]
+    blocking = [blocking_generate(port, f"blocking {i}") for i in range(args.rounds)]
+    server.shutdown()
+    fake_server.shutdown()
+
+    headers, first_bytes, first_chunks, finished, done = zip(*streamed)
+    committed = sum(1 for event in done if event and event["event"] == "done" and event.get("commit_id"))
+    blocking_ms = ms([elapsed for elapsed, status in blocking if status == 200])
+    report = {
+        "server": "asgi" if args.asgi else "wsgi",
+        "rounds": args.rounds,
+        "model_first_token_ms": args.latency * 1000,
+        "stream": {
+            "headers_ms": ms(headers),
+            "first_byte_ms": ms(first_bytes),
+            "first_chunk_ms": ms(first_chunks),
+            "done_ms": ms(finished),
+            "committed": committed,
+        },
+        "blocking_generate_ms": blocking_ms,
+        "repo": repo,
+    }
+    report["ok"] = bool(
+        committed == args.rounds and blocking_ms
+        and report["stream"]["first_byte_ms"]["max"] < args.latency * 1000
+        and report["stream"]["first_chunk_ms"]["p50"] < blocking_ms["p50"] / 2
+    )
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""테넌트(저장소) 수에 따른 전체 커밋 처리량.
+
+    python -m bench.tenants --tenants 1,2,4,8 --writers 4 --duration 10
+    python -m bench.tenants --backend cli
+
+임시 저장소(bare origin 포함)를 만들고 테넌트마다 writer 스레드를 붙여 save_generated_page
+(blob 저장 → 배치 커밋 → push → 로그)를 쉬지 않고 부른다. 모델 호출은 빼고 저장/커밋 경로만 잰다.
+같은 수의 writer를 기본 저장소 하나에 몰았을 때(shared)와 비교하면 저장소 락/배치 대기 때문에
+한 저장소에서 막히는 처리량이 테넌트 수만큼 늘어나는지 볼 수 있다.
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+
+from bench.async_load import make_repo, percentile
+
+
+def page(tenant, i, rng):
+    # 근접 중복 검사에 걸리지 않도록 단어를 무작위로
+    words = lambda count: " ".join(f"{rng.getrandbits(40):x}" for _ in range(count))
+    sections = "".join(f"<section><h2>{words(3)}</h2><p>{words(30)}</p></section>" for _ in range(rng.randint(5, 20)))
+    return f"<!DOCTYPE html><html><head><title>{tenant} {i}</title></head><body>{sections}</body></html>"
+
+
+def run(label, workspaces, writers, duration):
+    """워크스페이스마다 writer개 스레드로 duration초 동안 페이지 저장. 결과 통계 dict."""
+    from app import save_generated_page
+
+    results = {workspace.branch + "@" + workspace.root: [] for workspace in workspaces}
+    errors = []
+    deadline = time.monotonic() + duration
+
+    def writer(workspace, seed):
+        rng = random.Random(seed)
+        records = results[workspace.branch + "@" + workspace.root]
+        i = 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            body, status_code = save_generated_page(workspace, f"bench {seed} {i}", page(seed, i, rng))
+            elapsed = (time.perf_counter() - start) * 1000
+            if status_code == 200 and body.get("commit_id"):
+                records.append((body["commit_id"], elapsed))
+            else:
+                errors.append(body.get("status") or status_code)
+            i += 1
+
+    threads = [threading.Thread(target=writer, args=(workspace, f"{label}-{index}-{n}"))
+               for index, workspace in enumerate(workspaces) for n in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    records = [record for per_workspace in results.values() for record in per_workspace]
+    commits = sum(len({commit_id for commit_id, _ in per_workspace}) for per_workspace in results.values())
+    latencies = [latency for _, latency in records]
+    return {
+        "workspaces": len(workspaces),
+        "writers": len(threads),
+        "pages": len(records),
+        "commits": commits,
+        "errors": {str(reason): errors.count(reason) for reason in set(errors)},
+        "pages_per_s": round(len(records) / elapsed, 1),
+        "commits_per_s": round(commits / elapsed, 2),
+        "page_ms_p50": round(percentile(latencies, 50), 1) if latencies else None,
+        "page_ms_p99": round(percentile(latencies, 99), 1) if latencies else None,
+    }
+
+
+def check_origin(origin, workspaces):
+    """테넌트 브랜치가 각각 origin에 push됐는지 — {브랜치: 커밋 수}"""
+    counts = {}
+    for workspace in workspaces:
+        result = subprocess.run(["git", "rev-list", "--count", workspace.branch], cwd=origin,
+                                capture_output=True, text=True)
+        counts[workspace.branch] = int(result.stdout.strip() or 0) if result.returncode == 0 else None
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenants", default="1,2,4,8", help="테넌트 수 목록 (쉼표 구분)")
+    parser.add_argument("--writers", type=int, default=4, help="테넌트당 동시 writer 수")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--backend", choices=("fast-import", "cli"), default=None, help="GIT_BACKEND")
+    parser.add_argument("--no-shared", action="store_true", help="같은 writer 수를 저장소 하나에 몰아 보는 비교 생략")
+    args = parser.parse_args()
+    counts = [int(count) for count in args.tenants.split(",")]
+
+    base = tempfile.mkdtemp(prefix="orrne-bench-")
+    os.environ["ORRNE_REPO_DIR"] = repo = make_repo(base)
+    os.environ["ORRNE_TENANT_ROOT"] = os.path.join(base, "tenants")
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    if args.backend:
+        os.environ["GIT_BACKEND"] = args.backend
+    from generate.workspace import get_workspace
+    from generate.tenants import create_tenant
+
+    # 저장소 생성(clone) 비용은 측정에서 뺌
+    start = time.perf_counter()
+    tenant_workspaces = [create_tenant(f"bench{index}") for index in range(max(counts))]
+    create_ms = (time.perf_counter() - start) * 1000 / len(tenant_workspaces)
+
+    report = {"writers_per_tenant": args.writers, "duration_s": args.duration,
+              "tenant_create_ms": round(create_ms, 1), "sharded": [], "shared": []}
+    for count in counts:
+        report["sharded"].append(run(f"sharded{count}", tenant_workspaces[:count], args.writers, args.duration))
+        if not args.no_shared:
+            report["shared"].append(run(f"shared{count}", [get_workspace()], args.writers * count, args.duration))
+
+    first = report["sharded"][0]["commits_per_s"] or 1
+    report["speedup"] = {str(result["workspaces"]): round(result["commits_per_s"] / first, 2)
+                         for result in report["sharded"]}
+    report["origin_commits"] = check_origin(os.path.join(base, "origin.git"), tenant_workspaces)
+    report["repo"] = repo
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""저장소 두 개에 /generate 를 수십 개씩 동시에 보내고 파일이 엉뚱한 곳에 생기지 않았는지 확인.
+
+    python -m bench.workspace_stress --requests 60
+    python -m bench.workspace_stress --requests 200 --latency 0.5
+
+가짜 OpenAI 서버와 임시 저장소 두 개(각자 bare origin)를 만들고, 프로세스 cwd는 빈 디렉토리로 옮긴다.
+절반은 Flask 테스트 클라이언트로 기본 저장소에, 절반은 generate_page로 두 번째 저장소에 동시에 보낸다.
+끝난 뒤 확인하는 것:
+  - cwd(빈 디렉토리)에 아무 파일도 생기지 않음
+  - 각 저장소에 새로 생긴 파일은 static/blobs, static/generated, static/preview, logs 아래에만 있음
+  - 각 페이지의 blob은 자기 저장소에만 있고, 커밋 트리와 origin에도 자기 저장소 쪽에만 있음
+하나라도 어긋나면 exit 1.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import fake_openai
+from bench.async_load import make_repo
+
+ALLOWED = ("static/blobs/", "static/generated/", "static/preview/", "logs/")
+
+
+def walk(root):
+    """.git을 뺀 모든 파일의 저장소 기준 경로 집합"""
+    files = set()
+    for directory, dirs, names in os.walk(root):
+        dirs[:] = [name for name in dirs if name != ".git"]
+        for name in names:
+            files.add(os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/"))
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=60, help="저장소당 동시 /generate 수")
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server, fake, base_url = fake_openai.start(latency=args.latency)
+    first = make_repo(tempfile.mkdtemp(prefix="orrne-bench-"))
+    second = make_repo(tempfile.mkdtemp(prefix="orrne-bench-"))
+    # 앱을 import 하기 전에 저장소/모델 주소를 지정
+    os.environ["ORRNE_REPO_DIR"] = first
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    import app as flask_app
+    from generate.workspace import get_workspace
+
+    workspaces = {"first": get_workspace(first), "second": get_workspace(second)}
+    before = {name: walk(workspace.root) for name, workspace in workspaces.items()}
+    # 상대 경로가 cwd 기준으로 풀리면 이 디렉토리에 파일이 생김
+    decoy = tempfile.mkdtemp(prefix="orrne-cwd-")
+    os.chdir(decoy)
+
+    client = flask_app.app.test_client()
+
+    def via_client(i):
+        response = client.post("/generate", json={"prompt": f"first {i}", "no_cache": True})
+        return "first", response.status_code, response.get_json()
+
+    def via_function(i):
+        body, status_code = flask_app.generate_page(workspaces["second"], f"second {i}", use_cache=False)
+        return "second", status_code, body
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.requests * 2) as pool:
+        futures = [pool.submit(via_client, i) for i in range(args.requests)] + \
+                  [pool.submit(via_function, i) for i in range(args.requests)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    problems = []
+    failed = [(name, status, body) for name, status, body in results if status != 200]
+    problems += [f"{name}: HTTP {status} {body.get('error') or body.get('message')}" for name, status, body in failed]
+
+    stray = walk(decoy)
+    problems += [f"cwd에 생긴 파일: {path}" for path in sorted(stray)]
+
+    for name, workspace in workspaces.items():
+        new_files = walk(workspace.root) - before[name]
+        problems += [f"{name}: 예상 밖 위치 {path}" for path in sorted(new_files) if not path.startswith(ALLOWED)]
+
+    # 페이지별 blob이 자기 저장소에만, 커밋/푸시도 자기 쪽에만 있는지
+    from generate.blobstore import get_blobstore
+    trees = {name: set(workspace.git("ls-tree", "-r", "--name-only", "HEAD").stdout.split())
+             for name, workspace in workspaces.items()}
+    origins = {name: set(workspace.git("ls-tree", "-r", "--name-only", f"{workspace.remote}/{workspace.branch}")
+                         .stdout.split())
+               for name, workspace in workspaces.items()}
+    for name, status, body in results:
+        if status != 200 or not body.get("page_id"):
+            continue
+        other = "second" if name == "first" else "first"
+        path = get_blobstore(workspaces[name]).resolve(body["page_id"])
+        if path is None or not path.startswith(workspaces[name].root + os.sep):
+            problems.append(f"{name}: {body['page_id']} blob이 자기 저장소에 없음 ({path})")
+            continue
+        relative = workspaces[name].relpath(path)
+        if get_blobstore(workspaces[other]).resolve(body["page_id"]) is not None:
+            problems.append(f"{name}: {body['page_id']} 이 {other} 저장소에서도 조회됨")
+        if relative not in trees[name] or relative not in origins[name]:
+            problems.append(f"{name}: {relative} 커밋/푸시 누락")
+        if relative in trees[other]:
+            problems.append(f"{name}: {relative} 이 {other} 저장소에 커밋됨")
+
+    print(json.dumps({
+        "requests": args.requests * 2,
+        "elapsed_s": round(elapsed, 2),
+        "failed": len(failed),
+        "max_upstream_in_flight": fake.max_in_flight,
+        "problems": problems[:50],
+        "repos": [first, second],
+    }, indent=2, ensure_ascii=False))
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+import threading
+from generate.workspace import get_workspace
+from generate.http_cache import write_compressed_variants
+from generate.publish import atomic_write
+from generate.metrics import timed
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_blobstore(workspace=None):
+    workspace = workspace or get_workspace()
+    with _stores_lock:
+        store = _stores.get(workspace)
+        if store is None:
+            store = BlobStore(workspace)
+            _stores[workspace] = store
+        return store
+
+
+def content_hash(html):
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """HTML을 내용 해시(sha256)로 한 번만 저장하고, uuid/커밋 해시는 별칭으로 연결한다.
+
+    static/blobs/<sha256>.html      — 실제 내용 (git에 커밋되는 파일)
+    static/generated/<uuid>.html    — blob을 가리키는 심볼릭 링크 (함께 커밋되어 clone/배포에서도 uuid로 찾을 수 있음)
+    logs/aliases.jsonl              — {"name": uuid 또는 커밋 해시, "blob": sha256} 추가 전용 기록 (조회용 캐시)
+
+    예전 static/generated, static/preview 파일은 처음 한 번 디렉토리 목록만 읽어
+    같은 인덱스에 경로로 등록한다. (복사/내용 읽기 없음)
+    """
+
+    def __init__(self, workspace):
+        self.workspace = workspace
+        self.blob_dir = workspace.path("static", "blobs")
+        self.alias_file = workspace.log_path("aliases.jsonl")
+        self._index = None
+        self._alias_offset = 0
+        self._alias_inode = None
+        self._lock = threading.Lock()
+
+    def blob_path(self, sha):
+        return os.path.join(self.blob_dir, f"{sha}.html")
+
+    @timed("blob_write")
+    def put(self, html, aliases=()):
+        """내용을 저장하고(이미 있으면 생략) 별칭을 연결한다. sha256을 반환."""
+        sha = content_hash(html)
+        path = self.blob_path(sha)
+
+        try:
+            # 이미 있으면 쓰지 않고 mtime만 갱신 — 새 이름이 로그에 남기 전까지 GC 유예 시간(grace)으로 보호
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(self.blob_dir, exist_ok=True)
+            data = html.encode("utf-8")
+            # 압축본을 먼저 만들어 두고 원본을 마지막에 rename (원본이 보이면 압축본도 있음)
+            write_compressed_variants(path, data)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        for name in aliases:
+            self.add_alias(name, sha)
+        return sha
+
+    def put_linked(self, html, name):
+        """put + link: 내용을 저장하고 name 별칭과 링크를 만든다. (sha256, 링크 경로)를 반환.
+
+        이미 있는 blob이면 쓰지 않고 연결만 하므로, GC(retention.collect)가 그 blob을 보관/삭제하는
+        도중이면 끊긴 링크가 된다. GC와 같은 gc_lock 안에서 해서 GC 앞이나 뒤에만 연결되게 한다.
+        (뒤의 GC는 put이 갱신한 mtime 때문에 유예 시간 동안 이 blob을 남긴다)
+        """
+        with self.workspace.gc_lock:
+            sha = self.put(html, aliases=[name])
+            return sha, self.link(name, sha)
+
+    def link(self, name, sha):
+        """static/generated/<name>.html → ../blobs/<sha>.html 심볼릭 링크를 만들고 경로를 반환한다.
+
+        uuid → 내용 연결을 git 트리에 남기는 용도 (링크는 파일 하나보다 작은 blob으로 커밋됨)
+        """
+        path = self.workspace.path("static", "generated", f"{name}.html")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        os.symlink(os.path.relpath(self.blob_path(sha), os.path.dirname(path)), tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def add_alias(self, name, sha):
+        self._ensure_index()
+        line = json.dumps({"name": name, "blob": sha}) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.alias_file), exist_ok=True)
+            with open(self.alias_file, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._index[name] = self.blob_path(sha)
+
+    def resolve(self, name):
+        """uuid/커밋 해시/sha256에 해당하는 파일 경로. 없으면 None."""
+        self._ensure_index()
+        path = self._index.get(name)
+        if path is None:
+            # 다른 프로세스가 추가한 별칭이 있을 수 있으니 새 줄만 다시 읽음
+            with self._lock:
+                self._load_aliases()
+            path = self._index.get(name)
+        if path is None and len(name) == 64 and os.path.exists(self.blob_path(name)):
+            path = self.blob_path(name)
+        if path is None:
+            # pull/배포로 들어온 링크 (별칭 기록은 저장소에 없음)
+            link = self.workspace.path("static", "generated", f"{name}.html")
+            if os.path.islink(link):
+                path = os.path.normpath(os.path.join(os.path.dirname(link), os.readlink(link)))
+                with self._lock:
+                    self._index[name] = path
+        return path
+
+    def blob_of(self, name):
+        """이름이 가리키는 blob의 sha256. 예전 경로 파일이면 None."""
+        path = self.resolve(name)
+        if path and os.path.dirname(path) == self.blob_dir:
+            return os.path.basename(path)[:-len(".html")]
+        return None
+
+    @timed("blob_read")
+    def read(self, name):
+        path = self.resolve(name)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None  # 다른 프로세스의 GC가 보관한 파일
+
+    def names(self):
+        """{이름: 파일 경로} 전체 (별칭 + 예전 파일). GC의 도달성 계산용 사본."""
+        self._ensure_index()
+        with self._lock:
+            self._load_aliases()
+            return dict(self._index)
+
+    def remove(self, paths):
+        """GC가 보관하고 지운 파일을 인덱스에서 빼고, 별칭 기록을 남은 별칭만으로 다시 쓴다.
+
+        별칭 기록은 이름마다 마지막 줄만 남기므로 같은 이름이 여러 번 쓰인 기록도 함께 줄어든다.
+        뺀 별칭 수를 반환.
+        """
+        removed = set(paths)
+        self._ensure_index()
+        with self._lock:
+            aliases = {}
+            if os.path.exists(self.alias_file):
+                with open(self.alias_file, "rb") as f:
+                    for line in f:
+                        if line.endswith(b"\n"):
+                            alias = json.loads(line)
+                            aliases[alias["name"]] = alias["blob"]
+            kept = {name: sha for name, sha in aliases.items() if self.blob_path(sha) not in removed}
+            atomic_write(self.alias_file, "".join(
+                json.dumps({"name": name, "blob": sha}) + "\n" for name, sha in kept.items()
+            ))
+
+            # 예전 파일 목록도 다시 읽어 인덱스를 새로 만듦
+            self._index = self._legacy_files()
+            self._alias_offset = 0
+            self._alias_inode = None
+            self._load_aliases()
+        return len(aliases) - len(kept)
+
+    def import_legacy(self, remove=False):
+        """예전 generated/preview 파일을 blob으로 옮긴다. 같은 내용은 하나로 합쳐진다."""
+        imported = 0
+        for name, path in list(self._legacy_files().items()):
+            if os.path.dirname(path) == self.blob_dir:
+                continue  # 이미 blob을 가리키는 링크
+            with open(path, "r", encoding="utf-8") as f:
+                self.put(f.read(), aliases=[name])
+            imported += 1
+        if remove:
+            for directory in ("generated", "preview"):
+                for entry in os.scandir(self.workspace.path("static", directory)):
+                    if entry.name.endswith(".html") and not entry.is_symlink():
+                        os.remove(entry.path)
+        return imported
+
+    def _ensure_index(self):
+        if self._index is not None:
+            return
+        with self._lock:
+            if self._index is None:
+                self._index = self._legacy_files()
+                self._load_aliases()
+
+    def _legacy_files(self):
+        # preview → generated 순으로 덮어써서 generated가 우선 (기존 revise/approve 동작과 동일)
+        files = {}
+        for directory in ("preview", "generated"):
+            path = self.workspace.path("static", directory)
+            if not os.path.isdir(path):
+                continue
+            for entry in os.scandir(path):
+                if not entry.name.endswith(".html"):
+                    continue
+                if entry.is_symlink():
+                    # blob을 가리키는 링크는 blob 경로로 (별칭 기록이 없는 새 clone에서도 같은 인덱스가 되도록)
+                    files[entry.name[:-len(".html")]] = os.path.normpath(os.path.join(path, os.readlink(entry.path)))
+                else:
+                    files[entry.name[:-len(".html")]] = entry.path
+        return files
+
+    def _load_aliases(self):
+        if self._index is None:
+            self._index = {}
+        if not os.path.exists(self.alias_file):
+            return
+        with open(self.alias_file, "rb") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self._alias_inode:
+                if self._alias_inode is not None:
+                    # 다른 프로세스의 GC가 기록을 다시 썼으면 처음부터 다시 읽음
+                    self._index = self._legacy_files()
+                self._alias_inode = inode
+                self._alias_offset = 0
+            f.seek(self._alias_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 다른 프로세스가 쓰는 중인 줄
+                alias = json.loads(line)
+                self._index[alias["name"]] = self.blob_path(alias["blob"])
+                self._alias_offset += len(line)
+
+
+if __name__ == "__main__":
+    # python -m generate.blobstore [--remove]
+    logging.basicConfig(level=logging.INFO)
+    count = get_blobstore().import_legacy(remove="--remove" in sys.argv)
+    logging.info(f"[blobstore] 예전 HTML {count}개를 blob으로 가져옴")
@@ -0,0 +1,118 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from generate.workspace import get_workspace
+from generate.metrics import timed
+
+
+# 보관할 최대 응답 수 (넘으면 가장 오래 안 쓴 것부터 제거)
+PROMPT_CACHE_SIZE = int(os.getenv("PROMPT_CACHE_SIZE", "1000"))
+# 응답 유효 시간(초). 0이면 만료 없음
+PROMPT_CACHE_TTL = float(os.getenv("PROMPT_CACHE_TTL", "0"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    html TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def normalize_prompt(prompt):
+    """공백/유니코드 표기 차이만 있는 프롬프트를 같은 키로 모은다."""
+    prompt = unicodedata.normalize("NFC", prompt)
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def cache_key(prompt, model, params=None):
+    payload = json.dumps(
+        {"prompt": normalize_prompt(prompt), "model": model, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@timed("cache_lookup")
+def get_cached(key, workspace=None):
+    """캐시된 HTML을 반환한다. 없거나 만료됐으면 None."""
+    conn = _connect(workspace)
+    now = time.time()
+    row = conn.execute("SELECT html, created FROM responses WHERE key = ?", (key,)).fetchone()
+
+    if row and PROMPT_CACHE_TTL and now - row[1] > PROMPT_CACHE_TTL:
+        with conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        row = None
+
+    if row is None:
+        _count("misses")
+        return None
+
+    with conn:
+        conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+    _count("hits")
+    return row[0]
+
+
+@timed("cache_store")
+def put_cached(key, html, workspace=None):
+    conn = _connect(workspace)
+    now = time.time()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, html, created, last_used) VALUES (?, ?, ?, ?)",
+            (key, html, now, now)
+        )
+        # LRU 제거
+        overflow = conn.execute("SELECT count(*) FROM responses").fetchone()[0] - PROMPT_CACHE_SIZE
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (overflow,)
+            )
+
+
+def cache_stats(workspace=None):
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["size"] = _connect(workspace).execute("SELECT count(*) FROM responses").fetchone()[0]
+    stats["max_size"] = PROMPT_CACHE_SIZE
+    stats["ttl"] = PROMPT_CACHE_TTL
+    return stats
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _connect(workspace=None):
+    workspace = workspace or get_workspace()
+    db_path = workspace.log_path("prompt_cache.db")
+
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
@@ -0,0 +1,150 @@
+import os
+import time
+import queue
+import logging
+import threading
+
+from generate.git_handler import git_commit_files, write_commit_preview
+from generate.workspace import get_workspace
+from generate import metrics
+
+
+# 첫 요청이 들어온 뒤 이 시간(초) 동안 들어온 파일을 하나의 커밋으로 묶는다
+GIT_BATCH_WINDOW = float(os.getenv("GIT_BATCH_WINDOW", "0.2"))
+# 한 커밋에 담을 최대 파일 수
+GIT_BATCH_MAX_FILES = int(os.getenv("GIT_BATCH_MAX_FILES", "50"))
+
+_committers = {}
+_committers_lock = threading.Lock()
+
+
+class _PendingFile:
+    def __init__(self, file_path, html_code, commit_message, write_preview, on_done=None, links=()):
+        self.file_path = file_path
+        self.links = links
+        self.html_code = html_code
+        self.commit_message = commit_message
+        self.write_preview = write_preview
+        self.on_done = on_done
+        self.done = threading.Event()
+        self.result = None
+
+
+def commit_file(file_path, html_code, commit_message, write_preview=True, timeout=None, workspace=None,
+                wait=True, on_done=None, links=()):
+    """파일을 배치 커밋 대기열에 넣고, 그 파일이 포함된 커밋 결과를 기다려 반환한다.
+
+    반환값은 git_commit_files와 같은 형태의 dict이며 batch_size가 추가된다.
+    html_code: 문자열 또는 커밋 직전에 호출해 내용을 얻는 함수
+    links: 같은 커밋에 넣을 심볼릭 링크 경로 (이미 만들어 둔 것, 예: uuid → blob)
+    wait=False: 기다리지 않고 None을 반환. 결과는 on_done(result)로 커미터 스레드에서 받는다.
+    """
+    workspace = workspace or get_workspace()
+    pending = _PendingFile(file_path, html_code, commit_message, write_preview, on_done, links)
+    _get_committer(workspace).put(pending)
+    if not wait:
+        return None
+
+    with metrics.timer("commit_wait"):
+        finished = pending.done.wait(timeout)
+    if not finished:
+        return {
+            "success": False,
+            "message": "Git batch commit timed out",
+            "error": f"no result within {timeout}s"
+        }
+    # 커미터 스레드에서 잰 git 단계별 시간을 이 요청의 타이밍 내역에 합침
+    metrics.record_all(pending.result.get("timings"))
+    return pending.result
+
+
+def _get_committer(workspace):
+    with _committers_lock:
+        committer = _committers.get(workspace)
+        if committer is None:
+            committer = _Committer(workspace)
+            _committers[workspace] = committer
+        return committer
+
+
+class _Committer:
+    """저장소 하나를 담당하는 배치 커밋 스레드."""
+
+    def __init__(self, workspace):
+        self.workspace = workspace
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def put(self, pending):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="git-committer", daemon=True)
+                self.thread.start()
+        self.queue.put(pending)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+
+            # 윈도우 동안 추가로 들어온 파일 수집
+            deadline = time.monotonic() + GIT_BATCH_WINDOW
+            while len(batch) < GIT_BATCH_MAX_FILES:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self.queue.get(timeout=remaining))
+                    else:
+                        batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._commit_batch(batch)
+            except Exception as e:
+                logging.exception("[committer] 배치 커밋 실패")
+                for pending in batch:
+                    pending.result = {
+                        "success": False,
+                        "error": str(e),
+                        "message": "HTML generated but Git push failed"
+                    }
+            self._finish(batch)
+
+    def _finish(self, batch):
+        # on_done을 먼저 부르고 나서 깨우므로, 기다리던 요청은 후처리(배포 기록 등)가 끝난 상태를 본다.
+        # 대기열 순서대로 호출되어 승인/롤백 기록도 들어온 순서대로 채워진다.
+        for pending in batch:
+            if pending.on_done is not None:
+                try:
+                    pending.on_done(pending.result)
+                except Exception:
+                    logging.exception("[committer] 커밋 후 처리 실패")
+            pending.done.set()
+
+    def _commit_batch(self, batch):
+        # 같은 파일이 여러 번 들어오면 마지막 내용만 커밋
+        files, links = {}, {}
+        for pending in batch:
+            if callable(pending.html_code):
+                pending.html_code = pending.html_code()
+            files[pending.file_path] = pending.html_code
+            links.update(dict.fromkeys(pending.links))
+
+        if len(batch) == 1:
+            commit_message = batch[0].commit_message
+        else:
+            commit_message = f"batch: {len(batch)} files\n\n" + "\n".join(
+                f"- {pending.commit_message}" for pending in batch
+            )
+
+        metrics.observe("orrne_commit_batch_files", len(files))
+        result = git_commit_files(list(files.items()), commit_message, workspace=self.workspace, links=list(links))
+        logging.info(f"[committer] {len(batch)} files → {result.get('commit_id') or result.get('message')}")
+
+        # 커밋 해시 기준 프리뷰는 파일이 하나일 때만 의미가 있음
+        if result.get("commit_id") and len(batch) == 1 and batch[0].write_preview:
+            write_commit_preview(result["commit_id"], batch[0].html_code, workspace=self.workspace)
+
+        for pending in batch:
+            pending.result = dict(result, batch_size=len(batch))
@@ -0,0 +1,176 @@
+import os
+import sys
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from generate.workspace import get_workspace
+from generate.blobstore import get_blobstore
+
+
+# 배포(승인/롤백)될 때마다 live index.html의 내용 해시를 한 줄씩 쌓는다.
+# 내용은 blob 저장소에 있으므로 롤백은 인덱스 조회 + 커밋 한 번으로 끝난다.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deploys (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    page_id TEXT,
+    blob TEXT NOT NULL,
+    deploy_commit TEXT,
+    rollback_of INTEGER
+);
+CREATE INDEX IF NOT EXISTS deploys_page_id ON deploys (page_id);
+CREATE INDEX IF NOT EXISTS deploys_deploy_commit ON deploys (deploy_commit);
+"""
+
+_COLUMNS = ("seq", "timestamp", "kind", "page_id", "blob", "deploy_commit", "rollback_of")
+
+_local = threading.local()
+
+
+def record_deploy(kind, blob, deploy_commit, page_id=None, rollback_of=None, workspace=None):
+    """kind: "approve" | "rollback" | "import"  — 기록된 항목 dict를 반환
+
+    deploy_commit은 아직 커밋되지 않았으면 None (set_deploy_commit으로 나중에 채움)
+    """
+    entry = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "kind": kind,
+        "page_id": page_id,
+        "blob": blob,
+        "deploy_commit": deploy_commit,
+        "rollback_of": rollback_of,
+    }
+    conn = _connect(workspace)
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO deploys (timestamp, kind, page_id, blob, deploy_commit, rollback_of) "
+            "VALUES (:timestamp, :kind, :page_id, :blob, :deploy_commit, :rollback_of)",
+            entry
+        )
+    entry["seq"] = cursor.lastrowid
+    return entry
+
+
+def set_deploy_commit(seq, deploy_commit, workspace=None):
+    """백그라운드 커밋이 끝난 뒤 배포 항목에 커밋 해시를 채운다."""
+    conn = _connect(workspace)
+    with conn:
+        conn.execute("UPDATE deploys SET deploy_commit = ? WHERE seq = ?", (deploy_commit, seq))
+
+
+def current_deploy(workspace=None):
+    return previous_deploy(0, workspace=workspace)
+
+
+def previous_deploy(steps, workspace=None):
+    """현재 배포(steps=0)에서 steps번 전의 배포 항목. 없으면 None."""
+    row = _connect(workspace).execute(
+        f"SELECT {', '.join(_COLUMNS)} FROM deploys ORDER BY seq DESC LIMIT 1 OFFSET ?",
+        (steps,)
+    ).fetchone()
+    return dict(zip(_COLUMNS, row)) if row else None
+
+
+def find_deploy(name, workspace=None):
+    """배포 커밋 해시 또는 페이지 id로 가장 최근 배포 항목을 찾는다."""
+    row = _connect(workspace).execute(
+        f"SELECT {', '.join(_COLUMNS)} FROM deploys WHERE deploy_commit = ? OR page_id = ? "
+        "ORDER BY seq DESC LIMIT 1",
+        (name, name)
+    ).fetchone()
+    return dict(zip(_COLUMNS, row)) if row else None
+
+
+def deploys_of(page_ids, workspace=None):
+    """페이지 id별 배포 항목 목록 {page_id: [항목, ...]} (오래된 순)"""
+    page_ids = list(page_ids)
+    if not page_ids:
+        return {}
+    rows = _connect(workspace).execute(
+        f"SELECT {', '.join(_COLUMNS)} FROM deploys WHERE page_id IN ({', '.join('?' * len(page_ids))}) "
+        "ORDER BY seq",
+        page_ids
+    ).fetchall()
+    result = {}
+    for row in rows:
+        entry = dict(zip(_COLUMNS, row))
+        result.setdefault(entry["page_id"], []).append(entry)
+    return result
+
+
+def deployed(workspace=None):
+    """지금까지 배포된 적 있는 (blob 집합, 페이지 id 집합) — 승인본 보존(GC)용"""
+    blobs, page_ids = set(), set()
+    for blob, page_id in _connect(workspace).execute("SELECT blob, page_id FROM deploys"):
+        blobs.add(blob)
+        if page_id:
+            page_ids.add(page_id)
+    return blobs, page_ids
+
+
+def deploy_history(limit=20, workspace=None):
+    rows = _connect(workspace).execute(
+        f"SELECT {', '.join(_COLUMNS)} FROM deploys ORDER BY seq DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [dict(zip(_COLUMNS, row)) for row in rows]
+
+
+def import_git_history(workspace=None):
+    """기록이 없던 시절의 배포를 git log에서 한 번만 가져온다. 가져온 수를 반환."""
+    workspace = workspace or get_workspace()
+    if current_deploy(workspace) is not None:
+        return 0
+
+    index_path = workspace.relpath(workspace.index_path())
+    commits = workspace.git("log", "--reverse", "--format=%H", "--", index_path).stdout.split()
+    if not commits:
+        return 0
+
+    # cat-file --batch 한 번으로 모든 버전 내용을 읽음
+    request = "".join(f"{commit}:{index_path}\n" for commit in commits)
+    output = workspace.git_bytes("cat-file", "--batch", input=request.encode())
+
+    store = get_blobstore(workspace)
+    position = 0
+    imported = 0
+    for commit in commits:
+        header_end = output.index(b"\n", position)
+        header = output[position:header_end].split()
+        position = header_end + 1
+        if header[-1] == b"missing":
+            continue
+        size = int(header[2])
+        html = output[position:position + size].decode("utf-8", errors="replace")
+        position += size + 1
+        record_deploy("import", store.put(html), commit, workspace=workspace)
+        imported += 1
+    return imported
+
+
+def _connect(workspace=None):
+    workspace = workspace or get_workspace()
+    db_path = workspace.log_path("deploys.db")
+
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+if __name__ == "__main__":
+    # python -m generate.deploys  — git log에 있는 예전 배포 기록 가져오기
+    logging.basicConfig(level=logging.INFO)
+    count = import_git_history()
+    logging.info(f"[deploys] 예전 배포 {count}개를 가져옴")
+    for entry in deploy_history(limit=int(sys.argv[1]) if len(sys.argv) > 1 else 5):
+        logging.info(f"[deploys] {entry['seq']} {entry['kind']} {entry['deploy_commit']} {entry['blob'][:12]}")
@@ -0,0 +1,180 @@
+import re
+from generate.metrics import timed
+
+
+# 조각 경계에 걸친 표시(```html, <!doctype html 등)를 놓치지 않도록 다음 조각과 이어서 보는 길이
+_CARRY = 32
+# 스트리밍 중에는 이만큼(문자) 쌓일 때마다 훑는다 — 토큰 조각마다 정규식을 돌리지 않도록
+_SCAN_SIZE = 8192
+
+# 문서 밖/안에서 찾는 표시. 태그는 이름까지만 보므로 속성이 길어도 조각 경계와 상관없다.
+# (이름 있는 그룹이나 대안이 많아지면 정규식 엔진이 눈에 띄게 느려져서 그룹 번호로 구분)
+#   1: ```뒤의 html  2: 닫는 태그의 /  3: 태그 이름
+_EVENTS = re.compile(
+    r"```(html)?|<(/?)(html|head|body|script|style)(?=[\s/>])|<!--|<!doctype\s{1,8}html",
+    re.IGNORECASE
+)
+# <script>/<style>/주석 안에서는 끝 표시(와 코드 블록 경계)만 찾는다
+_RAW_END = {
+    name: re.compile(r"```(html)?|" + end, re.IGNORECASE)
+    for name, end in (("script", r"</script(?=[\s>])"), ("style", r"</style(?=[\s>])"), ("comment", r"-->"))
+}
+_CHECKED = ("html", "head", "body")
+
+
+class HtmlExtractor:
+    """LLM 응답에서 HTML 문서를 한 번의 순회로 꺼내고 검사한다.
+
+    조각이 도착하는 대로 feed()에 넘기면 코드 블록 경계와 html/head/body 태그 균형을 바로 추적하고,
+    finish()에서 문서 부분만 한 번 이어 붙인다. 규칙은 예전 정규식과 같다:
+    ```html 블록이 있으면 그 안, 없으면 <!DOCTYPE html> 또는 <html>부터 끝까지.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._length = 0
+        # 아직 훑지 않은 부분: 이전에 훑은 끝 부분(_CARRY자 이내) + _chunks[_scan_index:]
+        self._pending = ""
+        self._pending_at = 0
+        self._scan_index = 0
+        self._scanned_to = 0
+
+        self._fence_start = None
+        self._fence_end = None
+        self._doc_start = None
+        self._raw = None
+        self._counts = {name: [0, 0] for name in _CHECKED}
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        if self._length - self._scanned_to >= _SCAN_SIZE and self._fence_end is None:
+            self._scan(final=False)
+
+    def finish(self):
+        """(html_code, 에러 메시지)를 반환."""
+        if self._fence_end is None:
+            self._scan(final=True)
+
+        if self._fence_start is not None:
+            # 닫는 ``` 만 빠진 경우는 아래 태그 균형 검사로 잘림 여부를 판단
+            start, end = self._fence_start, self._fence_end or self._length
+        elif self._doc_start is not None:
+            start, end = self._doc_start, self._length
+        else:
+            return None, "OpenAI 응답에서 HTML 코드를 찾을 수 없습니다."
+
+        error = self._check()
+        if error:
+            return None, error
+        return self._slice(start, end).strip(), None
+
+    def _scan(self, final):
+        # 훑은 조각들은 하나로 합쳐 둠 (finish에서 토큰 조각 수만큼 돌지 않도록)
+        block = "".join(self._chunks[self._scan_index:])
+        self._chunks[self._scan_index:] = [block] if block else []
+        self._scan_index = len(self._chunks)
+        text = self._pending + block
+        self._scanned_to = self._length
+        if not text:
+            return
+        base = self._pending_at
+        limit = len(text) if final else len(text) - _CARRY
+
+        position = 0
+        keep = None
+        while self._fence_end is None:
+            pattern = _RAW_END[self._raw] if self._raw else _EVENTS
+            match = pattern.search(text, position)
+            if match is None:
+                break
+            if match.end() > limit:
+                # 다음 조각과 이어서 다시 봐야 하는 표시
+                keep = match.start()
+                break
+            position = match.end()
+            self._event(match, base, text)
+
+        cut = max(position, limit)
+        if keep is not None:
+            cut = min(cut, keep)
+        self._pending = text[cut:]
+        self._pending_at = base + cut
+
+    def _event(self, match, base, text):
+        in_fence = self._fence_start is not None
+        first = text[match.start()]
+
+        if first == "`":
+            if in_fence:
+                self._fence_end = base + match.start()
+            elif match.group(1):
+                # 코드 블록이 있으면 그 앞의 <html>은 설명 문장으로 보고 블록 안만 사용
+                self._fence_start = base + match.end()
+                self._counts = {name: [0, 0] for name in _CHECKED}
+                self._raw = None
+            return
+
+        if self._raw:
+            self._raw = None
+            return
+
+        in_document = in_fence or self._doc_start is not None
+        tag = match.group(3)
+        if tag is None:
+            if text[match.start() + 2] == "-":
+                if in_document:
+                    self._raw = "comment"
+            elif not in_document:
+                self._doc_start = base + match.start()
+            return
+
+        tag = tag.lower()
+        closing = bool(match.group(2))
+        if tag in ("script", "style"):
+            if in_document and not closing:
+                self._raw = tag
+            return
+        if not in_document:
+            if tag != "html" or closing:
+                return
+            self._doc_start = base + match.start()
+        self._counts[tag][closing] += 1
+
+    def _check(self):
+        if self._raw == "comment":
+            return "OpenAI 응답이 잘렸습니다. (주석이 닫히지 않음)"
+        if self._raw is not None:
+            return f"OpenAI 응답이 잘렸습니다. (</{self._raw}> 없음)"
+        if self._counts["html"][0] == 0:
+            return "OpenAI 응답이 HTML 형식이 아닙니다."
+        for tag in _CHECKED:
+            opened, closed = self._counts[tag]
+            if closed < opened:
+                return f"OpenAI 응답이 잘렸습니다. (</{tag}> 없음)"
+            if closed > opened:
+                return f"HTML 구조가 올바르지 않습니다. (<{tag}> 없이 </{tag}>)"
+        return None
+
+    def _slice(self, start, end):
+        # 문서에 해당하는 조각만 골라 한 번에 이어 붙임
+        parts = []
+        offset = 0
+        for chunk in self._chunks:
+            chunk_end = offset + len(chunk)
+            if chunk_end > start and offset < end:
+                parts.append(chunk[max(0, start - offset):end - offset])
+            if chunk_end >= end:
+                break
+            offset = chunk_end
+        return "".join(parts)
+
+
+@timed("extract_html")
+def extract_html(raw_response):
+    """LLM 응답에서 HTML 문서를 꺼낸다. (html_code, 에러 메시지)를 반환."""
+    extractor = HtmlExtractor()
+    extractor.feed(raw_response)
+    return extractor.finish()
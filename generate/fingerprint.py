@@ -0,0 +1,257 @@
+import os
+import re
+import sys
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import Counter
+from generate.workspace import get_workspace
+from generate.metrics import timed
+
+
+# 이 거리(다른 비트 수) 이하이면 거의 같은 페이지로 본다. 밴드 인덱스가 3까지는 빠짐없이 찾는다.
+NEAR_DUPLICATE_DISTANCE = int(os.getenv("NEAR_DUPLICATE_DISTANCE", "3"))
+# 1이면 거의 같은 페이지는 커밋하지 않고 기존 페이지를 돌려줌 (기본은 표시만)
+SKIP_NEAR_DUPLICATES = os.getenv("SKIP_NEAR_DUPLICATES", "0") == "1"
+# 서명이 이 수 이하이면 /similar 이 밴드 대신 전체를 훑어 먼 페이지까지 찾는다 (그보다 많으면 ?exhaustive=1 일 때만)
+SIMILAR_SCAN_MAX = int(os.getenv("SIMILAR_SCAN_MAX", "2000"))
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+_MASK = (1 << BITS) - 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    page_id TEXT PRIMARY KEY,
+    simhash INTEGER NOT NULL,
+    band0 INTEGER NOT NULL,
+    band1 INTEGER NOT NULL,
+    band2 INTEGER NOT NULL,
+    band3 INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_band0 ON fingerprints (band0);
+CREATE INDEX IF NOT EXISTS fingerprints_band1 ON fingerprints (band1);
+CREATE INDEX IF NOT EXISTS fingerprints_band2 ON fingerprints (band2);
+CREATE INDEX IF NOT EXISTS fingerprints_band3 ON fingerprints (band3);
+"""
+
+# normalize_html과 같이 <meta>/<style>(그리고 <script>, 주석)은 비교에서 제외
+_IGNORED = re.compile(
+    r"<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>|<meta\b[^>]*>",
+    flags=re.DOTALL | re.IGNORECASE
+)
+_TOKENS = re.compile(r"<(/?)([a-zA-Z][\w:-]*)[^>]*>|([^<]+)")
+_WORDS = re.compile(r"\w+")
+
+# 바이트 값 → 각 비트를 32비트 칸에 하나씩 펼친 정수 (비트별 개수를 한 번의 덧셈으로 누적)
+_SPREAD = [sum(1 << (32 * bit) for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+_local = threading.local()
+
+
+def shingles(html, tag_size=4, word_size=3):
+    """태그 순서와 본문 단어를 각각 n-gram으로 묶은 토큰 빈도."""
+    tags, words = [], []
+    for closing, tag, text in _TOKENS.findall(_IGNORED.sub(" ", html)):
+        if tag:
+            tags.append(closing + tag.lower())
+        else:
+            words.extend(_WORDS.findall(text.lower()))
+
+    counts = Counter()
+    for prefix, seq, size in (("t:", tags, tag_size), ("w:", words, word_size)):
+        if len(seq) < size:
+            if seq:
+                counts[prefix + " ".join(seq)] += 1
+            continue
+        for i in range(len(seq) - size + 1):
+            counts[prefix + " ".join(seq[i:i + size])] += 1
+    return counts
+
+
+def fingerprint(html):
+    """HTML 구조+텍스트의 64비트 simhash. 파싱 트리 없이 정규식 한 번으로 계산한다."""
+    counts = shingles(html)
+    if not counts:
+        return 0
+
+    total = 0
+    for shingle, weight in counts.items():
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        spread = 0
+        for position, value in enumerate(digest):
+            spread |= _SPREAD[value] << (256 * position)
+        total += spread * weight
+
+    half = sum(counts.values()) / 2
+    simhash = 0
+    for bit in range(BITS):
+        if (total >> (32 * bit)) & 0xFFFFFFFF > half:
+            simhash |= 1 << bit
+    return simhash
+
+
+def distance(a, b):
+    return bin((a ^ b) & _MASK).count("1")
+
+
+def get_fingerprints(workspace=None):
+    return FingerprintIndex(workspace or get_workspace())
+
+
+@timed("fingerprint")
+def check_near_duplicate(html, workspace=None, exclude=None):
+    """(simhash, 가장 가까운 기존 페이지 또는 None)을 반환한다."""
+    simhash = fingerprint(html)
+    matches = get_fingerprints(workspace).nearest(simhash, limit=1, exclude=exclude)
+    return simhash, (matches[0] if matches else None)
+
+
+class FingerprintIndex:
+    """페이지별 simhash를 logs/fingerprints.db에 보관한다.
+
+    64비트를 16비트씩 네 밴드로 나눠 각각 인덱싱하므로, 거리 3 이하인 페이지는
+    적어도 한 밴드가 정확히 같아 인덱스 조회만으로 후보를 좁힐 수 있다. (옛 HTML 재파싱 없음)
+    """
+
+    def __init__(self, workspace):
+        self.workspace = workspace
+
+    def add(self, page_id, simhash):
+        conn = _connect(self.workspace)
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fingerprints "
+                "(page_id, simhash, band0, band1, band2, band3, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (page_id, _signed(simhash), *_bands(simhash), time.time())
+            )
+
+    def get(self, page_id):
+        row = _connect(self.workspace).execute(
+            "SELECT simhash FROM fingerprints WHERE page_id = ?", (page_id,)
+        ).fetchone()
+        return row[0] & _MASK if row else None
+
+    def size(self):
+        """저장된 서명 수의 상한 (rowid 최댓값 — 테이블을 세지 않음)"""
+        return _connect(self.workspace).execute("SELECT max(rowid) FROM fingerprints").fetchone()[0] or 0
+
+    def nearest(self, simhash, limit=5, max_distance=NEAR_DUPLICATE_DISTANCE, exclude=None, exhaustive=False):
+        """가까운 순으로 [{"page_id", "distance", "created"}, ...]
+
+        exhaustive: 밴드가 보장하는 거리(3)보다 먼 페이지까지 찾을 때 전체를 훑는다.
+        """
+        conn = _connect(self.workspace)
+        if exhaustive:
+            rows = conn.execute("SELECT page_id, simhash, created FROM fingerprints")
+        else:
+            rows = conn.execute(
+                "SELECT page_id, simhash, created FROM fingerprints "
+                "WHERE band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?",
+                _bands(simhash)
+            )
+
+        matches = []
+        for page_id, other, created in rows:
+            if page_id == exclude:
+                continue
+            d = distance(simhash, other)
+            if d <= max_distance:
+                matches.append({"page_id": page_id, "distance": d, "created": created})
+
+        matches.sort(key=lambda m: (m["distance"], -m["created"]))
+        return matches[:limit]
+
+    def backfill(self, pages):
+        """[(page_id, html), ...] 중 아직 없는 페이지만 계산해서 넣는다. 추가한 수를 반환."""
+        conn = _connect(self.workspace)
+        added = 0
+        for page_id, html in pages:
+            if conn.execute("SELECT 1 FROM fingerprints WHERE page_id = ?", (page_id,)).fetchone():
+                continue
+            self.add(page_id, fingerprint(html))
+            added += 1
+        return added
+
+
+def _bands(simhash):
+    mask = (1 << BAND_BITS) - 1
+    return tuple((simhash >> (BAND_BITS * i)) & mask for i in range(BANDS))
+
+
+def _signed(simhash):
+    # SQLite INTEGER는 부호 있는 64비트
+    return simhash - (1 << BITS) if simhash >> (BITS - 1) else simhash
+
+
+def _connect(workspace=None):
+    workspace = workspace or get_workspace()
+    db_path = workspace.log_path("fingerprints.db")
+
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+def _logged_pages(workspace):
+    from generate.logger import read_commits
+    from generate.blobstore import get_blobstore
+
+    store = get_blobstore(workspace)
+    for entry in read_commits(workspace=workspace):
+        page_id = entry.get("page_id") or entry["commit_id"]
+        html = store.read(page_id)
+        if html is not None:
+            yield page_id, html
+
+
+def _bench(workspace, rounds=200):
+    """fingerprint 비교 vs 기존 normalize_html(prettify) 비교 시간."""
+    from generate.git_handler import normalize_html
+
+    pages = [html for _, html in _logged_pages(workspace)][:50]
+    if not pages:
+        body = "".join(f"<section><h2>메뉴 {i}</h2><p>오늘의 추천 요리 {i}번 설명입니다.</p></section>" for i in range(200))
+        pages = [f"<!DOCTYPE html><html><head><style>p{{}}</style></head><body>{body}</body></html>"]
+
+    def per_page(func):
+        start = time.perf_counter()
+        for i in range(rounds):
+            func(pages[i % len(pages)])
+        return (time.perf_counter() - start) / rounds * 1000
+
+    logging.info(f"[fingerprint] pages={len(pages)} avg_bytes={sum(map(len, pages)) // len(pages)}")
+    logging.info(f"[fingerprint] normalize_html: {per_page(normalize_html):.2f} ms/page")
+    logging.info(f"[fingerprint] fingerprint:    {per_page(fingerprint):.2f} ms/page")
+
+    index = get_fingerprints(workspace)
+    probe = fingerprint(pages[0])
+    start = time.perf_counter()
+    for _ in range(rounds):
+        index.nearest(probe)
+    logging.info(f"[fingerprint] nearest (band index): {(time.perf_counter() - start) / rounds * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    # python -m generate.fingerprint          — 로그에 있는 페이지 서명 채우기
+    # python -m generate.fingerprint --bench  — normalize_html과 속도 비교
+    logging.basicConfig(level=logging.INFO)
+    workspace = get_workspace()
+    if "--bench" in sys.argv:
+        _bench(workspace)
+    else:
+        count = get_fingerprints(workspace).backfill(_logged_pages(workspace))
+        logging.info(f"[fingerprint] 페이지 서명 {count}개 추가")
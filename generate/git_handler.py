@@ -2,6 +2,16 @@ import os
 import subprocess
 from datetime import datetime
 from bs4 import BeautifulSoup
+from generate.git_objects import get_writer
+from generate.workspace import get_workspace
+from generate.blobstore import get_blobstore
+from generate.publish import atomic_write
+from generate import metrics
+from generate.metrics import timer
+
+
+# 커밋 방식: "fast-import"(상주 프로세스로 객체 직접 기록) 또는 "cli"(git add/commit)
+GIT_BACKEND = os.getenv("GIT_BACKEND", "fast-import")
 
 
 def normalize_html(html):
@@ -20,128 +30,119 @@ def normalize_html(html):
     return structure.strip(), text_content.strip()
 
 
-def git_commit_and_push(file_path, html_code, commit_message="auto: update index.html", force_commit=False):
-    repo_dir = os.path.expanduser("~/orrne-server-clean")
-    commit_time = datetime.utcnow().isoformat()
-    abs_path = os.path.join(repo_dir, file_path)
-    
-    print("[DEBUG] force_commit =", force_commit)
-    try:
-        # 1.Git 저장소로 이동
-        os.chdir(repo_dir)
-
-
-        # 2. 비교 조건을 force_commit 여부로 완전히 분리해야 함
-        #if force_commit:
-        #    print("[FORCE COMMIT MODE] 강제 커밋 실행 중")
-        #else:
-        #    if os.path.exists(abs_path):
-        #        with open(abs_path, "r") as f:
-        #            existing = f.read()
-
-        #        old_structure, old_text = normalize_html(existing)
-        #        new_structure, new_text = normalize_html(html_code)
-
-        #        print("OLD STRUCTURE:\n", old_structure)
-        #        print("NEW STRUCTURE:\n", new_structure)
-        #        print("OLD TEXT:\n", old_text)
-        #        print("NEW TEXT:\n", new_text)
-
-        #        if old_structure == new_structure and old_text == new_text:
-        #            print("[SKIP COMMIT] 구조 및 텍스트가 동일하여 생략됨")
-        #            subprocess.run(["git", "restore", file_path], check=False)
-        #            return {
-        #                "success": False,
-        #                "skipped": True,
-        #                "message": "HTML 구조가 동일하여 커밋 생략",
-        #                "timestamp": commit_time
-        #            }
-
-
-        # 3. 최신 상태로 Pull
-        #pull_result = subprocess.run(
-        #    ["git", "pull", "--rebase", "origin", "main"],
-        #    capture_output=True,
-        #    text=True
-        #)
-        #if pull_result.returncode != 0:
-        #    return {
-        #        "success": False,
-        #        "message": "Git pull failed",
-        #        "stdout": pull_result.stdout,
-        #        "stderr": pull_result.stderr,
-        #        "timestamp": commit_time
-        #    }
-
-        # 4. 파일 덮어쓰기
-        with open(abs_path, "w") as f:
-            f.write(html_code)
-
-
-        # 5. 변경 사항 있는 경우 Staging Area에 추가
-        subprocess.run(["git", "add", file_path], check=True, capture_output=True, text=True)
-
-        # 6. 변경 사항 확인
-        diff_result = subprocess.run(
-            ["git", "diff", "--cached", "--quiet", file_path],
-            capture_output=True,
-            text=True
-        )
-        if diff_result.returncode == 0:
-            return {
-                "success": False,
-                "skipped": True,
-                "message": "No changes detected in index.html",
-                "timestamp": commit_time
-            }
+def write_commit_preview(commit_hash, html_code, workspace=None):
+    # 커밋 해시로 프리뷰를 조회할 수 있도록 blob 별칭만 추가 (파일 복사 없음)
+    get_blobstore(workspace).put(html_code, aliases=[commit_hash])
+
 
-        # 7. 커밋
-        subprocess.run(["git", "commit", "-m", commit_message], check=True, capture_output=True, text=True)
+def git_commit_files(files, commit_message, workspace=None, removed=(), links=()):
+    """여러 파일을 한 번의 add/commit/push로 반영한다.
 
-        # 8. Push
-        push_result = subprocess.run(
-            ["git", "push", "origin", "main"],
-            capture_output=True,
-            text=True
-        )
+    files: [(file_path, html_code), ...] — file_path는 절대 경로 또는 저장소 기준 상대 경로
+    removed: 트리에서 뺄 경로 (이미 지운 파일, 추적 중인 것만 — GC용)
+    links: 함께 커밋할 심볼릭 링크 경로 (working tree에 이미 있는 것)
+    """
+    workspace = workspace or get_workspace()
+    commit_time = datetime.utcnow().isoformat()
+    files = [(workspace.relpath(file_path), html_code) for file_path, html_code in files]
+    removed = [workspace.relpath(file_path) for file_path in removed]
+    links = [(workspace.relpath(link), os.readlink(workspace.path(workspace.relpath(link)))) for link in links]
+    paths = [file_path for file_path, _ in files] + [link for link, _ in links]
+    # 단계별 소요 시간(ms) — 결과에 담아 요청 쪽 타이밍 내역에 합친다
+    timings = {}
 
-        # 9. "Everything up-to-date"도 정상 처리
+    try:
+        # 4. 파일 덮어쓰기 (rename으로 교체 — 서빙 중인 파일이 반쯤 쓰인 채로 읽히지 않게)
+        with timer("git.write_files", into=timings):
+            for file_path, html_code in files:
+                atomic_write(workspace.path(file_path), html_code)
+
+        # 5~7, 11. 인덱스/ref를 바꾸는 단계만 저장소 단위로 직렬화
+        with timer("git.lock_wait", into=timings):
+            workspace.index_lock.acquire()
+        try:
+            if GIT_BACKEND == "fast-import":
+                # 상주 fast-import 프로세스로 blob/tree/commit 직접 기록
+                with timer("git.fast_import", into=timings):
+                    written = get_writer(workspace.root, workspace.branch).commit(files, commit_message, removed, links)
+                if written.get("skipped"):
+                    metrics.count("orrne_commits_skipped_total")
+                    return {
+                        "success": False,
+                        "skipped": True,
+                        "message": "No changes detected",
+                        "timestamp": commit_time,
+                        "timings": timings
+                    }
+                commit_hash = written["commit_id"]
+            else:
+                # 5. 변경 사항 있는 경우 Staging Area에 추가
+                with timer("git.add", into=timings):
+                    if paths:
+                        workspace.git("add", "--", *paths)
+                    if removed:
+                        workspace.git_bytes(
+                            "rm", "-q", "--cached", "--ignore-unmatch", "--pathspec-from-file=-",
+                            input="".join(path + "\n" for path in removed).encode("utf-8")
+                        )
+
+                # 6. 변경 사항 확인
+                with timer("git.diff", into=timings):
+                    diff_result = workspace.git("diff", "--cached", "--quiet", check=False) if removed else \
+                        workspace.git("diff", "--cached", "--quiet", "--", *paths, check=False)
+                if diff_result.returncode == 0:
+                    metrics.count("orrne_commits_skipped_total")
+                    return {
+                        "success": False,
+                        "skipped": True,
+                        "message": "No changes detected",
+                        "timestamp": commit_time,
+                        "timings": timings
+                    }
+
+                # 7. 커밋
+                with timer("git.commit", into=timings):
+                    workspace.git("commit", "-m", commit_message)
+
+                # 11. Commit ID 추출
+                with timer("git.rev_parse", into=timings):
+                    commit_hash = workspace.git("rev-parse", "HEAD", check=False).stdout.strip()
+        finally:
+            workspace.index_lock.release()
+        metrics.count("orrne_commits_total")
+
+        # 8. Push (네트워크 작업은 락 밖에서)
+        with timer("git.push", into=timings):
+            push_result = workspace.git("push", workspace.remote, workspace.branch, check=False)
+
+        # 9. "Everything up-to-date"도 정상 처리 (다른 요청의 push에 이미 포함된 경우)
         if "Everything up-to-date" in (push_result.stdout or ""):
             return {
                 "success": True,
+                "commit_id": commit_hash,
                 "message": "변경 사항 없어서 push 생략됨 (Everything up-to-date)",
-                "timestamp": commit_time
+                "timestamp": commit_time,
+                "timings": timings
                 }
 
         # 10. Push 실패 시 에러 처리
         if push_result.returncode != 0:
+            metrics.count("orrne_push_failures_total")
             return {
                 "success": False,
                 "message": "Git push failed",
                 "stdout": push_result.stdout or "No stdout",
                 "stderr": push_result.stderr or "No stderr",
                 "details": f"exit code {push_result.returncode}",
-                "timestamp": commit_time
+                "timestamp": commit_time,
+                "timings": timings
             }
 
-        # 11. Commit ID 추출
-        result = subprocess.run(
-            ["git", "rev-parse", "HEAD"],
-            capture_output=True,
-            text=True
-        )
-        commit_hash = result.stdout.strip()
-
-        # 12. 프리뷰 저장
-        preview_path = os.path.join("static", "preview", f"{commit_hash}.html")
-        os.makedirs(os.path.dirname(preview_path), exist_ok=True)
-        with open(preview_path, "w") as dst:
-            dst.write(html_code)
-
         return {
             "success": True,
             "commit_id": commit_hash,
-            "timestamp": commit_time
+            "timestamp": commit_time,
+            "timings": timings
             }
 
     except subprocess.CalledProcessError as e:
@@ -155,7 +156,8 @@ def git_commit_and_push(file_path, html_code, commit_message="auto: update index
             "stdout": stdout,
             "stderr": stderr,
             "message": "HTML generated but Git push failed",
-            "timestamp": commit_time
+            "timestamp": commit_time,
+            "timings": timings
         }
     except Exception as e:
         # 기타 예외 처리
@@ -164,5 +166,6 @@ def git_commit_and_push(file_path, html_code, commit_message="auto: update index
             "error": str(e),
             "message": "HTML generated but Git push failed",
             "details": "Unexpected error occurred",
-            "timestamp": commit_time
+            "timestamp": commit_time,
+            "timings": timings
             }
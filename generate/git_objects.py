@@ -0,0 +1,215 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+import subprocess
+
+
+# 이 커밋 수마다 `git gc --auto`를 뒤에서 실행 (git commit이 하던 일; 0이면 끔)
+# fast-import는 checkpoint마다 작은 팩을 loose 객체로 풀어 두므로 주기적으로 묶어야 한다
+GIT_GC_EVERY = int(os.getenv("GIT_GC_EVERY", "100"))
+
+# 저장소별 fast-import 프로세스 (한 번 띄워서 계속 재사용)
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(repo_dir, branch="main"):
+    key = (os.path.abspath(repo_dir), branch)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = FastImportWriter(*key)
+            _writers[key] = writer
+        return writer
+
+
+def blob_hash(data):
+    """git hash-object와 같은 blob SHA-1을 계산한다."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class FastImportWriter:
+    """`git fast-import` 하나를 상주시켜 blob/tree/commit 객체를 직접 기록한다.
+
+    git add / diff --cached / commit / rev-parse 를 각각 띄우는 대신
+    커밋 하나당 stdin 스트림 한 번 + 인덱스 갱신 한 번으로 끝난다.
+    """
+
+    def __init__(self, repo_dir, branch="main"):
+        self.repo_dir = repo_dir
+        self.branch = branch
+        self.ref = f"refs/heads/{branch}"
+        self._proc = None
+        self._ident = None
+        self._mark = 0
+        self._lock = threading.Lock()
+        self._commits = 0
+        self._gc_thread = None
+
+    def commit(self, files, commit_message, removed=(), links=()):
+        """files([(path, text)])를 하나의 커밋으로 기록하고 removed 경로는 트리에서 뺀다.
+
+        links([(path, 링크 대상)])는 심볼릭 링크(mode 120000)로 기록한다.
+        내용이 HEAD와 모두 같으면 {"skipped": True}, 아니면 {"commit_id": sha}를 반환한다.
+        """
+        with self._lock:
+            self._ensure_process()
+            parent = self._read_ref()
+
+            blobs = [(path, text.encode("utf-8"), "100644") for path, text in files] + \
+                    [(path, target.encode("utf-8"), "120000") for path, target in links]
+
+            # 1. blob 해시 비교로 빈 커밋 생략
+            # (removed는 호출 측에서 추적 중인 경로만 넘긴다고 보고 비교하지 않음)
+            if not removed and (not blobs or parent and all(
+                    self._ls(parent, path) == blob_hash(data) for path, data, _ in blobs)):
+                return {"skipped": True}
+
+            # 2. commit 명령 스트림 작성
+            self._mark += 1
+            mark = self._mark
+            # git commit -m 과 같은 형태로 메시지 끝 개행을 맞춤
+            message = (commit_message.rstrip("\n") + "\n").encode("utf-8")
+            chunks = [
+                f"commit {self.ref}\n".encode(),
+                f"mark :{mark}\n".encode(),
+                f"committer {self._ident} {int(time.time())} {time.strftime('%z')}\n".encode("utf-8"),
+                b"data %d\n" % len(message), message,
+            ]
+            if parent:
+                chunks.append(f"from {parent}\n".encode())
+            for path in removed:
+                chunks.append(f"D {_quote_path(path)}\n".encode("utf-8"))
+            for path, data, mode in blobs:
+                chunks.append(f"M {mode} inline {_quote_path(path)}\n".encode("utf-8"))
+                chunks.append(b"data %d\n" % len(data))
+                chunks.append(data)
+                chunks.append(b"\n")
+            chunks.append(b"\n")
+
+            # 3. 새 커밋 해시 조회 → checkpoint로 ref 반영 후 완료 신호 대기
+            chunks.append(f"get-mark :{mark}\n".encode())
+            chunks.append(f"checkpoint\nprogress done {mark}\n".encode())
+            self._write(b"".join(chunks))
+
+            commit_hash = self._readline()
+            self._expect(f"progress done {mark}")
+
+        # 4. 인덱스를 새 커밋에 맞춤 (working tree 파일은 호출 측에서 이미 기록됨)
+        if blobs:
+            subprocess.run(
+                ["git", "update-index", "--add", "--", *[path for path, _, _ in blobs]],
+                cwd=self.repo_dir, check=True, capture_output=True, text=True
+            )
+        if removed:
+            # 지운 파일이 수만 개일 수 있어 인자 대신 stdin으로 넘김
+            subprocess.run(
+                ["git", "update-index", "--force-remove", "--stdin"],
+                input="".join(path + "\n" for path in removed),
+                cwd=self.repo_dir, check=True, capture_output=True, text=True
+            )
+
+        self._commits += 1
+        if GIT_GC_EVERY and self._commits % GIT_GC_EVERY == 0:
+            self._schedule_gc()
+        return {"commit_id": commit_hash}
+
+    def close(self):
+        with self._lock:
+            if self._proc is not None:
+                try:
+                    self._proc.stdin.write(b"done\n")
+                    self._proc.stdin.close()
+                    self._proc.wait(timeout=10)
+                except Exception:
+                    self._proc.kill()
+                self._proc = None
+        if self._commits:
+            self._gc()
+
+    def _schedule_gc(self):
+        # 커밋을 막지 않도록 별도 스레드에서, 이미 돌고 있으면 건너뜀
+        if self._gc_thread is not None and self._gc_thread.is_alive():
+            return
+        self._gc_thread = threading.Thread(target=self._gc, name="git-gc", daemon=True)
+        self._gc_thread.start()
+
+    def _gc(self):
+        # 이미 백그라운드 스레드이므로 gc가 다시 분리(detach)되지 않게 끝까지 기다림
+        result = subprocess.run(["git", "-c", "gc.autoDetach=false", "gc", "--auto", "--quiet"],
+                                cwd=self.repo_dir, capture_output=True, text=True)
+        if result.returncode != 0:
+            logging.warning(f"[git] gc --auto 실패: {result.stderr.strip()}")
+
+    def _ensure_process(self):
+        if self._proc is not None and self._proc.poll() is None:
+            return
+
+        if self._ident is None:
+            ident = subprocess.run(
+                ["git", "var", "GIT_COMMITTER_IDENT"],
+                cwd=self.repo_dir, check=True, capture_output=True, text=True
+            ).stdout.strip()
+            # "Name <email> 1700000000 +0900" → 시간 부분은 커밋마다 새로 채움
+            self._ident = ident.rsplit(" ", 2)[0]
+
+        self._proc = subprocess.Popen(
+            ["git", "fast-import", "--quiet", "--done"],
+            cwd=self.repo_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+    def _ls(self, commit, path):
+        self._write(f"ls {commit} {_quote_path(path)}\n".encode("utf-8"))
+        line = self._readline()
+        if line.startswith("missing "):
+            return None
+        # "100644 blob <sha>\t<path>"
+        return line.split("\t", 1)[0].split(" ")[2]
+
+    def _read_ref(self):
+        git_dir = os.path.join(self.repo_dir, ".git")
+        ref_path = os.path.join(git_dir, self.ref)
+        if os.path.exists(ref_path):
+            with open(ref_path, "r") as f:
+                return f.read().strip()
+
+        packed = os.path.join(git_dir, "packed-refs")
+        if os.path.exists(packed):
+            with open(packed, "r") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == self.ref:
+                        return parts[0]
+        return None
+
+    def _write(self, data):
+        try:
+            self._proc.stdin.write(data)
+            self._proc.stdin.flush()
+        except BrokenPipeError:
+            self._proc = None
+            raise RuntimeError("git fast-import 프로세스가 종료되었습니다.")
+
+    def _readline(self):
+        line = self._proc.stdout.readline()
+        if not line:
+            self._proc = None
+            raise RuntimeError("git fast-import 응답이 없습니다. (.git/fast_import_crash_* 확인)")
+        return line.decode("utf-8").rstrip("\n")
+
+    def _expect(self, expected):
+        line = self._readline()
+        if line != expected:
+            raise RuntimeError(f"git fast-import 예상치 못한 응답: {line}")
+
+
+def _quote_path(path):
+    path = path.replace(os.sep, "/")
+    if path.startswith('"') or "\n" in path or " " in path:
+        return '"' + path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+    return path
@@ -0,0 +1,119 @@
+import os
+import gzip
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli는 선택 의존성 — 없으면 gzip만 제공
+    brotli = None
+
+
+# 메모리에 올려둘 파일 수 (원본 + 압축본)
+HTTP_CACHE_ENTRIES = int(os.getenv("HTTP_CACHE_ENTRIES", "256"))
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+
+def compress_variants(data):
+    """쓰기 시점에 만들어 둘 압축본. {"gzip": bytes, "br": bytes}"""
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data)
+    return variants
+
+
+def write_compressed_variants(path, data):
+    for encoding, body in compress_variants(data).items():
+        variant_path = path + (".br" if encoding == "br" else ".gz")
+        tmp_path = f"{variant_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, variant_path)
+
+
+def send_cached_file(path, immutable=False, etag=None):
+    """ETag/304와 Accept-Encoding 협상을 처리해 파일을 보낸다.
+
+    immutable: 내용이 절대 바뀌지 않는 파일(프리뷰 등)은 1년 캐시
+    etag: 이미 알고 있는 내용 해시(blob sha256 등). 없으면 내용으로 계산
+    """
+    return send_entry(_load(path, etag), immutable=immutable)
+
+
+def send_entry(entry, immutable=False):
+    """make_entry로 만든 메모리 내용을 그대로 보낸다. (디스크 접근 없음)"""
+    cache_control = IMMUTABLE if immutable else REVALIDATE
+
+    if request.if_none_match.contains(entry["etag"]):
+        response = Response(status=304)
+    else:
+        encoding = _negotiate(entry)
+        response = Response(entry["variants"][encoding], content_type=entry["content_type"])
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+
+    response.set_etag(entry["etag"])
+    response.headers["Cache-Control"] = cache_control
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def make_entry(data, path, etag=None, variants=None):
+    """응답에 필요한 것(ETag, Content-Type, 원본/압축본)을 미리 만들어 둔 dict."""
+    variants = dict(variants or compress_variants(data))
+    variants["identity"] = data
+
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/") or content_type == "application/javascript":
+        content_type += "; charset=utf-8"
+
+    return {
+        "etag": etag or hashlib.sha256(data).hexdigest(),
+        "content_type": content_type,
+        "variants": variants,
+    }
+
+
+def _negotiate(entry):
+    accept = request.accept_encodings
+    for encoding in ("br", "gzip"):
+        if encoding in entry["variants"] and accept[encoding]:
+            return encoding
+    return "identity"
+
+
+def _load(path, etag):
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        entry = _entries.get(path)
+        if entry is not None and entry["key"] == key:
+            _entries.move_to_end(path)
+            return entry
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # 미리 만들어 둔 압축본이 있으면 사용, 없으면 한 번만 압축해서 메모리에 보관
+    variants = {}
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if os.path.exists(path + suffix):
+            with open(path + suffix, "rb") as f:
+                variants[encoding] = f.read()
+
+    entry = make_entry(data, path, etag=etag, variants=variants or None)
+    entry["key"] = key
+    with _lock:
+        _entries[path] = entry
+        while len(_entries) > HTTP_CACHE_ENTRIES:
+            _entries.popitem(last=False)
+    return entry
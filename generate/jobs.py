@@ -0,0 +1,97 @@
+import os
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+# 동시에 LLM 호출 + git 커밋을 수행할 워커 수 / 대기 가능한 작업 수
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+# 조회용으로 보관할 완료 작업 수 (오래된 것부터 제거)
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "1000"))
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_jobs = OrderedDict()
+_owners = {}
+_lock = threading.Lock()
+_pending = 0
+
+
+def submit_job(kind, func, *args, owner=None):
+    """func(*args)를 워커 풀에서 실행하고 job id를 바로 반환한다.
+
+    func는 (응답 dict, HTTP 상태코드)를 반환해야 한다.
+    owner: 작업을 조회할 수 있는 쪽 (테넌트 Workspace 등). get_job에 같은 owner를 넘겨야 보인다.
+    대기열이 가득 찼으면 None을 반환한다.
+    """
+    global _pending
+
+    with _lock:
+        if _pending >= JOB_QUEUE_SIZE:
+            return None
+        _pending += 1
+
+        job_id = str(uuid.uuid4())
+        _owners[job_id] = owner
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        _trim_history()
+
+    _executor.submit(_run, job_id, func, args)
+    return job_id
+
+
+def get_job(job_id, owner=None):
+    """작업 상태 dict. 없거나 다른 owner의 작업이면 None."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or _owners.get(job_id) != owner:
+            return None
+        return dict(job)
+
+
+def _run(job_id, func, args):
+    global _pending
+
+    _update(job_id, status="running", started_at=datetime.utcnow().isoformat())
+    try:
+        body, status_code = func(*args)
+        if status_code < 400 and body.get("status") != "error":
+            _update(job_id, status="done", commit_id=body.get("commit_id"), result=body)
+        else:
+            _update(job_id, status="failed", error=body.get("error") or body.get("message"), result=body)
+    except Exception as e:
+        logging.exception(f"[job] {job_id} 실행 실패")
+        _update(job_id, status="failed", error=str(e))
+    finally:
+        _update(job_id, finished_at=datetime.utcnow().isoformat())
+        with _lock:
+            _pending -= 1
+
+
+def _update(job_id, **fields):
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+
+
+def _trim_history():
+    # 끝난 작업만 제거해서 메모리를 JOB_HISTORY 수준으로 유지
+    overflow = len(_jobs) - JOB_HISTORY
+    if overflow <= 0:
+        return
+    for job_id in list(_jobs):
+        if overflow <= 0:
+            break
+        if _jobs[job_id]["status"] in ("done", "failed"):
+            del _jobs[job_id]
+            del _owners[job_id]
+            overflow -= 1
@@ -0,0 +1,175 @@
+import os
+import sys
+import sqlite3
+import logging
+import threading
+from generate.workspace import get_workspace
+from generate.metrics import timed
+
+
+# 페이지 버전마다 한 행. path에 루트부터 부모까지의 id를 "/"로 이어 두어(materialized path)
+# 조상은 path 한 번, 자손은 path 범위 조회 한 번으로 찾는다. (전체 로그 크기와 무관)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    page_id TEXT PRIMARY KEY,
+    parent TEXT,
+    path TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    kind TEXT,
+    timestamp TEXT,
+    prompt TEXT
+);
+CREATE INDEX IF NOT EXISTS versions_parent ON versions (parent);
+CREATE INDEX IF NOT EXISTS versions_path ON versions (path);
+"""
+
+_COLUMNS = ("page_id", "parent", "path", "depth", "kind", "timestamp", "prompt")
+
+_local = threading.local()
+
+
+def record_version(page_id, parent=None, kind="generate", timestamp=None, prompt=None, workspace=None):
+    """새 버전을 부모 아래에 기록한다. log_commit 때마다 호출된다.
+
+    parent: 수정 전 페이지 id 또는 커밋 해시 (예전 로그는 커밋 해시로 남아 있음)
+    """
+    conn = _connect(workspace)
+    parent_version = _get(conn, resolve(parent, workspace)) if parent else None
+    if parent_version:
+        parent = parent_version["page_id"]
+        path = parent_version["path"] + parent + "/"
+        depth = parent_version["depth"] + 1
+    else:
+        path, depth = "", 0
+
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO versions (page_id, parent, path, depth, kind, timestamp, prompt) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (page_id, parent, path, depth, kind, timestamp, prompt)
+        )
+
+
+def resolve(name, workspace=None):
+    """페이지 id 또는 커밋 해시 → 버전 id. 기록에 없으면 그대로 반환."""
+    conn = _connect(workspace)
+    if _get(conn, name):
+        return name
+    from generate.logger import find_commit, pages_of_commit
+    if len(pages_of_commit(name, workspace=workspace)) > 1:
+        return name  # 여러 페이지가 함께 묶인 배치 커밋 — 어느 한 페이지로 정할 수 없음
+    entry = find_commit(name, workspace=workspace)
+    if entry:
+        return entry.get("page_id") or entry["commit_id"]
+    return name
+
+
+@timed("lineage")
+def history(name, limit=100, workspace=None):
+    """페이지의 조상(루트부터)과 자손(가까운 순) 목록. 기록에 없으면 None.
+
+    {"version": {...}, "previous": 부모 버전 또는 None, "ancestors": [...], "children": [...], "descendants": [...]}
+    """
+    conn = _connect(workspace)
+    version = _get(conn, resolve(name, workspace))
+    if version is None:
+        return None
+
+    ancestor_ids = version["path"].split("/")[:-1][-limit:]
+    ancestors = _select(conn, f"page_id IN ({', '.join('?' * len(ancestor_ids))})", ancestor_ids) \
+        if ancestor_ids else []
+    ancestors.sort(key=lambda v: v["depth"])
+
+    # 자손: path가 "<내 path><내 id>/"로 시작하는 행 ('/' 다음 문자 '0'까지의 범위)
+    prefix = version["path"] + version["page_id"] + "/"
+    descendants = _select(
+        conn, "path >= ? AND path < ? ORDER BY depth, timestamp LIMIT ?",
+        (prefix, prefix[:-1] + "0", limit)
+    )
+
+    return {
+        "version": version,
+        "previous": ancestors[-1] if ancestors else None,
+        "ancestors": ancestors,
+        "children": [v for v in descendants if v["parent"] == version["page_id"]],
+        "descendants": descendants,
+    }
+
+
+def ancestors_of(page_ids, workspace=None):
+    """여러 버전의 조상 id 전체 집합. 기록에 없는 id는 건너뛴다. (GC 도달성 계산용)"""
+    conn = _connect(workspace)
+    page_ids = list(page_ids)
+    ancestors = set()
+    for start in range(0, len(page_ids), 500):
+        chunk = page_ids[start:start + 500]
+        for (path,) in conn.execute(
+                f"SELECT path FROM versions WHERE page_id IN ({', '.join('?' * len(chunk))})", chunk):
+            ancestors.update(path.split("/")[:-1])
+    return ancestors
+
+
+def rebuild(workspace=None):
+    """커밋 로그 전체로 버전 기록을 다시 만든다. (로그 순서대로 한 번 훑음) 기록한 수를 반환."""
+    from generate.logger import read_commits, entry_kind
+
+    workspace = workspace or get_workspace()
+    conn = _connect(workspace)
+    with conn:
+        conn.execute("DELETE FROM versions")
+
+    count = 0
+    for entry in read_commits(workspace=workspace):
+        extra_info = entry.get("extra_info") or {}
+        kind = entry_kind(extra_info)
+        if kind == "rollback":
+            continue
+        record_version(
+            entry.get("page_id") or entry["commit_id"], extra_info.get("revise_from"), kind,
+            entry.get("timestamp"), entry.get("prompt"), workspace=workspace
+        )
+        count += 1
+    return count
+
+
+def _get(conn, page_id):
+    rows = _select(conn, "page_id = ?", (page_id,))
+    return rows[0] if rows else None
+
+
+def _select(conn, where, params):
+    rows = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM versions WHERE {where}", params).fetchall()
+    return [dict(zip(_COLUMNS, row)) for row in rows]
+
+
+def _connect(workspace=None):
+    workspace = workspace or get_workspace()
+    db_path = workspace.log_path("lineage.db")
+
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+if __name__ == "__main__":
+    # python -m generate.lineage          — 커밋 로그로 버전 기록 다시 만들기
+    # python -m generate.lineage <id>     — 한 페이지의 조상/자손 출력
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 1:
+        result = history(sys.argv[1])
+        if result is None:
+            logging.info("[lineage] 기록 없음")
+        else:
+            for version in result["ancestors"] + [result["version"]] + result["descendants"]:
+                logging.info(f"[lineage] {'  ' * version['depth']}{version['page_id']} {version['kind']} {version['timestamp']}")
+    else:
+        logging.info(f"[lineage] {rebuild()}개 버전 기록")
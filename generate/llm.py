@@ -0,0 +1,344 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import openai
+from generate import metrics
+from generate.metrics import timer
+
+
+# 시도 한 번에 허용하는 시간(초)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+# 429/5xx/타임아웃/연결 오류일 때 다시 시도할 횟수
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+# 연속 실패가 이 횟수에 닿으면 COOLDOWN 동안 바로 실패 처리 (이후 한 요청만 시험 삼아 보냄)
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+# 1이면 첫 요청이 p95 지연 안에 끝나지 않을 때 같은 요청을 하나 더 보내 먼저 끝난 쪽을 사용
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+# p95를 믿을 수 있을 만큼 쌓인 뒤에만 hedge
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+RETRYABLE = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+)
+
+
+class CircuitOpenError(Exception):
+    """upstream 장애로 회로가 열려 있어 요청을 보내지 않음."""
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=LLM_BREAKER_THRESHOLD, cooldown=LLM_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    logging.warning(f"[llm] 연속 실패 {self.failures}회 — {self.cooldown}초 동안 요청 중단")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """성공/실패로 세지 않는 결과 (400 등) — half_open 시험 요청 자리만 돌려준다."""
+        with self._lock:
+            self._probing = False
+
+    def retry_after(self):
+        with self._lock:
+            return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+
+class LatencyWindow:
+    """최근 성공한 시도의 지연 시간(초)."""
+
+    def __init__(self, size=500):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p, min_samples=1):
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+metrics.describe("orrne_llm_attempt_seconds", "histogram", "Latency of each OpenAI attempt by outcome")
+
+breaker = CircuitBreaker()
+latencies = LatencyWindow()
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0, "rejected": 0}
+# hedge 요청만 이 풀에서 실행 (첫 요청은 풀을 거치지 않음)
+_hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+def call_llm(client, messages, model="gpt-4o", stream=False):
+    """재시도/회로 차단/hedge를 거쳐 chat.completions.create를 호출한다.
+
+    (응답, 시도 기록 목록)을 반환한다. 시도 기록: {"attempt", "latency_ms", "outcome", "hedge"}
+    stream=True 이면 스트림이 열릴 때까지만 재시도한다. (이미 보낸 조각은 되돌릴 수 없음)
+    """
+    with timer("llm"):
+        return _call_llm(client, messages, model, stream)
+
+
+def _call_llm(client, messages, model, stream):
+    attempts = []
+    _count("calls")
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        _check_breaker()
+        try:
+            delay = None if stream else _hedge_delay()
+            if delay is None:
+                response = _attempt(client, messages, model, stream, attempts)
+            else:
+                response = _hedged(client, messages, model, attempts, delay)
+        except RETRYABLE as e:
+            breaker.record_failure()
+            if attempt == LLM_MAX_RETRIES:
+                _count("failures")
+                raise
+            _count("retries")
+            time.sleep(_backoff(attempt, e))
+            continue
+        except Exception:
+            # 400 등 요청 자체의 문제는 upstream 장애로도, 회복으로도 세지 않음
+            breaker.release()
+            raise
+
+        breaker.record_success()
+        return response, attempts
+
+
+async def acall_llm(aclient, messages, model="gpt-4o", stream=False):
+    """call_llm의 비동기 버전. hedge에서 진 요청은 취소한다."""
+    with timer("llm"):
+        return await _acall_llm(aclient, messages, model, stream)
+
+
+async def _acall_llm(aclient, messages, model, stream):
+    attempts = []
+    _count("calls")
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        _check_breaker()
+        try:
+            delay = None if stream else _hedge_delay()
+            if delay is None:
+                response = await _aattempt(aclient, messages, model, stream, attempts)
+            else:
+                response = await _ahedged(aclient, messages, model, attempts, delay)
+        except RETRYABLE as e:
+            breaker.record_failure()
+            if attempt == LLM_MAX_RETRIES:
+                _count("failures")
+                raise
+            _count("retries")
+            await asyncio.sleep(_backoff(attempt, e))
+            continue
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.release()
+            raise
+
+        breaker.record_success()
+        return response, attempts
+
+
+def llm_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["breaker"] = breaker.state
+    for p in (50, 95, 99):
+        value = latencies.percentile(p)
+        stats[f"p{p}_ms"] = round(value * 1000, 1) if value is not None else None
+    return stats
+
+
+def _attempt(client, messages, model, stream, attempts, hedge=False):
+    _count("attempts")
+    start = time.monotonic()
+    try:
+        response = client.chat.completions.create(
+            model=model, messages=messages, stream=stream, timeout=LLM_TIMEOUT
+        )
+    except Exception as e:
+        attempts.append(_record(len(attempts) + 1, start, _outcome(e), hedge))
+        raise
+    attempts.append(_record(len(attempts) + 1, start, "ok", hedge))
+    if not stream:
+        latencies.add(time.monotonic() - start)
+    return response
+
+
+async def _aattempt(aclient, messages, model, stream, attempts, hedge=False):
+    _count("attempts")
+    start = time.monotonic()
+    try:
+        response = await aclient.chat.completions.create(
+            model=model, messages=messages, stream=stream, timeout=LLM_TIMEOUT
+        )
+    except asyncio.CancelledError:
+        attempts.append(_record(len(attempts) + 1, start, "cancelled", hedge))
+        raise
+    except Exception as e:
+        attempts.append(_record(len(attempts) + 1, start, _outcome(e), hedge))
+        raise
+    attempts.append(_record(len(attempts) + 1, start, "ok", hedge))
+    if not stream:
+        latencies.add(time.monotonic() - start)
+    return response
+
+
+def _hedged(client, messages, model, attempts, delay):
+    # 첫 요청은 대기열 없이 바로 시작 — 풀 대기 시간이 hedge 지연에 섞이지 않고 풀 크기가 처리량을 막지 않는다.
+    # (호출 스레드에서 직접 보내면 hedge가 먼저 끝나도 돌아올 수 없으므로 전용 스레드에서, 호출 스레드는 기다리기만)
+    first = Future()
+    threading.Thread(target=_run_into, args=(first, _attempt, client, messages, model, False, attempts),
+                     name="llm-primary", daemon=True).start()
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result()
+
+    # 첫 요청이 p95 안에 끝나지 않음 → 같은 요청을 하나 더 보내고 먼저 성공한 쪽 사용
+    _count("hedges")
+    second = _hedge_pool.submit(_attempt, client, messages, model, False, attempts, True)
+    pending, error = {first, second}, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is second:
+                    _count("hedge_wins")
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def _run_into(future, func, *args):
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(func(*args))
+    except BaseException as e:
+        future.set_exception(e)
+
+
+async def _ahedged(aclient, messages, model, attempts, delay):
+    first = asyncio.ensure_future(_aattempt(aclient, messages, model, False, attempts))
+    done, _ = await asyncio.wait([first], timeout=delay)
+    if done:
+        return first.result()
+
+    _count("hedges")
+    second = asyncio.ensure_future(_aattempt(aclient, messages, model, False, attempts, True))
+    pending, error = {first, second}, None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        _count("hedge_wins")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _check_breaker():
+    if not breaker.allow():
+        _count("rejected")
+        raise CircuitOpenError(
+            f"OpenAI 응답 장애로 요청을 잠시 중단했습니다. {breaker.retry_after():.0f}초 후 다시 시도해 주세요."
+        )
+
+
+def _hedge_delay():
+    if not LLM_HEDGE:
+        return None
+    return latencies.percentile(95, min_samples=LLM_HEDGE_MIN_SAMPLES)
+
+
+def _backoff(attempt, error):
+    # 429의 Retry-After가 있으면 따르고, 없으면 지수 백오프 + full jitter
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), LLM_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+
+def _outcome(error):
+    if isinstance(error, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection_error"
+    status = getattr(error, "status_code", None)
+    return str(status) if status else type(error).__name__
+
+
+def _record(number, start, outcome, hedge):
+    elapsed = time.monotonic() - start
+    metrics.observe("orrne_llm_attempt_seconds", elapsed, outcome=outcome)
+    return {
+        "attempt": number,
+        "latency_ms": round(elapsed * 1000, 1),
+        "outcome": outcome,
+        "hedge": hedge,
+    }
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
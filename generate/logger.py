@@ -1,30 +1,236 @@
 import os
 import json
+import sqlite3
+import logging
+import threading
 from datetime import datetime
+from generate.workspace import get_workspace
+from generate.metrics import timed
+from generate.search import index_page
+from generate.lineage import record_version
 
-def log_commit(prompt, commit_id, html_excerpt, extra_info=None):
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, "commits.json")
 
+# 커밋 로그는 append-only SQLite 테이블에 한 줄씩 쌓는다.
+# (entry 컬럼에 기존 commits.json 항목과 같은 dict를 그대로 보관)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    commit_id TEXT NOT NULL,
+    page_id TEXT,
+    extra_type TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commits_commit_id ON commits (commit_id);
+CREATE INDEX IF NOT EXISTS commits_page_id ON commits (page_id);
+CREATE INDEX IF NOT EXISTS commits_timestamp ON commits (timestamp);
+CREATE INDEX IF NOT EXISTS commits_extra_type ON commits (extra_type, seq);
+"""
+
+_local = threading.local()
+_migrate_lock = threading.Lock()
+
+
+@timed("log_write")
+def log_commit(prompt, commit_id, html_code, extra_info=None, page_id=None, workspace=None):
+    """로그 한 줄을 남기고 검색 색인을 갱신한다. html_code는 전체 HTML (로그에는 앞부분만 기록)"""
     log_data = {
         "timestamp": datetime.utcnow().isoformat(),
         "prompt": prompt,
         "commit_id": commit_id,
-        "preview": html_excerpt[:300]  # 일부만 기록
+        "preview": html_code[:300]  # 일부만 기록
     }
 
+    # 배치 커밋에서는 여러 페이지가 같은 커밋 해시를 공유하므로 페이지 id도 기록
+    if page_id:
+        log_data["page_id"] = page_id
+
     if extra_info:
         log_data["extra_info"] = extra_info
 
-    if os.path.exists(log_file):
-        with open(log_file, "r", encoding="utf-8") as f:
+    conn = _connect(workspace)
+    with conn:
+        conn.execute(
+            "INSERT INTO commits (timestamp, commit_id, page_id, extra_type, entry) VALUES (?, ?, ?, ?, ?)",
+            _row(log_data)
+        )
+
+    # 검색 색인/버전 계보 (롤백은 새 페이지가 아니므로 제외). 실패해도 로그 기록은 유지
+    kind = entry_kind(extra_info)
+    if kind != "rollback":
+        version_id = page_id or commit_id
+        try:
+            index_page(version_id, prompt, html_code, commit_id, log_data["timestamp"], kind, workspace)
+        except Exception:
+            logging.exception("[search] 색인 실패")
+        try:
+            record_version(
+                version_id, (extra_info or {}).get("revise_from"), kind, log_data["timestamp"], prompt, workspace
+            )
+        except Exception:
+            logging.exception("[lineage] 버전 기록 실패")
+    return log_data
+
+
+def entry_kind(extra_info):
+    """로그 항목의 extra_info → "generate" / "revise" / "rollback" """
+    if not extra_info:
+        return "generate"
+    if "revise_from" in extra_info:
+        return "revise"
+    if "rollback_from" in extra_info:
+        return "rollback"
+    return next(iter(extra_info))
+
+
+def find_commit(commit_id, workspace=None):
+    """commit_id(또는 page_id)로 가장 최근 로그 항목을 찾는다."""
+    row = _connect(workspace).execute(
+        "SELECT entry FROM commits WHERE commit_id = ? OR page_id = ? ORDER BY seq DESC LIMIT 1",
+        (commit_id, commit_id)
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def pages_of_commit(commit_id, workspace=None):
+    """커밋 해시에 묶여 기록된 page_id 목록 (배치 커밋이면 여러 개)"""
+    rows = _connect(workspace).execute(
+        "SELECT page_id FROM commits WHERE commit_id = ? AND page_id IS NOT NULL "
+        "GROUP BY page_id ORDER BY MIN(seq)",
+        (commit_id,)
+    ).fetchall()
+    return [page_id for (page_id,) in rows]
+
+
+def read_commits(workspace=None):
+    rows = _connect(workspace).execute("SELECT entry FROM commits ORDER BY seq").fetchall()
+    return [json.loads(entry) for (entry,) in rows]
+
+
+def query_commits(limit=100, after=None, order="asc", since=None, until=None,
+                  extra_type=None, q=None, workspace=None):
+    """커서 기반으로 로그 한 페이지를 읽는다. (항목 목록, 다음 커서)를 반환.
+
+    after: 이전 페이지의 next_cursor (asc면 그보다 뒤, desc면 그보다 앞의 항목)
+    extra_type: "revise_from" / "rollback_from" / "generate"(extra_info 없음)
+    """
+    rows = list(_select(limit + 1, after, order, since, until, extra_type, q, workspace))
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return [json.loads(entry) for _, entry in rows[:limit]], next_cursor
+
+
+def iter_commits(after=None, order="asc", since=None, until=None,
+                 extra_type=None, q=None, limit=None, workspace=None):
+    """조건에 맞는 항목을 (seq, entry JSON 문자열)로 하나씩 내보낸다. (NDJSON 내보내기용)"""
+    return _select(limit, after, order, since, until, extra_type, q, workspace)
+
+
+def iter_pages(workspace=None):
+    """(페이지 id, 커밋 해시, 시각)을 최근 순으로 하나씩. 롤백 항목은 새 페이지가 아니므로 제외 (GC용)"""
+    cursor = _connect(workspace).execute(
+        "SELECT COALESCE(page_id, commit_id), commit_id, timestamp FROM commits "
+        "WHERE extra_type IS NOT 'rollback_from' ORDER BY seq DESC"
+    )
+    while True:
+        rows = cursor.fetchmany(500)
+        if not rows:
+            break
+        yield from rows
+
+
+def _select(limit, after, order, since, until, extra_type, q, workspace):
+    desc = order == "desc"
+    where, params = [], []
+
+    if after is not None:
+        where.append("seq < ?" if desc else "seq > ?")
+        params.append(int(after))
+    if since:
+        where.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        where.append("timestamp < ?")
+        params.append(until)
+    if extra_type == "generate":
+        where.append("extra_type IS NULL")
+    elif extra_type:
+        where.append("extra_type = ?")
+        params.append(extra_type)
+    if q:
+        where.append("json_extract(entry, '$.prompt') LIKE ? ESCAPE '\\'")
+        params.append("%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+
+    sql = "SELECT seq, entry FROM commits"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY seq DESC" if desc else " ORDER BY seq"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    cursor = _connect(workspace).execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(500)
+        if not rows:
+            break
+        yield from rows
+
+
+def migrate_json_log(workspace=None):
+    """기존 logs/commits.json을 한 번만 SQLite로 옮기고 원본은 .migrated로 남긴다."""
+    workspace = workspace or get_workspace()
+    json_file = workspace.log_path("commits.json")
+
+    with _migrate_lock:
+        if not os.path.exists(json_file):
+            return 0
+
+        with open(json_file, "r", encoding="utf-8") as f:
             logs = json.load(f)
-    else:
-        logs = []
 
-    logs.append(log_data)
+        conn = _connect(workspace, migrate=False)
+        with conn:
+            conn.executemany(
+                "INSERT INTO commits (timestamp, commit_id, page_id, extra_type, entry) VALUES (?, ?, ?, ?, ?)",
+                [_row(entry) for entry in logs]
+            )
+        os.replace(json_file, json_file + ".migrated")
+
+    logging.info(f"[logger] commits.json → commits.db 마이그레이션 완료 ({len(logs)}건)")
+    return len(logs)
+
+
+def _row(entry):
+    extra_info = entry.get("extra_info") or {}
+    extra_type = next(iter(extra_info), None)
+    return (
+        entry.get("timestamp", ""),
+        entry.get("commit_id", ""),
+        entry.get("page_id"),
+        extra_type,
+        json.dumps(entry, ensure_ascii=False)
+    )
+
+
+def _connect(workspace=None, migrate=True):
+    """스레드마다 DB 연결을 하나씩 재사용한다."""
+    workspace = workspace or get_workspace()
+    db_path = workspace.log_path("commits.db")
+
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
 
-    with open(log_file, "w", encoding="utf-8") as f:
-        json.dump(logs, f, indent=2, ensure_ascii=False)
+        if migrate and os.path.exists(workspace.log_path("commits.json")):
+            migrate_json_log(workspace)
 
+    return conn
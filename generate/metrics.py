@@ -0,0 +1,163 @@
+import time
+import bisect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+
+# 단계별 소요 시간(초) 히스토그램 버킷
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_lock = threading.Lock()
+_meta = {}        # name → (type, help, buckets)
+_counters = {}    # (name, labels) → 값
+_histograms = {}  # (name, labels) → [버킷별 개수..., 합계, 개수]
+_callbacks = []   # (name, type, help, func) — /metrics 를 만들 때 값을 읽어오는 지표
+
+# 디버그 헤더가 있는 요청에서만 단계별 소요 시간(ms)을 모으는 dict
+_breakdown = contextvars.ContextVar("timing_breakdown", default=None)
+
+
+def describe(name, kind, help_text, buckets=STAGE_BUCKETS):
+    _meta[name] = (kind, help_text, buckets)
+
+
+def count(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    buckets = _meta.get(name, (None, None, STAGE_BUCKETS))[2]
+    index = bisect.bisect_left(buckets, value)
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(buckets) + 2)
+        # 누적은 출력할 때 계산하고 여기서는 해당 버킷 하나만 증가
+        if index < len(buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+def register(name, kind, help_text, func):
+    """func()가 값 또는 {레이블 dict의 tuple: 값}을 돌려주는 지표 (기존 통계 재사용)"""
+    _callbacks.append((name, kind, help_text, func))
+
+
+@contextmanager
+def timer(stage, into=None):
+    """stage 소요 시간을 히스토그램에 기록한다. into(dict)가 있으면 ms 단위로도 남긴다."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("orrne_stage_seconds", elapsed, stage=stage)
+        if into is not None:
+            into[stage] = round(into.get(stage, 0) + elapsed * 1000, 2)
+        record(stage, elapsed * 1000)
+
+
+def timed(stage):
+    """함수 전체를 stage로 측정하는 데코레이터."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(stage, ms):
+    breakdown = _breakdown.get()
+    if breakdown is not None:
+        breakdown[stage] = round(breakdown.get(stage, 0) + ms, 2)
+
+
+def record_all(timings):
+    """다른 스레드(배치 커미터 등)에서 잰 단계별 시간을 현재 요청 내역에 합친다."""
+    for stage, ms in (timings or {}).items():
+        record(stage, ms)
+
+
+def start_breakdown():
+    breakdown = {}
+    return breakdown, _breakdown.set(breakdown)
+
+
+def stop_breakdown(token):
+    _breakdown.reset(token)
+
+
+def render():
+    """Prometheus 텍스트 형식."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(series) for key, series in _histograms.items()}
+
+    lines = []
+    emitted = set()
+
+    def header(name, kind, help_text):
+        if name not in emitted:
+            emitted.add(name)
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        kind, help_text, _ = _meta.get(name, ("counter", name, None))
+        header(name, kind, help_text)
+        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    for (name, labels), series in sorted(histograms.items()):
+        _, help_text, buckets = _meta.get(name, ("histogram", name, STAGE_BUCKETS))
+        header(name, "histogram", help_text)
+        cumulative = 0
+        for bound, bucket_count in zip(buckets, series):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {series[-1]}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(series[-2])}")
+        lines.append(f"{name}_count{_labels(labels)} {series[-1]}")
+
+    for name, kind, help_text, func in _callbacks:
+        value = func()
+        header(name, kind, help_text)
+        if isinstance(value, dict):
+            for labels, item in sorted(value.items()):
+                lines.append(f"{name}{_labels(labels)} {_number(item)}")
+        else:
+            lines.append(f"{name} {_number(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+describe("orrne_stage_seconds", "histogram", "Time spent in each pipeline stage")
+describe("orrne_request_seconds", "histogram", "HTTP request latency by route")
+describe("orrne_requests_total", "counter", "HTTP requests by route and status")
+describe("orrne_commits_total", "counter", "Git commits written")
+describe("orrne_commits_skipped_total", "counter", "Commits skipped because nothing changed")
+describe("orrne_push_failures_total", "counter", "Failed git push attempts")
+describe("orrne_commit_batch_files", "histogram", "Files per batched commit", buckets=(1, 2, 5, 10, 20, 50, 100))
@@ -0,0 +1,105 @@
+import os
+import re
+import json
+import soupsieve
+from bs4 import BeautifulSoup
+from soupsieve import SelectorSyntaxError
+from generate.metrics import timed
+
+
+# selector/텍스트로 찾은 영역 앞뒤로 함께 보낼 줄 수
+REGION_CONTEXT_LINES = int(os.getenv("REGION_CONTEXT_LINES", "3"))
+
+
+class PatchError(Exception):
+    """모델이 돌려준 수정안을 기존 HTML에 적용할 수 없음."""
+
+
+def check_region(selector=None, text=None):
+    """요청의 selector/target_text를 쓸 수 있는지 확인한다. 못 쓰면 PatchError (클라이언트 오류)."""
+    if selector is not None:
+        if not isinstance(selector, str):
+            raise PatchError("selector는 문자열이어야 합니다.")
+        try:
+            soupsieve.compile(selector)
+        except SelectorSyntaxError:
+            raise PatchError(f"selector를 해석할 수 없습니다: {selector!r}")
+    if text is not None and not isinstance(text, str):
+        raise PatchError("target_text는 문자열이어야 합니다.")
+
+
+def select_region(html, selector=None, text=None, context_lines=REGION_CONTEXT_LINES):
+    """수정 대상 영역의 (시작, 끝) 문자 위치를 찾는다. 못 찾으면 None.
+
+    모델이 원본 문자열을 그대로 인용할 수 있도록 파싱 결과가 아니라
+    원본 HTML의 줄 단위 구간을 돌려준다.
+    """
+    if selector:
+        try:
+            element = BeautifulSoup(html, "html.parser").select_one(selector)
+        except SelectorSyntaxError:
+            return None  # check_region을 거치지 않은 호출 — 문서 전체로
+        if element is None or element.sourceline is None:
+            return None
+        first_line = element.sourceline - 1
+        span = str(element).count("\n") + 1
+    elif text:
+        position = html.find(text)
+        if position == -1:
+            return None
+        first_line = html.count("\n", 0, position)
+        span = text.count("\n") + 1
+    else:
+        return None
+
+    lines = html.splitlines(keepends=True)
+    start = max(0, first_line - context_lines)
+    end = min(len(lines), first_line + span + context_lines)
+    begin = sum(len(line) for line in lines[:start])
+    return begin, begin + sum(len(line) for line in lines[start:end])
+
+
+def build_patch_prompt(region_html, revision_prompt, partial=False):
+    target = "기존 HTML 문서의 일부" if partial else "기존 HTML 코드"
+    return (
+        f"다음은 {target}입니다:\n\n"
+        f"{region_html}\n\n"
+        "아래 요청사항을 반영하는 데 필요한 최소한의 수정만 JSON으로 알려주세요.\n"
+        '형식: {"edits": [{"find": "위 코드에서 그대로 복사한 부분", "replace": "바꿀 코드"}]}\n'
+        "find는 위 코드에 정확히 한 번만 나타나야 합니다. 설명 없이 ```json 블록만 출력해 주세요.\n\n"
+        f"{revision_prompt}"
+    )
+
+
+def parse_edits(raw_response):
+    """```json 블록(또는 첫 번째 {...})에서 edits 목록을 꺼낸다."""
+    match = re.search(r"```(?:json)?\s*(.*?)```", raw_response, flags=re.DOTALL | re.IGNORECASE)
+    body = match.group(1) if match else raw_response[raw_response.find("{"):raw_response.rfind("}") + 1]
+
+    try:
+        edits = json.loads(body).get("edits")
+    except (ValueError, AttributeError) as e:
+        raise PatchError(f"수정안 JSON을 해석할 수 없습니다: {e}")
+
+    if not isinstance(edits, list) or not edits:
+        raise PatchError("수정안에 edits가 없습니다.")
+    for edit in edits:
+        if not isinstance(edit, dict) or not isinstance(edit.get("find"), str) \
+                or not isinstance(edit.get("replace"), str) or not edit["find"]:
+            raise PatchError("edits 항목은 find/replace 문자열이어야 합니다.")
+    return edits
+
+
+@timed("patch_apply")
+def apply_edits(html, edits, begin=0, end=None):
+    """html[begin:end] 구간에 edits를 순서대로 적용한 전체 문서를 반환한다."""
+    end = len(html) if end is None else end
+    region = html[begin:end]
+
+    for edit in edits:
+        count = region.count(edit["find"])
+        if count != 1:
+            raise PatchError(f"find 구간이 {count}번 나타납니다: {edit['find'][:80]!r}")
+        region = region.replace(edit["find"], edit["replace"], 1)
+
+    return html[:begin] + region + html[end:]
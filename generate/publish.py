@@ -0,0 +1,87 @@
+import os
+import threading
+from generate.workspace import get_workspace
+from generate.http_cache import make_entry
+
+
+# 저장소별 live index.html 응답 (원본 + 압축본 + ETag)
+_live = {}
+
+
+def atomic_write(path, data, fsync=False):
+    """임시 파일에 쓴 뒤 rename. 읽는 쪽은 이전 내용 또는 새 내용 전체만 보게 된다.
+
+    fsync: 전원이 나가도 새 내용이 남도록 파일과 디렉토리까지 디스크에 내린다.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    if fsync:
+        dir_fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def publish(html, workspace=None):
+    """live index.html을 원자적으로 바꾸고 메모리 사본도 함께 교체한다. 새 ETag(sha256)를 반환.
+
+    압축본은 교체 전에 만들어 두므로 교체 순간 이후의 요청은 바로 새 내용을 받는다.
+    """
+    workspace = workspace or get_workspace()
+    path = workspace.index_path()
+    data = html.encode("utf-8")
+    entry = make_entry(data, path)
+
+    # 디스크와 메모리가 같은 순서로 바뀌도록 게시는 저장소마다 하나씩
+    with workspace.publish_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write(path, data, fsync=True)
+        entry["key"] = _file_key(os.stat(path))
+        _live[workspace] = entry
+    return entry["etag"]
+
+
+def live_index(workspace=None):
+    """메모리에 있는 live index 응답 dict. 게시된 index.html이 없으면 None.
+
+    요청마다 파일을 stat만 해서 (inode, mtime, 크기)가 메모리 사본과 다르면 다시 읽는다.
+    다른 워커 프로세스가 게시한 내용도 rename 직후부터 보이게 된다.
+    """
+    workspace = workspace or get_workspace()
+    path = workspace.index_path()
+    try:
+        key = _file_key(os.stat(path))
+        entry = _live.get(workspace)
+        if entry is None or entry["key"] != key:
+            with workspace.publish_lock:
+                entry = _live.get(workspace)
+                if entry is None or entry["key"] != key:
+                    with open(path, "rb") as f:
+                        # 읽은 파일 자체의 stat으로 — stat과 open 사이에 교체돼도 다음 요청에서 맞춰짐
+                        key = _file_key(os.fstat(f.fileno()))
+                        entry = make_entry(f.read(), path)
+                    entry["key"] = key
+                    _live[workspace] = entry
+    except FileNotFoundError:
+        _live.pop(workspace, None)
+        return None
+    return entry
+
+
+def _file_key(stat):
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def live_html(workspace=None):
+    """live index.html 내용. 게시된 것이 없으면 None."""
+    entry = live_index(workspace)
+    return entry["variants"]["identity"].decode("utf-8") if entry is not None else None
@@ -0,0 +1,344 @@
+import io
+import os
+import sys
+import json
+import time
+import sqlite3
+import tarfile
+import logging
+import threading
+from datetime import datetime, timedelta
+from generate.workspace import get_workspace
+from generate.blobstore import get_blobstore
+from generate.logger import iter_pages
+from generate.deploys import deployed, current_deploy
+from generate.lineage import ancestors_of
+from generate.snapshots import snapshot_path
+from generate.git_handler import git_commit_files
+from generate.metrics import timed
+
+
+# 보존 정책 — 하나라도 해당하는 페이지와 그 조상 버전(수정 전 페이지)은 남긴다
+# 최근 로그 N개의 페이지
+RETAIN_LAST = int(os.getenv("RETAIN_LAST", "500"))
+# 최근 며칠 안에 만든 페이지 (0이면 사용 안 함)
+RETAIN_DAYS = float(os.getenv("RETAIN_DAYS", "30"))
+# 한 번이라도 승인/롤백으로 배포된 페이지
+RETAIN_APPROVED = os.getenv("RETAIN_APPROVED", "1") == "1"
+# 저장은 됐지만 아직 로그에 안 남은 파일을 건드리지 않도록, 이보다 최근에 바뀐 파일은 보존(초)
+RETAIN_GRACE_SECONDS = int(os.getenv("RETAIN_GRACE_SECONDS", "3600"))
+
+PAGE_DIRS = ("blobs", "preview", "generated")
+
+# dirs/files: 페이지 디렉토리 목록 캐시. 디렉토리 mtime이 그대로면(추가/삭제 없음) 다시 훑지 않는다.
+# archived: 보관된 이름 → 압축 파일과 그 안의 경로 (복원, 410 응답용)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    dir TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    PRIMARY KEY (dir, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS archived (
+    name TEXT PRIMARY KEY,
+    archive TEXT NOT NULL,
+    member TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archived_member ON archived (archive, member);
+"""
+
+_local = threading.local()
+
+
+def scan_files(workspace=None):
+    """페이지 파일 목록 [(디렉토리, 이름, 크기, mtime)]과 캐시에서 읽은 디렉토리 수.
+
+    파일을 추가/삭제하면 디렉토리 mtime이 바뀌므로 그대로인 디렉토리는 캐시만 읽는다. (파일마다 stat 안 함)
+    mtime을 목록보다 먼저 읽어 두므로 훑는 사이에 추가된 파일은 다음 번에 다시 훑어 잡힌다.
+    """
+    workspace = workspace or get_workspace()
+    conn = _connect(workspace)
+    files, cached = [], 0
+    for directory in PAGE_DIRS:
+        path = workspace.path("static", directory)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            continue
+
+        row = conn.execute("SELECT mtime_ns FROM dirs WHERE dir = ?", (directory,)).fetchone()
+        if row and row[0] == mtime_ns:
+            files.extend(conn.execute("SELECT dir, name, size, mtime FROM files WHERE dir = ?", (directory,)))
+            cached += 1
+            continue
+
+        listed = []
+        for entry in os.scandir(path):
+            if entry.name.endswith(".html"):
+                stat = entry.stat(follow_symlinks=False)  # uuid 링크는 링크 자체 크기로
+                listed.append((directory, entry.name[:-len(".html")], stat.st_size, stat.st_mtime))
+        with conn:
+            conn.execute("DELETE FROM files WHERE dir = ?", (directory,))
+            conn.executemany("INSERT INTO files (dir, name, size, mtime) VALUES (?, ?, ?, ?)", listed)
+            conn.execute("INSERT OR REPLACE INTO dirs (dir, mtime_ns) VALUES (?, ?)", (directory, mtime_ns))
+        files.extend(listed)
+    return files, cached
+
+
+def policy(keep_last=None, ttl_days=None, keep_approved=None, grace_seconds=None):
+    """환경 변수 기본값에 이번 실행의 값을 덮어쓴 보존 정책"""
+    return {
+        "keep_last": RETAIN_LAST if keep_last is None else keep_last,
+        "ttl_days": RETAIN_DAYS if ttl_days is None else ttl_days,
+        "keep_approved": RETAIN_APPROVED if keep_approved is None else keep_approved,
+        "grace_seconds": RETAIN_GRACE_SECONDS if grace_seconds is None else grace_seconds,
+    }
+
+
+def reachable(workspace, rules):
+    """보존할 이름(페이지 id/커밋 해시/blob sha) 집합과 정책별 이름 수"""
+    reasons = {"last": set(), "ttl": set(), "approved": set(), "live": set()}
+    cutoff = (datetime.utcnow() - timedelta(days=rules["ttl_days"])).isoformat() if rules["ttl_days"] > 0 else None
+
+    # 1. 커밋 로그 (최근 N개, TTL 안)
+    for rank, (page_id, commit_id, timestamp) in enumerate(iter_pages(workspace)):
+        if rank < rules["keep_last"]:
+            reasons["last"].update((page_id, commit_id))
+        if cutoff is not None and timestamp >= cutoff:
+            reasons["ttl"].update((page_id, commit_id))
+
+    # 2. 배포 기록 (승인/롤백된 적 있는 내용, 지금 live인 내용은 항상)
+    if rules["keep_approved"]:
+        blobs, page_ids = deployed(workspace)
+        reasons["approved"].update(blobs | page_ids)
+    current = current_deploy(workspace)
+    if current is not None:
+        reasons["live"].add(current["blob"])
+
+    # 3. 계보 — 남기는 버전의 조상은 diff/히스토리에 필요
+    names = set().union(*reasons.values())
+    reasons["lineage"] = ancestors_of(names, workspace) - names
+    names |= reasons["lineage"]
+    return names, {reason: len(found) for reason, found in reasons.items()}
+
+
+def plan(workspace=None, **overrides):
+    """dry-run 보고서. 지울 파일 목록은 "paths"(저장소 기준 상대 경로)에 담긴다."""
+    workspace = workspace or get_workspace()
+    rules = policy(**overrides)
+    started = time.perf_counter()
+    files, cached = scan_files(workspace)
+    scan_ms = (time.perf_counter() - started) * 1000
+
+    names, kept = reachable(workspace, rules)
+    index = get_blobstore(workspace).names()
+    kept_paths = {index[name] for name in names if name in index}
+
+    # 파일마다 os.path.join을 부르지 않도록 디렉토리별 (상대, 절대) 경로 앞부분을 만들어 둠
+    prefixes = {
+        directory: (os.path.join("static", directory, ""), workspace.path("static", directory, ""))
+        for directory in PAGE_DIRS
+    }
+    now = time.time()
+    paths, size, grace = [], 0, 0
+    for directory, name, file_size, mtime in files:
+        relative, absolute = prefixes[directory]
+        # blob은 별칭이 가리키는 경로로, 예전 파일은 파일 이름(uuid/커밋 해시)으로도 판단
+        if name in names or f"{absolute}{name}.html" in kept_paths:
+            continue
+        if now - mtime < rules["grace_seconds"]:
+            grace += 1
+            continue
+        paths.append(f"{relative}{name}.html")
+        size += file_size
+
+    return {
+        "policy": rules,
+        "scanned": len(files),
+        "cached_dirs": cached,
+        "scan_ms": round(scan_ms, 1),
+        "kept": kept,
+        "reachable": len(files) - len(paths) - grace,
+        "grace": grace,
+        "unreachable": len(paths),
+        "unreachable_bytes": size,
+        "paths": paths,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+@timed("gc")
+def collect(workspace=None, dry_run=True, **overrides):
+    """보존 정책에 걸리지 않는 페이지를 logs/archive/pages-<시각>.tar.gz로 묶고 지운 뒤 삭제를 커밋한다.
+
+    dry_run이면 보고서만 (지울 파일은 앞 20개만 sample로). 보관한 페이지는 restore()로 되살릴 수 있다.
+    git 히스토리는 다시 쓰지 않으므로 이미 커밋된 내용은 히스토리에 남고, 앞으로의 트리/체크아웃만 작아진다.
+    """
+    workspace = workspace or get_workspace()
+    # 같은 저장소에서 GC가 동시에 두 번 돌지 않도록 (다른 저장소는 따로)
+    with workspace.gc_lock:
+        report = plan(workspace, **overrides)
+        paths = report.pop("paths")
+        report["dry_run"] = dry_run
+        report["sample"] = paths[:20]
+        if dry_run or not paths:
+            return report
+
+        started = time.perf_counter()
+        store = get_blobstore(workspace)
+        archive_path, archived = _archive(workspace, store, paths)
+
+        # 1. 파일 삭제 (압축본/스냅샷도 함께). 없는 파일마다 remove를 시도하지 않도록 목록을 한 번 읽어 둠
+        removed = [workspace.path(relpath) for relpath in archived]
+        existing = set()
+        for directory in PAGE_DIRS:
+            if os.path.isdir(workspace.path("static", directory)):
+                existing.update(entry.path for entry in os.scandir(workspace.path("static", directory)))
+        for path in removed:
+            for target in (path, path + ".gz", path + ".br", snapshot_path(path)):
+                if target in existing:
+                    os.remove(target)
+
+        # 2. 인덱스/별칭 기록에서 빼기
+        report["removed_aliases"] = store.remove(removed)
+
+        # 3. 추적 중인 파일만 트리에서 빼는 커밋
+        tracked = set(workspace.git(
+            "ls-files", "-z", "--", *[os.path.join("static", directory) for directory in PAGE_DIRS]
+        ).stdout.split("\0"))
+        untrack = [relpath for relpath in archived if relpath.replace(os.sep, "/") in tracked]
+        if untrack:
+            result = git_commit_files(
+                [], f"gc: archive {len(archived)} pages to {os.path.basename(archive_path)}",
+                workspace=workspace, removed=untrack
+            )
+            report["commit_id"] = result.get("commit_id")
+            report["commit_message"] = result.get("message")
+            report["commit_timings"] = result.get("timings")
+
+        report.update({
+            "archive": workspace.relpath(archive_path),
+            "archive_bytes": os.path.getsize(archive_path),
+            "archived": len(archived),
+            "apply_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+        logging.info(f"[gc] {len(archived)}개 페이지 보관 → {report['archive']} ({report['archive_bytes']} bytes)")
+        return report
+
+
+def restore(name, workspace=None):
+    """보관된 페이지를 blob 저장소로 되살리고 별칭을 다시 연결한다. sha256 또는 None(보관 기록 없음)
+
+    되살린 blob은 커밋하지 않는다. 보존 정책에 여전히 안 걸리면 다음 GC에서 다시 보관된다.
+    """
+    workspace = workspace or get_workspace()
+    conn = _connect(workspace)
+    row = conn.execute("SELECT archive, member FROM archived WHERE name = ?", (name,)).fetchone()
+    if row is None:
+        return None
+    names = [alias for (alias,) in conn.execute(
+        "SELECT name FROM archived WHERE archive = ? AND member = ?", row
+    )]
+
+    with tarfile.open(os.path.join(workspace.log_path("archive"), row[0]), "r:gz") as tar:
+        html_code = tar.extractfile(row[1]).read().decode("utf-8")
+    sha = get_blobstore(workspace).put(html_code, aliases=names)
+    with conn:
+        conn.executemany("DELETE FROM archived WHERE name = ?", [(alias,) for alias in names])
+    return sha
+
+
+def find_archived(name, workspace=None):
+    """이름이 보관된 압축 파일 이름. 보관된 적 없으면 None."""
+    row = _connect(workspace).execute("SELECT archive FROM archived WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def _archive(workspace, store, paths):
+    # 이름(uuid/커밋 해시/sha) → 파일을 거꾸로 찾을 수 있게 경로별 이름 목록을 만듦
+    names_of = {}
+    for name, path in store.names().items():
+        names_of.setdefault(path, []).append(name)
+
+    archive_dir = workspace.log_path("archive")
+    os.makedirs(archive_dir, exist_ok=True)
+    archive_name = f"pages-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.tar.gz"
+    archive_path = os.path.join(archive_dir, archive_name)
+    tmp_path = archive_path + ".tmp"
+
+    archived, rows, manifest = [], [], {}
+    timestamp = datetime.utcnow().isoformat()
+    # GNU 형식: 파일마다 pax 확장 헤더를 만들지 않음 (수만 개일 때 헤더 생성이 압축보다 오래 걸림)
+    with tarfile.open(tmp_path, "w:gz", compresslevel=6, format=tarfile.GNU_FORMAT) as tar:
+        for relpath in paths:
+            path = workspace.path(relpath)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                    mtime = os.fstat(f.fileno()).st_mtime
+            except FileNotFoundError:
+                continue  # 목록 캐시 이후 지워진 파일
+            info = tarfile.TarInfo(relpath.replace(os.sep, "/"))
+            info.size = len(data)
+            info.mtime = int(mtime)
+            tar.addfile(info, fileobj=io.BytesIO(data))
+            member_names = sorted(set(names_of.get(path, [])) | {os.path.basename(relpath)[:-len(".html")]})
+            manifest[info.name] = member_names
+            rows.extend((name, archive_name, info.name, timestamp) for name in member_names)
+            archived.append(relpath)
+
+        # 압축 파일만으로도 복원할 수 있도록 이름 목록을 함께 넣음
+        data = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+        info = tarfile.TarInfo("manifest.json")
+        info.size = len(data)
+        info.mtime = int(time.time())
+        tar.addfile(info, fileobj=io.BytesIO(data))
+
+    # 압축 파일이 디스크에 남은 뒤에만 원본을 지우도록 fsync 후 rename
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, archive_path)
+
+    conn = _connect(workspace)
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO archived (name, archive, member, timestamp) VALUES (?, ?, ?, ?)", rows
+        )
+    return archive_path, archived
+
+
+def _connect(workspace=None):
+    workspace = workspace or get_workspace()
+    db_path = workspace.log_path("retention.db")
+
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+if __name__ == "__main__":
+    # python -m generate.retention                 — dry-run 보고서 (RETAIN_* 환경 변수로 정책 조정)
+    # python -m generate.retention --apply         — 보관 + 삭제 + 커밋
+    # python -m generate.retention --restore <id>  — 보관된 페이지 되살리기
+    logging.basicConfig(level=logging.INFO)
+    if "--restore" in sys.argv:
+        name = sys.argv[sys.argv.index("--restore") + 1]
+        sha = restore(name)
+        logging.info(f"[gc] {name} → {sha}" if sha else f"[gc] {name} 보관 기록 없음")
+    else:
+        print(json.dumps(collect(dry_run="--apply" not in sys.argv), indent=2, ensure_ascii=False))
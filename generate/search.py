@@ -0,0 +1,249 @@
+import os
+import re
+import sys
+import html
+import time
+import sqlite3
+import logging
+import threading
+from generate.workspace import get_workspace
+from generate.blobstore import content_hash
+from generate.metrics import timed
+
+
+# 본문은 이 길이(문자)까지만 색인 (아주 큰 페이지가 색인을 키우지 않도록)
+SEARCH_MAX_TEXT = int(os.getenv("SEARCH_MAX_TEXT", "20000"))
+
+# docs: 검색 결과로 보여줄 원문, docs_fts: 색인용 토큰 (docs.id = docs_fts.rowid)
+# 같은 내용(blob)은 한 번만 색인하고 가장 최근 페이지 id/프롬프트로 갱신한다.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    blob TEXT NOT NULL UNIQUE,
+    page_id TEXT NOT NULL,
+    commit_id TEXT,
+    timestamp TEXT,
+    kind TEXT,
+    prompt TEXT,
+    title TEXT,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS docs_page_id ON docs (page_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(prompt, body, tokenize='unicode61');
+"""
+
+# 한글은 띄어쓰기 단위에 조사가 붙어 있어 단어 그대로 색인하면 "메뉴"로 "메뉴를"을 못 찾는다.
+# 한글 연속 구간은 두 글자씩 겹쳐 자른(bigram) 토큰으로, 나머지는 단어 그대로 색인한다.
+_HANGUL = re.compile(r"[가-힣]+")
+_TERMS = re.compile(r"[가-힣]+|[^\W_가-힣]+")
+_IGNORED = re.compile(
+    r"<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>",
+    flags=re.DOTALL | re.IGNORECASE
+)
+_TITLE = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", flags=re.DOTALL | re.IGNORECASE)
+_TAGS = re.compile(r"<[^>]*>")
+_SPACES = re.compile(r"\s+")
+
+_local = threading.local()
+
+
+def page_text(html_code):
+    """(제목, 화면에 보이는 텍스트)"""
+    match = _TITLE.search(html_code)
+    title = html.unescape(_SPACES.sub(" ", match.group(1))).strip() if match else ""
+    text = _TAGS.sub(" ", _IGNORED.sub(" ", _TITLE.sub(" ", html_code)))
+    return title, html.unescape(_SPACES.sub(" ", text)).strip()[:SEARCH_MAX_TEXT]
+
+
+def terms(text):
+    """색인/검색에 쓰는 토큰 목록 (한글은 bigram)"""
+    tokens = []
+    for word in _TERMS.findall(text.lower()):
+        if _HANGUL.fullmatch(word) and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def match_query(q):
+    """검색어 → FTS5 MATCH 식. 단어마다 AND, 한글 단어는 bigram 구(phrase), 나머지는 접두어 검색."""
+    parts = []
+    for word in _TERMS.findall(q.lower()):
+        if _HANGUL.fullmatch(word) and len(word) > 1:
+            parts.append('"' + " ".join(terms(word)) + '"')
+        else:
+            # 한 글자 한글/입력 중인 영단어는 접두어로
+            parts.append(f'"{word}"*')
+    return " ".join(parts)
+
+
+def index_page(page_id, prompt, html_code, commit_id=None, timestamp=None, kind="generate", workspace=None):
+    """페이지 하나를 색인한다. log_commit 때마다 호출된다."""
+    conn = _connect(workspace)
+    with conn:
+        _index(conn, _document(page_id, prompt, html_code, commit_id, timestamp, kind))
+
+
+def index_pages(documents, workspace=None):
+    """[(page_id, prompt, html, commit_id, timestamp, kind), ...]를 한 트랜잭션으로 색인. 색인한 수를 반환."""
+    conn = _connect(workspace)
+    count = 0
+    with conn:
+        for document in documents:
+            _index(conn, _document(*document))
+            count += 1
+    return count
+
+
+@timed("search")
+def search(q, limit=20, workspace=None):
+    """관련도(프롬프트 가중) 순 검색 결과 [{"page_id", "commit_id", "timestamp", "kind", "prompt", "title", "snippet"}]"""
+    match = match_query(q)
+    if not match:
+        return []
+    rows = _connect(workspace).execute(
+        "SELECT d.page_id, d.commit_id, d.timestamp, d.kind, d.prompt, d.title, d.text "
+        "FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid "
+        "WHERE docs_fts MATCH ? ORDER BY bm25(docs_fts, 3.0, 1.0), d.timestamp DESC LIMIT ?",
+        (match, limit)
+    ).fetchall()
+
+    words = _TERMS.findall(q.lower())
+    results = []
+    for page_id, commit_id, timestamp, kind, prompt, title, text in rows:
+        results.append({
+            "page_id": page_id,
+            "commit_id": commit_id,
+            "timestamp": timestamp,
+            "kind": kind,
+            "prompt": prompt,
+            "title": title,
+            "snippet": _snippet(text, words),
+        })
+    return results
+
+
+def backfill(workspace=None):
+    """커밋 로그의 페이지와 static/generated, static/preview 파일을 한 번에 색인한다. 색인한 수를 반환.
+
+    이미 색인된 내용(blob)은 건너뛴다.
+    """
+    from generate.logger import read_commits, entry_kind
+    from generate.blobstore import get_blobstore
+
+    workspace = workspace or get_workspace()
+    store = get_blobstore(workspace)
+    conn = _connect(workspace)
+    indexed = {blob for (blob,) in conn.execute("SELECT blob FROM docs")}
+
+    def documents():
+        # 1) 로그에 남은 페이지 (프롬프트 있음)
+        seen = set()
+        for entry in read_commits(workspace=workspace):
+            kind = entry_kind(entry.get("extra_info"))
+            if kind == "rollback":
+                continue
+            page_id = entry.get("page_id") or entry["commit_id"]
+            seen.add(page_id)
+            html_code = store.read(page_id)
+            if html_code is None or content_hash(html_code) in indexed:
+                continue
+            indexed.add(content_hash(html_code))
+            yield page_id, entry.get("prompt", ""), html_code, entry["commit_id"], entry.get("timestamp"), kind
+
+        # 2) 로그에 없는 예전 파일 (프롬프트 없음)
+        for directory in ("generated", "preview"):
+            path = workspace.path("static", directory)
+            if not os.path.isdir(path):
+                continue
+            for item in os.scandir(path):
+                name = item.name[:-len(".html")]
+                if not item.name.endswith(".html") or name in seen:
+                    continue
+                with open(item.path, "r", encoding="utf-8") as f:
+                    html_code = f.read()
+                if content_hash(html_code) in indexed:
+                    continue
+                indexed.add(content_hash(html_code))
+                timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(item.stat().st_mtime))
+                yield name, "", html_code, None, timestamp, directory
+
+    return index_pages(documents(), workspace=workspace)
+
+
+def _document(page_id, prompt, html_code, commit_id=None, timestamp=None, kind="generate"):
+    title, text = page_text(html_code)
+    return {
+        "blob": content_hash(html_code),
+        "page_id": page_id,
+        "commit_id": commit_id,
+        "timestamp": timestamp,
+        "kind": kind,
+        "prompt": prompt or "",
+        "title": title,
+        "text": text,
+    }
+
+
+def _index(conn, document):
+    # 같은 내용이 다시 저장되면 이전 행을 지우고 최신 정보로 다시 넣음
+    row = conn.execute("SELECT id FROM docs WHERE blob = ?", (document["blob"],)).fetchone()
+    if row:
+        conn.execute("DELETE FROM docs WHERE id = ?", row)
+        conn.execute("DELETE FROM docs_fts WHERE rowid = ?", row)
+    cursor = conn.execute(
+        "INSERT INTO docs (blob, page_id, commit_id, timestamp, kind, prompt, title, text) "
+        "VALUES (:blob, :page_id, :commit_id, :timestamp, :kind, :prompt, :title, :text)",
+        document
+    )
+    conn.execute(
+        "INSERT INTO docs_fts (rowid, prompt, body) VALUES (?, ?, ?)",
+        (cursor.lastrowid, " ".join(terms(document["prompt"])),
+         " ".join(terms(document["title"] + " " + document["text"])))
+    )
+
+
+def _snippet(text, words, width=80):
+    # 검색어가 처음 나오는 곳 앞뒤로 자름 (프롬프트에만 있으면 본문 앞부분)
+    lowered = text.lower()
+    positions = [lowered.find(word) for word in words if word in lowered]
+    start = max(0, min(positions) - width // 4) if positions else 0
+    snippet = text[start:start + width]
+    return ("…" if start > 0 else "") + snippet + ("…" if start + width < len(text) else "")
+
+
+def _connect(workspace=None):
+    workspace = workspace or get_workspace()
+    db_path = workspace.log_path("search.db")
+
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+if __name__ == "__main__":
+    # python -m generate.search             — 기존 페이지 일괄 색인
+    # python -m generate.search "점심 메뉴"  — 검색
+    logging.basicConfig(level=logging.INFO)
+    workspace = get_workspace()
+    if len(sys.argv) > 1:
+        start = time.perf_counter()
+        found = search(" ".join(sys.argv[1:]), workspace=workspace)
+        logging.info(f"[search] {len(found)}건 ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        for result in found:
+            logging.info(f"[search] {result['page_id']} {result['timestamp']} {result['prompt'][:40]!r} {result['snippet']!r}")
+    else:
+        start = time.perf_counter()
+        count = backfill(workspace)
+        logging.info(f"[search] {count}개 페이지 색인 ({time.perf_counter() - start:.1f}s)")
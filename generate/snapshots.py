@@ -0,0 +1,177 @@
+import os
+import re
+import sys
+import html
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from generate.workspace import get_workspace
+from generate.publish import atomic_write
+from generate.search import page_text
+from generate.metrics import timed
+
+
+# 스냅샷 HTML 조각의 최대 크기(바이트) — 히스토리 카드 수십 장을 한 번에 보내도 가볍도록
+SNAPSHOT_MAX_BYTES = int(os.getenv("SNAPSHOT_MAX_BYTES", "2048"))
+# 생성/수정 직후 스냅샷을 만드는 백그라운드 스레드 수
+SNAPSHOT_WORKERS = int(os.getenv("SNAPSHOT_WORKERS", "2"))
+MAX_HEADINGS = 6
+
+_HEADINGS = re.compile(r"<h([1-3])\b[^>]*>(.*?)</h\1\s*>", flags=re.DOTALL | re.IGNORECASE)
+_STYLES = re.compile(r"<style\b[^>]*>(.*?)</style\s*>", flags=re.DOTALL | re.IGNORECASE)
+_RULES = re.compile(r"([^{}]+)\{([^{}]*)\}")
+_TAGS = re.compile(r"<[^>]*>")
+_SPACES = re.compile(r"\s+")
+
+# 카드 모양을 살리는 데 필요한 속성만, 외부 자원/스크립트가 끼어들 수 없는 값만 옮긴다
+_CSS_PROPERTIES = {"color", "background-color", "background", "font-family", "font-weight", "text-align"}
+_SAFE_VALUE = re.compile(r"^[#\w\s,.'\"%()+-]{1,100}$")
+_UNSAFE_VALUE = re.compile(r"url|expression|var\(|@import|\\", flags=re.IGNORECASE)
+
+_executor = ThreadPoolExecutor(max_workers=SNAPSHOT_WORKERS, thread_name_prefix="snapshot")
+
+
+def snapshot_path(page_path):
+    """페이지 파일 옆에 두는 스냅샷 경로 (static/blobs/<sha>.snap.json 등)"""
+    return page_path[:-len(".html")] + ".snap.json"
+
+
+@timed("snapshot")
+def build_snapshot(html_code):
+    """{"title", "headings", "html"} — 제목/소제목/첫 문단과 핵심 CSS만 담은 정적 요약."""
+    title, text = page_text(html_code)
+    headings = []
+    for level, inner in _HEADINGS.findall(html_code):
+        heading = html.unescape(_SPACES.sub(" ", _TAGS.sub(" ", inner))).strip()
+        if heading:
+            headings.append({"level": int(level), "text": heading[:80]})
+        if len(headings) >= MAX_HEADINGS:
+            break
+    title = (title or (headings[0]["text"] if headings else ""))[:100]
+
+    body_style, heading_style = _critical_css(html_code)
+    items = [heading for heading in headings if heading["text"] != title]
+    summary = text[:200]
+
+    # 크기 제한을 넘으면 본문 요약 → 소제목 순으로 줄임
+    while True:
+        fragment = _render(title, items, summary, body_style, heading_style)
+        if len(fragment.encode("utf-8")) <= SNAPSHOT_MAX_BYTES or not (summary or items):
+            break
+        if summary:
+            summary = summary[:len(summary) // 2] if len(summary) > 20 else ""
+        else:
+            items = items[:-1]
+
+    return {"title": title, "headings": headings, "html": fragment}
+
+
+def write_snapshot(page_path, html_code=None):
+    """페이지 파일 옆에 스냅샷을 쓰고 반환한다."""
+    if html_code is None:
+        with open(page_path, "r", encoding="utf-8") as f:
+            html_code = f.read()
+    snapshot = build_snapshot(html_code)
+    atomic_write(snapshot_path(page_path), json.dumps(snapshot, ensure_ascii=False))
+    return snapshot
+
+
+def schedule_snapshot(page_path, html_code):
+    """생성/수정이 끝난 페이지의 스냅샷을 백그라운드에서 만든다. (응답을 기다리게 하지 않음)"""
+    if os.path.exists(snapshot_path(page_path)):
+        return  # 같은 내용(blob)은 이미 만들어 둠
+    def run():
+        try:
+            write_snapshot(page_path, html_code)
+        except Exception:
+            logging.exception(f"[snapshot] {page_path} 스냅샷 생성 실패")
+    _executor.submit(run)
+
+
+def read_snapshots(names, store):
+    """{이름: 스냅샷} — 아직 없으면(예전 페이지, 백그라운드 작업 전) 그 자리에서 만든다."""
+    snapshots = {}
+    for name in names:
+        page_path = store.resolve(name)
+        if page_path is None:
+            continue
+        try:
+            with open(snapshot_path(page_path), "r", encoding="utf-8") as f:
+                snapshots[name] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            snapshots[name] = write_snapshot(page_path)
+    return snapshots
+
+
+def backfill(workspace=None, processes=None):
+    """스냅샷이 없는 모든 페이지(blob, static/generated, static/preview)를 프로세스 풀로 처리. 만든 수를 반환."""
+    workspace = workspace or get_workspace()
+    paths = []
+    for directory in ("blobs", "generated", "preview"):
+        path = workspace.path("static", directory)
+        if not os.path.isdir(path):
+            continue
+        for entry in os.scandir(path):
+            # uuid 링크는 가리키는 blob의 스냅샷을 씀
+            if entry.name.endswith(".html") and not entry.is_symlink() \
+                    and not os.path.exists(snapshot_path(entry.path)):
+                paths.append(entry.path)
+    if not paths:
+        return 0
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return sum(pool.map(_backfill_one, paths, chunksize=32))
+
+
+def _backfill_one(page_path):
+    try:
+        write_snapshot(page_path)
+        return 1
+    except Exception:
+        logging.exception(f"[snapshot] {page_path} 스냅샷 생성 실패")
+        return 0
+
+
+def _critical_css(html_code):
+    """<style>의 body/html/:root, h1 규칙에서 안전한 속성만 뽑아 인라인 style 문자열로."""
+    body, heading = {}, {}
+    for css in _STYLES.findall(html_code):
+        for selectors, declarations in _RULES.findall(css):
+            targets = {selector.strip().lower() for selector in selectors.split(",")}
+            for target, into in (({"body", "html", ":root"}, body), ({"h1"}, heading)):
+                if targets & target:
+                    into.update(_declarations(declarations))
+    return _style(body), _style(heading)
+
+
+def _declarations(declarations):
+    result = {}
+    for declaration in declarations.split(";"):
+        name, _, value = declaration.partition(":")
+        name, value = name.strip().lower(), value.strip()
+        if name in _CSS_PROPERTIES and _SAFE_VALUE.match(value) and not _UNSAFE_VALUE.search(value):
+            result[name] = value
+    return result
+
+
+def _style(properties):
+    return html.escape("; ".join(f"{name}: {value}" for name, value in properties.items()))
+
+
+def _render(title, headings, summary, body_style, heading_style):
+    parts = [f'<div class="snapshot" style="{body_style}">']
+    if title:
+        parts.append(f'<h1 style="{heading_style}">{html.escape(title)}</h1>')
+    if headings:
+        parts.append("<ul>" + "".join(f"<li>{html.escape(h['text'])}</li>" for h in headings) + "</ul>")
+    if summary:
+        parts.append(f"<p>{html.escape(summary)}</p>")
+    parts.append("</div>")
+    return "".join(parts)
+
+
+if __name__ == "__main__":
+    # python -m generate.snapshots [프로세스 수]  — 기존 페이지 스냅샷 일괄 생성
+    logging.basicConfig(level=logging.INFO)
+    count = backfill(processes=int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    logging.info(f"[snapshot] 스냅샷 {count}개 생성")
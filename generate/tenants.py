@@ -0,0 +1,147 @@
+import os
+import re
+import sys
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from generate.workspace import get_workspace
+
+
+# 테넌트(프로젝트)별 저장소를 두는 디렉토리 — 테넌트마다 <루트>/<이름> 에 별도 clone
+TENANT_ROOT = os.getenv("ORRNE_TENANT_ROOT", "~/orrne-tenants")
+# 테넌트 저장소가 커밋/push하는 브랜치 접두사 (배포 대상: origin의 tenants/<이름>)
+TENANT_BRANCH_PREFIX = os.getenv("ORRNE_TENANT_BRANCH_PREFIX", "tenants/")
+# 요청에서 테넌트를 고르는 헤더 (없으면 ?tenant=, 둘 다 없으면 기본 저장소)
+TENANT_HEADER = "X-Orrne-Tenant"
+DEFAULT_TENANT = "default"
+# 요청에서 처음 쓰일 때 저장소를 만들어도 되는 테넌트 (쉼표 구분). 나머지는 create_tenant/CLI/관리자 API로 만든다
+ALLOWED_TENANTS = {name.strip().lower() for name in os.getenv("ORRNE_TENANTS", "").split(",") if name.strip()}
+
+_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+class TenantError(ValueError):
+    pass
+
+
+class UnknownTenantError(TenantError):
+    """만들어지지 않았고 ORRNE_TENANTS에도 없는 테넌트."""
+
+
+def tenant_workspace(name=None):
+    """테넌트 이름 → Workspace. 없는 테넌트는 ORRNE_TENANTS에 있을 때만 저장소를 만든다.
+
+    기본 테넌트(이름 없음/"default")는 기존 저장소(ORRNE_REPO_DIR, main) 그대로.
+    나머지는 기본 저장소를 clone한 별도 작업 디렉토리와 브랜치를 가지므로
+    인덱스/커밋 락, fast-import writer, 로그 DB, blob 저장소를 다른 테넌트와 공유하지 않는다.
+    요청마다 불리므로 아무 이름으로나 clone/push가 일어나지 않도록, 그 밖의 이름은 UnknownTenantError.
+    """
+    name = _validate(name)
+    if name == DEFAULT_TENANT:
+        return get_workspace()
+    root, branch = _location(name)
+    if not os.path.isdir(os.path.join(root, ".git")):
+        if name not in ALLOWED_TENANTS:
+            raise UnknownTenantError(f"없는 테넌트입니다: {name!r}")
+        return create_tenant(name)
+    return get_workspace(root, branch=branch)
+
+
+def create_tenant(name):
+    """테넌트 저장소를 만든다 (이미 있으면 그대로). CLI/관리자 API용. Workspace를 반환."""
+    name = _validate(name)
+    if name == DEFAULT_TENANT:
+        return get_workspace()
+    root, branch = _location(name)
+    if not os.path.isdir(os.path.join(root, ".git")):
+        with _tenant_lock(name):
+            if not os.path.isdir(os.path.join(root, ".git")):
+                _create(root, branch)
+    return get_workspace(root, branch=branch)
+
+
+def tenants():
+    """만들어진 테넌트 이름 목록 (기본 테넌트 제외)"""
+    root = os.path.abspath(os.path.expanduser(TENANT_ROOT))
+    if not os.path.isdir(root):
+        return []
+    return sorted(entry.name for entry in os.scandir(root)
+                  if _NAME.match(entry.name) and os.path.isdir(os.path.join(entry.path, ".git")))
+
+
+def _validate(name):
+    name = (name or DEFAULT_TENANT).strip().lower()
+    if name != DEFAULT_TENANT and not _NAME.match(name):
+        raise TenantError(f"잘못된 테넌트 이름입니다: {name!r}")
+    return name
+
+
+def _location(name):
+    """(저장소 경로, 브랜치)"""
+    return os.path.join(os.path.abspath(os.path.expanduser(TENANT_ROOT)), name), TENANT_BRANCH_PREFIX + name
+
+
+def _tenant_lock(name):
+    with _locks_lock:
+        lock = _locks.get(name)
+        if lock is None:
+            lock = _locks[name] = threading.Lock()
+        return lock
+
+
+def _create(root, branch):
+    """기본 저장소를 로컬 clone → origin을 기본 저장소의 origin으로 → 테넌트 브랜치로 전환.
+
+    worktree 대신 clone을 쓰는 이유: .git이 파일인 worktree에서는 fast-import writer가 ref를 직접 읽지 못함.
+    임시 디렉토리에서 만든 뒤 옮기므로 도중에 실패해도 반쯤 만든 저장소가 남지 않는다.
+    """
+    base = get_workspace()
+    os.makedirs(os.path.dirname(root), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".creating-", dir=os.path.dirname(root))
+    try:
+        # 1. 기본 저장소의 현재 브랜치를 하드링크 clone (객체 복사 없음)
+        subprocess.run(["git", "clone", "-q", "--branch", base.branch, base.root, staging],
+                       check=True, capture_output=True, text=True)
+
+        # 2. push 대상은 기본 저장소와 같은 origin, 커밋 작성자 설정도 그대로
+        origin = base.git("remote", "get-url", base.remote, check=False).stdout.strip()
+        if origin:
+            _git(staging, "remote", "set-url", "origin", origin)
+        for key in ("user.name", "user.email"):
+            value = base.git("config", key, check=False).stdout.strip()
+            if value:
+                _git(staging, "config", key, value)
+
+        # 3. origin에 이미 테넌트 브랜치가 있으면 이어 받고, 없으면 기본 브랜치에서 새로 시작
+        remote_branch = _git(staging, "ls-remote", "--heads", "origin", branch, check=False).stdout.strip()
+        if remote_branch:
+            _git(staging, "fetch", "-q", "origin", branch)
+            _git(staging, "checkout", "-q", "-b", branch, "FETCH_HEAD")
+        else:
+            _git(staging, "checkout", "-q", "-b", branch)
+
+        os.replace(staging, root)
+        logging.info(f"[tenants] {root} ({branch}) 생성")
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _git(cwd, *args, check=True):
+    return subprocess.run(["git", *args], cwd=cwd, check=check, capture_output=True, text=True)
+
+
+if __name__ == "__main__":
+    # python -m generate.tenants          — 테넌트 목록
+    # python -m generate.tenants <이름>   — 테넌트 저장소 만들기
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 1:
+        workspace = create_tenant(sys.argv[1])
+        logging.info(f"[tenants] {sys.argv[1]}: {workspace.root} ({workspace.branch})")
+    else:
+        for name in tenants():
+            logging.info(f"[tenants] {name}")
@@ -0,0 +1,72 @@
+import os
+import threading
+import subprocess
+
+
+# 생성물/로그/git 작업이 모두 일어나는 저장소 경로
+DEFAULT_REPO_DIR = os.getenv("ORRNE_REPO_DIR", "~/orrne-server-clean")
+
+_workspaces = {}
+_workspaces_lock = threading.Lock()
+
+
+def get_workspace(root=None, branch="main", remote="origin"):
+    """저장소 경로별 Workspace를 하나씩만 만들어 공유한다. (락도 함께 공유됨)"""
+    root = os.path.abspath(os.path.expanduser(root or DEFAULT_REPO_DIR))
+    with _workspaces_lock:
+        workspace = _workspaces.get((root, branch))
+        if workspace is None:
+            workspace = Workspace(root, branch=branch, remote=remote)
+            _workspaces[(root, branch)] = workspace
+        return workspace
+
+
+class Workspace:
+    """저장소 하나에 대한 경로와 git 실행 컨텍스트.
+
+    os.chdir 대신 모든 파일 경로를 절대 경로로 만들고 git에는 cwd를 넘긴다.
+    index_lock은 git 인덱스/ref를 바꾸는 단계만 직렬화하는 데 쓴다.
+    publish_lock(live index 교체), gc_lock(보관/삭제)도 저장소마다 따로 두어 테넌트끼리 기다리지 않는다.
+    deploy_lock은 배포(승인/롤백)의 현재 배포 확인 → live 교체 → 배포 기록을 한 단위로 묶는다.
+    """
+
+    def __init__(self, root, branch="main", remote="origin"):
+        self.root = root
+        self.branch = branch
+        self.remote = remote
+        self.index_lock = threading.Lock()
+        self.publish_lock = threading.Lock()
+        self.deploy_lock = threading.Lock()
+        self.gc_lock = threading.Lock()
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def index_path(self):
+        return self.path("static", "index.html")
+
+    def log_path(self, name):
+        return self.path("logs", name)
+
+    def relpath(self, path):
+        """git에 넘길 저장소 기준 상대 경로."""
+        return os.path.relpath(os.path.join(self.root, path), self.root)
+
+    def git(self, *args, check=True):
+        return subprocess.run(
+            ["git", *args],
+            cwd=self.root,
+            check=check,
+            capture_output=True,
+            text=True
+        )
+
+    def git_bytes(self, *args, input=None):
+        """바이너리 출력(cat-file --batch 등)이 필요한 git 명령. stdout bytes를 반환."""
+        return subprocess.run(
+            ["git", *args],
+            cwd=self.root,
+            check=True,
+            capture_output=True,
+            input=input
+        ).stdout
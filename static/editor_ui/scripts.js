@@ -5,6 +5,7 @@ function loadCommitList() {
     card.addEventListener("click", () => {
       document.querySelectorAll(".commit-card").forEach(c => c.classList.remove("selected"));
       card.classList.add("selected");
+      preloadPrevious(card.id.replace('commit-', ''));
     });
   });
 }
@@ -39,13 +40,13 @@ async function submitRevision() {
 
     const result = await res.json();
 
-    if (res.ok && result.status === "success") {
+    if (res.ok && (result.status === "success" || result.status === "skipped")) {
       alert("✅ 수정 요청 완료! 미리보기에서 확인하세요.");
       document.getElementById("revision-input").value = "";
 
       // 👉 미리보기 프레임 반영
       document.getElementById("preview-frame").src = result.preview_url;
-      document.getElementById("preview-frame").dataset.commitId = result.commit_id;
+      document.getElementById("preview-frame").dataset.commitId = result.page_id || result.commit_id;
 
       loadCommitList();  // 새로운 커밋 목록 반영
     } else {
@@ -67,27 +68,78 @@ function showToast(msg) {
   setTimeout(() => t.style.display = 'none', 2500);
 }
 
+// SSE 스트림 읽기: 이벤트마다 onEvent(event, data) 호출
+async function readEventStream(res, onEvent) {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let sep;
+    while ((sep = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      let event = 'message', data = '';
+      raw.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      });
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
+// 생성 중인 HTML을 미리보기에 점진적으로 표시 (fence 앞부분은 건너뜀)
+function renderPartialPreview(text) {
+  const start = text.search(/<!doctype html|<html[\s>]/i);
+  if (start === -1) return;
+  document.getElementById('preview-frame').srcdoc = text.slice(start).replace(/```\s*$/, '');
+}
+
 // 프롬프트 생성 요청
 document.getElementById('submit-btn').addEventListener('click', async () => {
   const prompt = document.getElementById('prompt-input').value.trim();
   if (!prompt) return showToast('⚠️ 프롬프트를 입력해주세요.');
 
+  const frame = document.getElementById('preview-frame');
   document.getElementById('loading-indicator').style.display = 'inline';
   try {
-    const res = await fetch('/generate', {
+    const res = await fetch('/generate/stream', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ prompt: prompt + "\n\n반드시 <html>…</html> 전체 구조의 HTML을 출력해 주세요." })
     });
-	  
-    const data = await res.json();
-    if (data.commit_id) {
-      document.getElementById('preview-frame').src = `/preview/${data.commit_id}`;
-      document.getElementById('preview-frame').dataset.commitId = data.commit_id;
+    if (!res.ok) {
+      const err = await res.json();
+      return showToast('❌ 생성 실패: ' + (err.error || '서버 오류'));
+    }
+
+    let text = '';
+    let lastRender = 0;
+    let data = {};
+    await readEventStream(res, (event, payload) => {
+      if (event === 'chunk') {
+        text += payload.text;
+        // 너무 잦은 iframe 갱신을 막기 위해 300ms 간격으로만 렌더링
+        if (Date.now() - lastRender > 300) {
+          renderPartialPreview(text);
+          lastRender = Date.now();
+        }
+      } else {
+        data = payload;
+      }
+    });
+
+    if (data.page_id || data.commit_id) {
+      frame.removeAttribute('srcdoc');
+      frame.src = data.preview_url || `/preview/${data.commit_id}`;
+      frame.dataset.commitId = data.page_id || data.commit_id;
       showToast('✅ 생성 완료!');
       fetchCommitHistory();
     } else {
-      showToast('❌ 생성 실패');
+      showToast('❌ 생성 실패' + (data.error ? ': ' + data.error : ''));
     }
   } catch (e) {
     showToast('❌ 오류: ' + e.message);
@@ -120,31 +172,140 @@ document.getElementById('toggle-sidebar-btn').addEventListener('click', () => {
   }
 });
 
-// 커밋 히스토리 불러오기
-async function fetchCommitHistory() {
-  const res = await fetch('/admin/logs');
+// 커밋 히스토리 불러오기 (최신순, 페이지 단위)
+let historyCursor = null;
+
+async function fetchCommitHistory(append = false) {
+  const params = new URLSearchParams({ order: 'desc', limit: 50 });
+  if (append && historyCursor !== null) params.set('after', historyCursor);
+
+  const res = await fetch(`/admin/logs?${params}`);
   const data = await res.json();
   const list = document.getElementById('commit-list');
-  list.innerHTML = '';
-  (data.logs || []).reverse().forEach((c, i) => {
+  if (!append) list.innerHTML = '';
+  (data.logs || []).forEach((c, i) => {
     const div = document.createElement('div');
-    div.className = 'commit-card' + (i === 0 ? ' latest-commit' : '');
-    div.id = `commit-${c.commit_id}`;  // <- 이 ID가 있어야 수정 시 추출 가능
+    div.className = 'commit-card' + (!append && i === 0 ? ' latest-commit' : '');
+    div.id = `commit-${c.page_id || c.commit_id}`;  // <- 이 ID가 있어야 수정 시 추출 가능
     div.innerHTML = `
       <strong>${c.commit_id}</strong><br>
       ${c.prompt}<br>
       ${c.timestamp}<br>
-      <button class="rollback-btn" data-commit-id="${c.commit_id}">🔙 롤백</button>
+      <button class="rollback-btn" data-commit-id="${c.page_id || c.commit_id}">🔙 롤백</button>
+      ${c.page_id ? `<button class="similar-btn" data-page-id="${c.page_id}">🔍 비슷한 버전</button>` : ''}
+      ${c.page_id ? `<button class="history-btn" data-page-id="${c.page_id}">📜 버전 계보</button>` : ''}
+      <div class="snapshot-slot"></div>
+      <div class="similar-list"></div>
     `;
     list.appendChild(div);
   });
+  loadSnapshots((data.logs || []).map(c => c.page_id || c.commit_id));
+
+  historyCursor = data.next_cursor;
+  document.getElementById('load-more-btn').style.display = historyCursor === null ? 'none' : 'block';
   loadCommitList();
 }
 
+document.getElementById('load-more-btn').addEventListener('click', () => fetchCommitHistory(true));
+
+// 카드마다 iframe을 띄우지 않고 서버가 만들어 둔 정적 스냅샷을 한 번에 받아 표시
+async function loadSnapshots(ids) {
+  if (!ids.length) return;
+  const res = await fetch(`/previews?ids=${ids.map(encodeURIComponent).join(',')}`);
+  if (!res.ok) return;
+  const data = await res.json();
+  Object.entries(data.previews || {}).forEach(([id, snap]) => {
+    const slot = document.querySelector(`#commit-${CSS.escape(id)} .snapshot-slot`);
+    if (slot) slot.innerHTML = snap.html;
+  });
+}
+
+// 선택한 버전의 직전 버전을 미리 받아 둠 (프리뷰는 immutable 캐시라 비교 화면이 바로 뜸)
+const previousVersions = {};
+
+async function preloadPrevious(pageId) {
+  if (pageId in previousVersions) return;
+  const res = await fetch(`/history/${pageId}?limit=20`);
+  if (!res.ok) return;
+  const data = await res.json();
+  previousVersions[pageId] = data.previous;
+  if (data.previous) fetch(data.previous.preview_url);
+}
+
+// 버전 계보 (조상 → 현재 → 자손, 클릭하면 미리보기)
+document.addEventListener('click', async e => {
+  if (!e.target.classList.contains('history-btn')) return;
+  e.stopPropagation();
+  const pageId = e.target.dataset.pageId;
+  const list = e.target.parentElement.querySelector('.similar-list');
+  const res = await fetch(`/history/${pageId}?limit=20`);
+  if (!res.ok) { list.innerHTML = '버전 기록 없음'; return; }
+  const data = await res.json();
+  const link = v => `<a href="#" class="similar-link" data-page-id="${v.page_id}">${'&nbsp;'.repeat(v.depth * 2)}${v.page_id.slice(0, 8)}${v.deploys.length ? ' 🚀' : ''}</a>`;
+  list.innerHTML = [...data.ancestors, data.version, ...data.descendants]
+    .map(v => v.page_id === pageId ? `<b>${link(v)}</b>` : link(v)).join('<br>');
+});
+
+// 프롬프트/페이지 내용 검색 (입력이 멈추면 조회, 비우면 히스토리로 복귀)
+let searchTimer = null;
+
+document.getElementById('search-input').addEventListener('input', e => {
+  clearTimeout(searchTimer);
+  const q = e.target.value.trim();
+  searchTimer = setTimeout(() => (q ? searchPages(q) : fetchCommitHistory()), 200);
+});
+
+// 페이지 본문에서 뽑은 텍스트라 태그처럼 보이는 문자가 있을 수 있음
+function escapeHtml(text) {
+  const div = document.createElement('div');
+  div.textContent = text || '';
+  return div.innerHTML;
+}
+
+async function searchPages(q) {
+  const res = await fetch(`/search?${new URLSearchParams({ q, limit: 30 })}`);
+  const data = await res.json();
+  const list = document.getElementById('commit-list');
+  list.innerHTML = (data.results || []).length ? '' : '검색 결과 없음';
+  (data.results || []).forEach(r => {
+    const div = document.createElement('div');
+    div.className = 'commit-card';
+    div.id = `commit-${r.page_id}`;
+    div.innerHTML = `
+      <strong>${escapeHtml(r.title || r.page_id.slice(0, 8))}</strong><br>
+      ${escapeHtml(r.prompt)}<br>
+      <small>${escapeHtml(r.snippet)}</small><br>
+      ${r.timestamp || ''}
+    `;
+    list.appendChild(div);
+  });
+  document.getElementById('load-more-btn').style.display = 'none';
+  loadCommitList();
+}
+
+// 구조/텍스트가 비슷한 이전 버전 목록 (클릭하면 미리보기)
+document.addEventListener('click', async e => {
+  if (e.target.classList.contains('similar-btn')) {
+    e.stopPropagation();
+    const pageId = e.target.dataset.pageId;
+    const list = e.target.parentElement.querySelector('.similar-list');
+    const res = await fetch(`/similar/${pageId}?limit=5`);
+    const data = await res.json();
+    list.innerHTML = (data.similar || []).length
+      ? data.similar.map(s => `<a href="#" class="similar-link" data-page-id="${s.page_id}">${s.page_id.slice(0, 8)} (거리 ${s.distance})</a>`).join('<br>')
+      : '비슷한 버전 없음';
+  } else if (e.target.classList.contains('similar-link')) {
+    e.preventDefault();
+    const frame = document.getElementById('preview-frame');
+    frame.src = `/preview/${e.target.dataset.pageId}`;
+    frame.dataset.commitId = e.target.dataset.pageId;
+  }
+});
+
 // 롤백 모달
 document.addEventListener('click', e => {
   if (e.target.classList.contains('rollback-btn')) {
-    const id = e.target.dataset.id;
+    const id = e.target.dataset.commitId;
     const m = document.getElementById('rollback-modal');
     m.style.display = 'flex'; m.dataset.commitId = id;
   }